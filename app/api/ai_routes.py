@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import json
+import time
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from app.services.auth import get_current_user
-from app.services.rag import rag_pipeline
-from app.core.rbac import RBAC_RULES
+from app.services.rag import rag_pipeline, prepare_context, get_cached_answer, cache_answer
+from app.services.llm import stream_answer
+from app.services.search_service import embed_query
+from app.services.batch_chat import answer_batch, BATCH_MAX_QUERIES
+from app.core.metrics import collect_stages, idk_total
+from app.core.rbac import RolePermissions, get_current_permissions
 from app.services.logs import log_access  # ensure logs.py is inside services
 
 
@@ -14,27 +23,36 @@ class ChatRequest(BaseModel):
     query: str
 
 
+class BatchChatRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=BATCH_MAX_QUERIES)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat")
 def chat(
     request: ChatRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    permissions: RolePermissions = Depends(get_current_permissions)
 ):
-    role = current_user["role"].lower()
+    # RBAC: unknown roles are rejected by get_current_permissions
+    role = permissions.role
     username = current_user["username"]
 
-    # RBAC: check role exists
-    if role not in RBAC_RULES:
-        raise HTTPException(status_code=403, detail="Role not allowed")
-
-    # Call RAG
-    result = rag_pipeline(request.query, role)
+    # Call RAG, timing each stage for the access log
+    with collect_stages() as stages:
+        result = rag_pipeline(request.query, permissions)
 
     # Proper AI logging
     log_access(
         username=username,
         role=role,
         query=request.query,
-        confidence=result["confidence"]
+        confidence=result["confidence"],
+        stages=stages,
+        prompt_tokens=result.get("prompt_tokens")
     )
 
     return {
@@ -44,3 +62,139 @@ def chat(
         "role": role,
         "department": role
     }
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_user),
+    permissions: RolePermissions = Depends(get_current_permissions)
+):
+    """
+    Server-Sent Events variant of /chat.
+
+    Emits a `meta` event (sources, confidence) as soon as retrieval is done,
+    then one `token` event per LLM fragment, then a final `done` event.
+    """
+    # RBAC: unknown roles are rejected by get_current_permissions
+    role = permissions.role
+    username = current_user["username"]
+
+    # Embedding and retrieval are CPU-bound, keep them off the event loop
+    with collect_stages() as stages:
+        # Embedded once for the answer cache, retrieval and the cache store
+        query_embedding = await run_in_threadpool(embed_query, request.query)
+        cached = await run_in_threadpool(get_cached_answer, request.query, permissions, query_embedding)
+
+        context = None
+        if cached is None:
+            context = await run_in_threadpool(prepare_context, request.query, permissions, query_embedding)
+            if context is None:
+                idk_total.inc("no_context")
+
+    retrieved = cached or context or {}
+    sources = retrieved.get("sources", [])
+    confidence = retrieved.get("confidence", 0.0)
+
+    async def event_stream():
+        # A client disconnect closes the generator at a yield; the access is
+        # still logged, but only a completed answer is cached
+        try:
+            yield sse_event("meta", {
+                "sources": sources,
+                "confidence": confidence,
+                "role": role,
+                "department": role
+            })
+
+            parts = []
+
+            if cached is not None:
+                parts.append(cached["answer"])
+                yield sse_event("token", {"text": cached["answer"]})
+
+            elif context is not None:
+                start = time.perf_counter()
+                async for token in stream_answer(context["prompt"]):
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+                stages["stream_answer"] = (time.perf_counter() - start) * 1000
+
+            answer = "".join(parts).strip()
+
+            # Guard against empty output
+            if not answer:
+                if context is not None:
+                    idk_total.inc("empty_answer")
+                answer = "I don't know"
+                yield sse_event("token", {"text": answer})
+
+            yield sse_event("done", {"answer": answer})
+
+            cache_answer(request.query, permissions, context, answer, query_embedding)
+
+        finally:
+            # Only enqueues; the access log is written by a background thread
+            log_access(
+                username=username,
+                role=role,
+                query=request.query,
+                confidence=confidence,
+                stages=stages,
+                prompt_tokens=context.get("prompt_tokens") if context else None
+            )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    current_user: dict = Depends(get_current_user),
+    permissions: RolePermissions = Depends(get_current_permissions)
+):
+    """
+    Answer many questions under the caller's role in one request.
+
+    Streams newline-delimited JSON, one line per query as soon as it is
+    answered (in completion order, matched by `index`); a query that fails
+    gets an `error` line instead of failing the batch. The last line is a
+    summary with `done: true`.
+    """
+    # RBAC: unknown roles are rejected by get_current_permissions
+    role = permissions.role
+    username = current_user["username"]
+
+    async def lines():
+        answered = errors = 0
+
+        async for item in answer_batch(request.queries, permissions):
+            prompt_tokens = item.pop("prompt_tokens", None)
+
+            if "error" in item:
+                errors += 1
+            else:
+                answered += 1
+                log_access(
+                    username=username,
+                    role=role,
+                    query=item["query"],
+                    confidence=item["confidence"],
+                    prompt_tokens=prompt_tokens
+                )
+
+            yield json.dumps(item) + "\n"
+
+        yield json.dumps({
+            "done": True,
+            "answered": answered,
+            "errors": errors,
+            "role": role,
+            "department": role
+        }) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,42 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, Depends, Query
 from fastapi.security import OAuth2PasswordRequestForm
-import sqlite3
 
-from app.core.database import DB_PATH
-from app.models.models import verify_password
 from app.services.auth import create_access_token, get_current_user
 from app.core.rbac import rbac_required
-from app.services.rag import rag_pipeline
 from app.services.logs import log_access  # adjust if logs.py exists elsewhere
-
-from pydantic import BaseModel
+from app.services.login_service import authenticate
 
 
 router = APIRouter()
 
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    username = form_data.username
-    password = form_data.password
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT username, password, role FROM users WHERE username=?",
-        (username,)
-    )
-    user = cursor.fetchone()
-    conn.close()
-
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-
-    db_username, db_password, role = user
-
-    if not verify_password(password, db_password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    # DB lookup and bcrypt run off the event loop, bcrypt on its own bounded pool
+    db_username, role = await authenticate(form_data.username, form_data.password)
 
     token = create_access_token({
         "sub": db_username,
@@ -1,4 +1,8 @@
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 # Project root directory
@@ -7,8 +11,108 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # Store DB at project root
 DB_PATH = BASE_DIR / "users.db"
 
+# Connections kept open for reuse; more are opened (and closed) under bursts
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Kept as one constant so sqlite3's per-connection statement cache reuses the prepared lookup
+USER_LOOKUP_SQL = "SELECT username, password, role FROM users WHERE username=?"
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections in WAL mode.
+
+    WAL lets readers (logins) proceed while a writer holds the database.
+    Each connection keeps its own prepared-statement cache, so reusing
+    connections also reuses compiled queries.
+    """
+
+    def __init__(self, path: Path, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.reused = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=64
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+        with self._lock:
+            self.reused += 1
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "opened": self.opened,
+            "reused": self.reused
+        }
+
+
+pool = ConnectionPool(DB_PATH)
+
 
 def get_db():
+    """
+    A new, unpooled connection owned by the caller, who closes it.
+    Request handling uses pooled_connection instead.
+    """
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a pooled connection: `with pooled_connection() as conn: ...`.
+    Uncommitted changes are rolled back when the connection is returned.
+    """
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def fetch_user(username: str):
+    with pooled_connection() as conn:
+        return conn.execute(USER_LOOKUP_SQL, (username,)).fetchone()
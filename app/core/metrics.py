@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# METRICS_ENABLED=0 turns spans and counters into no-ops and disables /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Seconds; spans range from sub-millisecond cache lookups to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not METRICS_ENABLED:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, *labels):
+        """
+        (cumulative bucket counts, sum, count) for one label set, or None.
+        """
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                return None
+            series = list(series)
+
+        cumulative = []
+        total = 0
+        for n in series[:-2]:
+            total += n
+            cumulative.append(total)
+        return cumulative, series[-2], series[-1]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            labelsets = sorted(self._series)
+
+        for labels in labelsets:
+            cumulative, total, count = self.snapshot(*labels)
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            for bound, n in zip(bounds, cumulative):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {n}")
+            suffix = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """
+        `collect()` returns extra exposition lines, computed at scrape time.
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "chatbot_stage_duration_seconds",
+    "Time spent in each request pipeline stage",
+    ("stage",)
+)
+
+idk_total = registry.counter(
+    "chatbot_idk_answers_total",
+    "Answers short-circuited to \"I don't know\"",
+    ("reason",)
+)
+
+empty_results_total = registry.counter(
+    "chatbot_empty_search_results_total",
+    "RBAC-filtered searches that returned no chunks"
+)
+
+cache_hits_total = registry.counter(
+    "chatbot_cache_hits_total",
+    "Cache hits by cache",
+    ("cache",)
+)
+
+prompt_tokens = registry.histogram(
+    "chatbot_prompt_tokens",
+    "LLM prompt size in tokens, with and without context packing",
+    ("packing",),
+    buckets=(100, 200, 300, 400, 500, 600, 800, 1000, 1250, 1500, 2000, 3000)
+)
+
+
+# Per-request stage timings (ms), collected for the access log
+_request_stages = ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def collect_stages():
+    """
+    Record the duration of every span entered in this context into a dict.
+    """
+    stages = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+def record_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage)
+
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds * 1000
+
+
+@contextmanager
+def span(stage: str):
+    if not METRICS_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def stats_collector(prefix: str, get_stats):
+    """
+    Collector exposing every numeric value of a `stats()` dict as a gauge.
+    """
+    def collect() -> list:
+        lines = []
+        for key, value in get_stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"chatbot_{prefix}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return lines
+
+    return collect
+
+
+def register_service_collectors():
+    from app.core import database
+    from app.services import auth, logs, login_service, rag, search_service
+    from app.services.llm_gateway import gateway
+
+    for prefix, get_stats in [
+        ("embedding_cache", search_service.embedding_cache.stats),
+        ("embedding_batcher", search_service.embedding_batcher.stats),
+        ("answer_cache", rag.answer_cache.stats),
+        ("singleflight", rag.inflight_requests.stats),
+        ("token_cache", auth.token_cache.stats),
+        ("login", login_service.login_metrics.stats),
+        ("access_log", logs.access_log.stats),
+        ("db_pool", database.pool.stats),
+        ("llm_gateway", gateway.stats),
+    ]:
+        registry.register_collector(stats_collector(prefix, get_stats))
+
+
+def render() -> str:
+    return registry.render()
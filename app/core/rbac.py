@@ -13,6 +13,80 @@ RBAC_RULES = {
 }
 
 
+def role_filter_key(role: str) -> str:
+    """
+    Metadata key that tags a chunk as readable by a role (e.g. "role_finance").
+    Written by the embedder and matched with a Chroma `where` clause at query time.
+    """
+    return f"role_{role.strip().lower()}"
+
+
+class RolePermissions:
+    """
+    Everything request handling needs to know about a role, computed once.
+
+    Built for every role in RBAC_RULES at import time so per-request code
+    does dictionary lookups instead of re-normalising role strings.
+    """
+
+    __slots__ = ("role", "departments", "all_access", "filter_key", "role_filter")
+
+    def __init__(self, role: str):
+        self.role = role.strip().lower()
+        self.departments = frozenset(RBAC_RULES[self.role])
+        self.all_access = self.role == "c-level"
+        self.filter_key = role_filter_key(self.role)
+
+        # Chroma `where` clause; C-Level can read every chunk, so no filter
+        self.role_filter = None if self.all_access else {self.filter_key: True}
+
+    def can_access(self, department: str) -> bool:
+        return department.lower() in self.departments
+
+    def __repr__(self):
+        return f"RolePermissions({self.role!r})"
+
+
+ROLE_PERMISSIONS = {role: RolePermissions(role) for role in RBAC_RULES}
+
+# Raw role claims seen so far ("Finance", "finance ", ...) -> permissions
+_permissions_by_claim = dict(ROLE_PERMISSIONS)
+
+
+def get_role_permissions(role):
+    """
+    Precompiled permissions for a role claim, or None if the role is unknown.
+    Accepts a RolePermissions unchanged, so callers can pass either.
+    A claim that is not a string (missing or malformed token) is a 403.
+    """
+    if isinstance(role, RolePermissions):
+        return role
+
+    if not isinstance(role, str):
+        raise HTTPException(status_code=403, detail="Role not allowed")
+
+    permissions = _permissions_by_claim.get(role)
+
+    if permissions is None:
+        permissions = ROLE_PERMISSIONS.get(role.strip().lower())
+        if permissions is not None:
+            _permissions_by_claim[role] = permissions
+
+    return permissions
+
+
+def get_current_permissions(current_user: dict = Depends(get_current_user)) -> RolePermissions:
+    """
+    Dependency resolving the caller's role to its precompiled permissions.
+    """
+    permissions = get_role_permissions(current_user["role"])
+
+    if permissions is None:
+        raise HTTPException(status_code=403, detail="Role not allowed")
+
+    return permissions
+
+
 def rbac_required(department: str = None):
     """
     If department is None → allow based on role only
@@ -20,21 +94,19 @@ def rbac_required(department: str = None):
     """
 
     def checker(current_user: dict = Depends(get_current_user)):
-        user_role = current_user["role"].lower()
+        permissions = get_role_permissions(current_user["role"])
 
-        if user_role not in RBAC_RULES:
+        if permissions is None:
             raise HTTPException(status_code=403, detail="Role not recognized")
 
         # If no department specified, just allow authenticated users
         if department is None:
             return current_user
 
-        allowed_departments = RBAC_RULES[user_role]
-
-        if department.lower() not in allowed_departments:
+        if not permissions.can_access(department):
             raise HTTPException(
                 status_code=403,
-                detail=f"Access denied for role: {user_role}"
+                detail=f"Access denied for role: {permissions.role}"
             )
 
         return current_user
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+# uvicorn configures this logger, so startup timings show up in the server log
+logger = logging.getLogger("uvicorn.error")
+
+# Cold-start timing per component, in milliseconds
+component_timings = {}
+
+_ready = threading.Event()
+_state = {"status": "starting", "error": None, "started_at": time.monotonic()}
+
+
+@contextmanager
+def timed(component: str):
+    start = time.perf_counter()
+    yield
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    component_timings[component] = round(elapsed_ms, 1)
+    logger.info("Startup: %s ready in %.1f ms", component, elapsed_ms)
+
+
+def warm_up():
+    """
+    Load heavy resources and exercise them once, then mark the app ready.
+    """
+    from app.services import context_packer, llm, rag, search_service
+
+    try:
+        search_service.warm_up(timed)
+
+        if rag.CONTEXT_PACKING:
+            with timed("token_encoder"):
+                context_packer.get_encoder()
+
+        with timed("llm_client"):
+            try:
+                llm.get_client()
+                llm.get_async_client()
+            except Exception as exc:
+                # Answers degrade to "I don't know"; retrieval still works
+                logger.warning("Startup: LLM client unavailable: %s", exc)
+
+    except Exception as exc:
+        _state["status"] = "failed"
+        _state["error"] = repr(exc)
+        logger.exception("Startup: warm-up failed")
+        return
+
+    total_ms = (time.monotonic() - _state["started_at"]) * 1000
+    component_timings["total"] = round(total_ms, 1)
+    _state["status"] = "ready"
+    _ready.set()
+    logger.info("Startup: application ready in %.1f ms", total_ms)
+
+
+def start_warm_up():
+    _state["started_at"] = time.monotonic()
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> dict:
+    return {
+        "status": _state["status"],
+        "error": _state["error"],
+        "timings_ms": dict(component_timings)
+    }
+
+
+async def shutdown():
+    from app.core import database
+    from app.services import llm, login_service, logs, search_service
+
+    search_service.shutdown()
+    login_service.shutdown()
+    await llm.shutdown()
+    database.pool.close()
+
+    # Last, so records logged during shutdown are still flushed
+    logs.shutdown()
@@ -1,14 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.api.routes import router as auth_router
 from app.api.ai_routes import router as ai_router
+from app.core.startup import start_warm_up, is_ready, readiness, shutdown
+from app.core import metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy resources load in the background; /health and /login work immediately
+    start_warm_up()
+    yield
+    await shutdown()
 
 
-app = FastAPI(title="Company Chatbot Backend")
+app = FastAPI(title="Company Chatbot Backend", lifespan=lifespan)
 
 app.include_router(auth_router)
 app.include_router(ai_router)
 
+metrics.register_service_collectors()
+
 
 @app.get("/")
 def root():
@@ -17,4 +32,23 @@ def root():
 
 @app.get("/health")
 def health_check():
+    # Liveness: the process is up and serving requests
     return {"status": "OK"}
+
+
+@app.get("/ready")
+def readiness_check():
+    # Readiness: model, vector store and LLM client are loaded and warmed up
+    return JSONResponse(
+        status_code=200 if is_ready() else 503,
+        content=readiness()
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    # Prometheus text exposition format
+    if not metrics.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.services.version_watcher import VersionWatcher
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache matched by query-embedding similarity.
+
+    Entries are partitioned by scope: the frozenset of departments the
+    caller's role can read. A lookup only ever searches the caller's own
+    scope, and an entry is served only if every chunk it was built from
+    belongs to a department in that scope.
+
+    The whole cache is dropped when the index version marker written by
+    the embedder changes, so answers never outlive a re-index.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256,
+                 ttl_seconds: float = 86400, index_version_path: Path = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._scopes = {}  # scope -> OrderedDict[id -> entry]
+        self._matrices = {}  # scope -> (ids, stacked embeddings), rebuilt lazily
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+        self.watcher = VersionWatcher(index_version_path) if index_version_path else None
+        if self.watcher is not None:
+            self.watcher.changed()  # records the current version
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_index_version(self):
+        # Called with the lock held
+        if self.watcher is not None and self.watcher.changed():
+            self._scopes.clear()
+            self._matrices.clear()
+            self.invalidations += 1
+
+    def _matrix(self, scope: frozenset, entries: OrderedDict):
+        """
+        (ids, stacked embeddings, creation times, usable-by-scope mask) of a
+        scope's entries, rebuilt after the scope changes; called with the lock held.
+        """
+        if scope not in self._matrices:
+            ids = list(entries)
+            self._matrices[scope] = (
+                ids,
+                np.stack([entries[i]["embedding"] for i in ids]),
+                np.array([entries[i]["created_at"] for i in ids]),
+                np.array([entries[i]["departments"] <= scope for i in ids])
+            )
+        return self._matrices[scope]
+
+    def _evict_expired(self, scope: frozenset, entries: OrderedDict, now: float):
+        ids, _, created_at, _ = self._matrix(scope, entries)
+
+        expired = np.flatnonzero(now - created_at > self.ttl_seconds)
+        if len(expired) == 0:
+            return
+
+        for row in expired:
+            del entries[ids[row]]
+        self._matrices.pop(scope, None)
+        if not entries:
+            del self._scopes[scope]
+
+    def lookup(self, scope: frozenset, query_embedding):
+        if self.max_entries <= 0:
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        now = time.time()
+
+        with self._lock:
+            self._check_index_version()
+
+            entries = self._scopes.get(scope)
+            if entries:
+                self._evict_expired(scope, entries, now)
+
+            if not entries:
+                self.misses += 1
+                return None
+
+            # Entries the scope may not be served never win, even when most similar
+            ids, matrix, _, usable = self._matrix(scope, entries)
+            similarities = np.where(usable, matrix @ query, -np.inf)
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(ids[best])
+            self.hits += 1
+            return dict(entries[ids[best]]["result"])
+
+    def store(self, scope: frozenset, query_embedding, result: dict, chunk_departments):
+        if self.max_entries <= 0:
+            return
+
+        departments = frozenset(d.lower() for d in chunk_departments)
+
+        # Never cache an answer the scope could not have produced itself
+        if not departments <= scope:
+            return
+
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+
+        with self._lock:
+            self._check_index_version()
+
+            entries = self._scopes.setdefault(scope, OrderedDict())
+            entries[self._next_id] = {
+                "embedding": embedding,
+                "result": dict(result),
+                "departments": departments,
+                "created_at": time.time()
+            }
+            self._next_id += 1
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+            self._matrices.pop(scope, None)
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "scopes": len(self._scopes),
+                "entries": sum(len(e) for e in self._scopes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -1,18 +1,28 @@
+import os
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
+from app.core.metrics import cache_hits_total, span
+from app.services.token_cache import TokenCache, token_digest
+
 
 # 🔐 Security configuration
 SECRET_KEY = "SUPER_SECRET_KEY_CHANGE_ME"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Verified-token cache; REVOKED_TOKENS_PATH lists revoked tokens or their sha256 digests
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+REVOKED_TOKENS_PATH = os.getenv("REVOKED_TOKENS_PATH")
+
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+token_cache = TokenCache(max_size=TOKEN_CACHE_SIZE, revocation_path=REVOKED_TOKENS_PATH)
+
 
 def create_access_token(data: dict):
     """
@@ -37,10 +47,33 @@ def verify_access_token(token: str):
         return None
 
 
+def revoke_token(token: str):
+    """
+    Reject `token` from now on, even though its signature and exp are valid.
+    """
+    token_cache.revoke(token_digest(token))
+
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Dependency to extract and validate current user from JWT.
+    Verified claims are cached until the token expires.
     """
+    with span("auth"):
+        return _verify_user(token)
+
+
+def _verify_user(token: str):
+    digest = token_digest(token)
+
+    if token_cache.is_revoked(digest):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    current_user = token_cache.get(digest)
+    if current_user is not None:
+        cache_hits_total.inc("token")
+        return dict(current_user)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -50,10 +83,16 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         if username is None or role is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        return {
+        current_user = {
             "username": username,
             "role": role
         }
 
+        # create_access_token always sets exp; tokens without one are not cached
+        if payload.get("exp") is not None:
+            token_cache.put(digest, current_user, payload["exp"])
+
+        return dict(current_user)
+
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
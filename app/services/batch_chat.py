@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.metrics import idk_total, registry, span
+from app.services.rag import (
+    CONTEXT_CANDIDATES, cache_answer, coalesce_key, context_from_chunks, get_cached_answer
+)
+from app.services.llm import generate_answer
+from app.services.search_service import (
+    embed_queries, embed_query, search_with_rbac, search_with_rbac_batch
+)
+
+
+# Largest accepted batch, and LLM calls one batch may have in flight
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "100"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+ITEM_ERROR = "Failed to answer this query"
+
+# uvicorn configures this logger, so fallbacks show up in the server log
+logger = logging.getLogger("uvicorn.error")
+
+batch_fallbacks_total = registry.counter(
+    "chatbot_batch_fallbacks_total",
+    "Batched steps that failed and fell back to one call per query",
+    ("stage",)
+)
+
+
+def record_fallback(stage: str, exc: Exception):
+    batch_fallbacks_total.inc(stage)
+    logger.warning("Batch: batched %s failed, falling back to one per query: %r", stage, exc)
+
+
+def answer_item(result: dict) -> dict:
+    return {
+        "answer": result["answer"],
+        "confidence": result["confidence"],
+        "sources": result["sources"]
+    }
+
+
+def prepare_batch(queries: list, permissions) -> tuple:
+    """
+    Retrieval half for every query, in one batched encode and one vector query.
+
+    Returns (prepared, embeddings). `prepared` has one (kind, value) per
+    query: ("answer", result) for cached or "I don't know" answers,
+    ("context", context) when the LLM is needed, ("error", exception) when
+    this query failed. `embeddings` are the query vectors, reused by the
+    answer cache lookup, the search and the cache store.
+    """
+    prepared = [None] * len(queries)
+
+    with span("batch_prepare"):
+        try:
+            embeddings = embed_queries(queries)
+        except Exception as exc:
+            # Each query is then encoded on its own and fails on its own
+            record_fallback("embed", exc)
+            embeddings = [None] * len(queries)
+
+        misses = []
+        for i, query in enumerate(queries):
+            try:
+                if embeddings[i] is None:
+                    embeddings[i] = embed_query(query)
+                cached = get_cached_answer(query, permissions, embeddings[i])
+            except Exception as exc:
+                prepared[i] = ("error", exc)
+                continue
+
+            if cached is not None:
+                prepared[i] = ("answer", cached)
+            else:
+                misses.append(i)
+
+        try:
+            batch = search_with_rbac_batch(
+                [queries[i] for i in misses], permissions, k=CONTEXT_CANDIDATES,
+                query_embeddings=[embeddings[i] for i in misses]
+            )
+        except Exception as exc:
+            # Fall back to one search per query, so a bad query only fails itself
+            record_fallback("search", exc)
+            batch = None
+
+        for n, i in enumerate(misses):
+            try:
+                chunks = batch[n] if batch is not None else search_with_rbac(
+                    queries[i], permissions, k=CONTEXT_CANDIDATES, query_embedding=embeddings[i]
+                )
+                context = context_from_chunks(queries[i], chunks)
+            except Exception as exc:
+                prepared[i] = ("error", exc)
+                continue
+
+            if context is None:
+                idk_total.inc("no_context")
+                prepared[i] = ("answer", {"answer": "I don't know", "sources": [], "confidence": 0.0})
+            else:
+                prepared[i] = ("context", context)
+
+    return prepared, embeddings
+
+
+def generate(query: str, permissions, context: dict, query_embedding=None) -> dict:
+    answer = generate_answer(context["prompt"])
+
+    # Guard against empty output
+    if not answer or not answer.strip():
+        idk_total.inc("empty_answer")
+        answer = "I don't know"
+
+    cache_answer(query, permissions, context, answer, query_embedding)
+
+    return {
+        "answer": answer,
+        "sources": context["sources"],
+        "confidence": context["confidence"],
+        "prompt_tokens": context.get("prompt_tokens")
+    }
+
+
+async def answer_batch(queries: list, permissions):
+    """
+    Yield one item per query as soon as it is answered, in completion order.
+
+    Identical queries (as /chat would coalesce them) are answered once.
+    Items are {"index", "query", "answer", "confidence", "sources"}, or
+    {"index", "query", "error"} for a query that failed; other queries are
+    unaffected. Pending LLM calls are cancelled if the consumer stops.
+    """
+    indices = {}
+    unique = []
+    for i, query in enumerate(queries):
+        if not query.strip():
+            yield {"index": i, "query": query, "error": "Empty query"}
+            continue
+
+        key = coalesce_key(query, permissions)
+        if key not in indices:
+            indices[key] = []
+            unique.append((key, query))
+        indices[key].append(i)
+
+    def items(key, result: dict = None, error: str = None):
+        for i in indices[key]:
+            item = {"index": i, "query": queries[i]}
+            item.update({"error": error} if error else answer_item(result))
+            if result is not None and result.get("prompt_tokens"):
+                item["prompt_tokens"] = result["prompt_tokens"]
+            yield item
+
+    if not unique:
+        return
+
+    prepared, embeddings = await run_in_threadpool(
+        prepare_batch, [query for _, query in unique], permissions
+    )
+
+    limit = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def dispatch(key, query, context, embedding):
+        try:
+            async with limit:
+                return key, await run_in_threadpool(generate, query, permissions, context, embedding), None
+        except Exception:
+            return key, None, ITEM_ERROR
+
+    tasks = []
+    try:
+        for (key, query), (kind, value), embedding in zip(unique, prepared, embeddings):
+            if kind == "context":
+                tasks.append(asyncio.create_task(dispatch(key, query, value, embedding)))
+            elif kind == "answer":
+                for item in items(key, result=value):
+                    yield item
+            else:
+                for item in items(key, error=ITEM_ERROR):
+                    yield item
+
+        for next_done in asyncio.as_completed(tasks):
+            key, result, error = await next_done
+            for item in items(key, result=result, error=error):
+                yield item
+
+    finally:
+        for task in tasks:
+            task.cancel()
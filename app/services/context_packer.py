@@ -0,0 +1,186 @@
+import os
+import re
+from functools import lru_cache
+
+from app.services.lexical_index import tokenize
+
+
+# Context tokens the packer may fill (cl100k_base, the chunker's tokenizer)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "700"))
+
+# Weight of the chunk's vector relevance a sentence keeps with no query-term overlap
+SENTENCE_BASE = float(os.getenv("CONTEXT_SENTENCE_BASE", "0.6"))
+
+# Sentences scoring below this share of the best sentence are dropped
+MIN_RELATIVE_SCORE = float(os.getenv("CONTEXT_MIN_RELATIVE_SCORE", "0.5"))
+
+# Marginal relevance trade-off: 1.0 ranks by relevance only, lower values penalise redundancy
+MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+
+# Shortest shared text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 32
+
+# Sentence ends, or line breaks between table rows
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoder().encode(text))
+
+
+def chunk_relevance(chunk: dict) -> float:
+    # Squared L2 between unit vectors is 2 - 2cos; map back to cosine, clipped to 0..1
+    return min(1.0, max(0.0, 1.0 - chunk["distance"] / 2))
+
+
+def strip_overlap(text: str, other: str) -> str:
+    """
+    Remove from `text` the span it shares with `other` at either end, as
+    produced by the chunker's overlapping windows over one document.
+    """
+    if len(text) < MIN_OVERLAP_CHARS or len(other) < MIN_OVERLAP_CHARS:
+        return text
+
+    # `text` starts where `other` ends
+    pos = other.find(text[:MIN_OVERLAP_CHARS])
+    while pos >= 0:
+        tail = other[pos:]
+        if text.startswith(tail):
+            return text[len(tail):].strip()
+        pos = other.find(text[:MIN_OVERLAP_CHARS], pos + 1)
+
+    # `text` ends where `other` starts
+    pos = text.find(other[:MIN_OVERLAP_CHARS])
+    while pos >= 0:
+        if other.startswith(text[pos:]):
+            return text[:pos].strip()
+        pos = text.find(other[:MIN_OVERLAP_CHARS], pos + 1)
+
+    return text
+
+
+def dedupe_overlaps(chunks: list) -> list:
+    """
+    Texts of `chunks` (best first) with spans already covered by a better
+    chunk from the same source document removed.
+    """
+    kept_by_source = {}
+    texts = []
+
+    for chunk in chunks:
+        text = chunk["text"]
+        for other in kept_by_source.get(chunk["source"], []):
+            text = strip_overlap(text, other)
+        kept_by_source.setdefault(chunk["source"], []).append(chunk["text"])
+        texts.append(text)
+
+    return texts
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def select_sentences(candidates: list, budget: int) -> list:
+    """
+    Greedy marginal-relevance fill: repeatedly take the sentence with the best
+    relevance minus redundancy with what is already chosen, while it fits.
+    """
+    selected = []
+    remaining = list(candidates)
+    # Highest similarity of each candidate to any chosen sentence, updated as sentences are chosen
+    redundancy = {id(c): 0.0 for c in remaining}
+    used = 0
+
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda c: MMR_LAMBDA * c["score"] - (1 - MMR_LAMBDA) * redundancy[id(c)]
+        )
+        remaining.remove(best)
+
+        # Bullet and separator cost about one token each
+        cost = best["tokens"] + 1
+        if used + cost > budget:
+            continue
+
+        selected.append(best)
+        used += cost
+
+        for candidate in remaining:
+            redundancy[id(candidate)] = max(
+                redundancy[id(candidate)], similarity(candidate["terms"], best["terms"])
+            )
+
+    return selected
+
+
+def pack_context(query: str, chunks: list, budget: int = CONTEXT_TOKEN_BUDGET) -> list:
+    """
+    Fit retrieved chunks (best first) into `budget` tokens.
+
+    Overlap between chunks of the same document is removed, sentences are
+    scored by their chunk's vector relevance weighted by query-term
+    coverage, low scorers are dropped and the rest fill the budget by
+    marginal relevance. Returns chunk dicts whose text holds only the chosen
+    sentences, in document order, best chunk first, with token_count the sum
+    of their sentences'; chunks with nothing chosen are left out.
+    """
+    query_terms = frozenset(tokenize(query))
+    candidates = []
+    seen = set()
+
+    for position, (chunk, text) in enumerate(zip(chunks, dedupe_overlaps(chunks))):
+        relevance = chunk_relevance(chunk)
+
+        for order, sentence in enumerate(split_sentences(text)):
+            # Boilerplate repeated across documents is kept once, from the best chunk
+            key = " ".join(sentence.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+
+            terms = frozenset(tokenize(sentence))
+            coverage = len(query_terms & terms) / len(query_terms) if query_terms else 0.0
+
+            candidates.append({
+                "chunk": position,
+                "order": order,
+                "text": sentence,
+                "terms": terms,
+                "score": relevance * (SENTENCE_BASE + (1 - SENTENCE_BASE) * coverage),
+                "tokens": count_tokens(sentence)
+            })
+
+    if not candidates:
+        return []
+
+    best_score = max(c["score"] for c in candidates)
+    candidates = [c for c in candidates if c["score"] >= MIN_RELATIVE_SCORE * best_score]
+
+    by_chunk = {}
+    for sentence in select_sentences(candidates, budget):
+        by_chunk.setdefault(sentence["chunk"], []).append(sentence)
+
+    packed = []
+    for position in sorted(by_chunk):
+        sentences = sorted(by_chunk[position], key=lambda s: s["order"])
+        packed.append(dict(
+            chunks[position],
+            text=" ".join(s["text"] for s in sentences),
+            token_count=sum(s["tokens"] for s in sentences)
+        ))
+
+    return packed
@@ -1,14 +1,27 @@
+import argparse
 import json
+import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 import chromadb
 
+from app.core.rbac import RBAC_RULES, role_filter_key
+from app.services.search_service import INDEX_VERSION_FILE, LEXICAL_INDEX_DIR, NUMPY_INDEX_DIR
+from app.services.lexical_index import build_lexical_index
+from app.services.numpy_backend import INDEX_DTYPES, build_numpy_index, stored_dtype
+from app.services.embedding_store import EmbeddingStore, content_hash, migrate_jsonl
+
 
 # Project root (company-chatbot)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 # Data paths
 CHUNKS_PATH = BASE_DIR / "data" / "processed" / "chunks.jsonl"
+EMBEDDINGS_DIR = BASE_DIR / "data" / "processed" / "embeddings"
+
+# Legacy JSON embedding cache, migrated into EMBEDDINGS_DIR on first run
 EMBEDDED_PATH = BASE_DIR / "data" / "processed" / "chunks_with_embeddings.jsonl"
 
 # Vector DB path (at project root)
@@ -17,6 +30,10 @@ VECTOR_DB_PATH = BASE_DIR / "chroma_db"
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 COLLECTION_NAME = "chroma_db"
 
+# Bulk indexing defaults (override with --batch-size / --upsert-batch-size)
+ENCODE_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 256
+
 
 def load_chunks(path: Path):
     chunks = []
@@ -26,85 +43,257 @@ def load_chunks(path: Path):
     return chunks
 
 
-def load_embedding_cache(path: Path):
-    cache = {}
-    if not path.exists():
-        return cache
+def record_fingerprint(chunk: dict) -> str:
+    """
+    Hash of everything written to Chroma for a chunk; changes trigger a re-upsert.
+    """
+    payload = json.dumps({
+        "text": chunk["text"],
+        "source_document": chunk["source_document"],
+        "department": chunk["department"],
+        "token_count": chunk["token_count"],
+        "model": MODEL_NAME
+    }, sort_keys=True)
+    return content_hash(payload)
 
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            record = json.loads(line)
-            cache[record["chunk_id"]] = record
-    return cache
+
+def indexed_fingerprints(collection, page_size: int = 5000) -> dict:
+    """
+    Map of chunk id -> fingerprint for everything currently in the collection.
+    """
+    fingerprints = {}
+    offset = 0
+
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for chunk_id, meta in zip(page["ids"], page["metadatas"]):
+            fingerprints[chunk_id] = (meta or {}).get("fingerprint")
+
+        if len(page["ids"]) < page_size:
+            return fingerprints
+        offset += page_size
+
+
+def accessible_roles_for(department: str):
+    if department.lower() == "general":
+        return [
+            "Employees", "Finance", "HR",
+            "Marketing", "Engineering", "C-Level"
+        ]
+    return [department, "C-Level"]
+
+
+def build_metadata(chunk: dict):
+    accessible_roles = accessible_roles_for(chunk["department"])
+    readers = {r.strip().lower() for r in accessible_roles}
+
+    return {
+        "source_document": chunk["source_document"],
+        "department": chunk["department"],
+        "accessible_roles": ",".join(accessible_roles),
+        "token_count": chunk["token_count"],
+        "fingerprint": record_fingerprint(chunk),
+        # One boolean flag per role so search can pre-filter with `where`.
+        # Every role gets an explicit value: upsert merges metadata, so a flag
+        # left out would keep its old value when a chunk changes department.
+        **{role_filter_key(r): r in readers for r in sorted(readers | set(RBAC_RULES))}
+    }
+
+
+def batched(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def sync_collection(collection, chunks: list, store, batch_size: int, full: bool = False):
+    """
+    Bring the collection in line with `chunks`; returns (upserted chunks, deleted ids).
+
+    Ids no longer in `chunks` (removed documents, superseded chunks) are
+    deleted, and chunks that are new or whose fingerprint changed are
+    upserted (every chunk with `full`).
+    """
+    indexed = indexed_fingerprints(collection)
+    current_ids = {chunk["chunk_id"] for chunk in chunks}
+
+    # Vectors of removed documents or superseded chunks
+    stale_ids = [chunk_id for chunk_id in indexed if chunk_id not in current_ids]
+    for batch in batched(stale_ids, batch_size):
+        collection.delete(ids=batch)
+
+    pending = [
+        chunk for chunk in chunks
+        if full or indexed.get(chunk["chunk_id"]) != record_fingerprint(chunk)
+    ]
+
+    # upsert keeps re-runs idempotent (add fails on existing ids).
+    # Vectors are read batch by batch from the memory map, so memory stays flat.
+    for batch in batched(pending, batch_size):
+        ids = [chunk["chunk_id"] for chunk in batch]
+
+        collection.upsert(
+            ids=ids,
+            embeddings=store.get_vectors(ids).tolist(),
+            metadatas=[build_metadata(chunk) for chunk in batch],
+            documents=[chunk["text"] for chunk in batch]
+        )
+
+    return pending, stale_ids
 
 
-def save_embedding_cache(records: list, path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for record in records:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+def encode_texts(model, texts: list, batch_size: int, multi_process: bool = False):
+    """
+    Encode texts in batches, optionally fanned out over one process per CPU core.
+    """
+    if not multi_process:
+        return model.encode(texts, batch_size=batch_size, show_progress_bar=len(texts) > batch_size)
 
+    pool = model.start_multi_process_pool()
+    try:
+        return model.encode_multi_process(texts, pool, batch_size=batch_size)
+    finally:
+        model.stop_multi_process_pool(pool)
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Embed chunks and index them in ChromaDB")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE,
+                        help="texts per model.encode batch")
+    parser.add_argument("--upsert-batch-size", type=int, default=UPSERT_BATCH_SIZE,
+                        help="records per Chroma upsert call")
+    parser.add_argument("--multi-process", action="store_true",
+                        help="encode with a multi-process pool across all cores")
+    parser.add_argument("--full", action="store_true",
+                        help="re-upsert every chunk instead of only new or changed ones")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="on-disk precision when creating a new embedding store")
+    parser.add_argument("--index-dtype", choices=INDEX_DTYPES, default="float32",
+                        help="precision of the in-memory NumPy search matrix")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     if not CHUNKS_PATH.exists():
         print(f"Missing file: {CHUNKS_PATH}")
         return
 
     VECTOR_DB_PATH.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
 
     print("Loading chunks...")
     chunks = load_chunks(CHUNKS_PATH)
 
-    print("Loading embedding cache...")
-    cache = load_embedding_cache(EMBEDDED_PATH)
+    print("Loading embedding store...")
+    store = EmbeddingStore(EMBEDDINGS_DIR, dtype=args.dtype, model_name=MODEL_NAME).load()
+
+    if not store.exists() and EMBEDDED_PATH.exists():
+        print(f"Migrating legacy cache {EMBEDDED_PATH.name}...")
+        migrated = migrate_jsonl(EMBEDDED_PATH, store)
+        print(f"Migrated {migrated} vectors (the JSONL file can now be deleted)")
+
+    hashes = {
+        chunk["chunk_id"]: chunk.get("content_hash") or content_hash(chunk["text"])
+        for chunk in chunks
+    }
 
-    print("Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME)
+    # Vectors stored under another id for the same text, such as legacy
+    # chunks migrated under their old ids, are reused without encoding
+    adopted = store.adopt(list(hashes), list(hashes.values()))
+    if adopted:
+        print(f"Reused {adopted} vectors cached under other chunk ids")
+
+    # Re-encode chunks that are new or whose text changed since they were cached
+    to_encode = [
+        chunk for chunk in chunks
+        if store.lookup(chunk["chunk_id"], hashes[chunk["chunk_id"]]) is None
+    ]
+    print(f"{len(chunks) - len(to_encode)} cached, {len(to_encode)} to encode")
+
+    if to_encode:
+        print("Loading embedding model...")
+        model = SentenceTransformer(MODEL_NAME)
+
+        encode_start = time.perf_counter()
+        vectors = encode_texts(
+            model,
+            [chunk["text"] for chunk in to_encode],
+            batch_size=args.batch_size,
+            multi_process=args.multi_process
+        )
+        encode_seconds = time.perf_counter() - encode_start
+
+        store.append(
+            [chunk["chunk_id"] for chunk in to_encode],
+            [hashes[chunk["chunk_id"]] for chunk in to_encode],
+            vectors
+        )
+
+        print(f"Encoded {len(to_encode)} chunks at {len(to_encode) / encode_seconds:.1f} chunks/s")
+
+    # Forget vectors of chunks that no longer exist
+    current_ids = set(hashes)
+    store.remove([chunk_id for chunk_id in list(store.ids) if chunk_id not in current_ids])
+    store.save_index()
+
+    # Reclaim space once re-encoded rows outnumber live ones
+    if store.orphaned_rows > len(store.ids):
+        print(f"Compacting embedding store ({store.orphaned_rows} orphaned rows)...")
+        store.compact()
 
     print("Initializing ChromaDB (persistent)...")
     client = chromadb.PersistentClient(path=str(VECTOR_DB_PATH))
     collection = client.get_or_create_collection(name=COLLECTION_NAME)
 
-    updated_records = []
-
-    for chunk in chunks:
-        chunk_id = chunk["chunk_id"]
-
-        if chunk_id in cache:
-            record = cache[chunk_id]
-            embedding = record["embedding"]
-        else:
-            embedding = model.encode(chunk["text"]).tolist()
-            record = {**chunk, "embedding": embedding}
-
-        updated_records.append(record)
-
-        department = chunk["department"]
-
-        if department.lower() == "general":
-            accessible_roles = [
-                "Employees", "Finance", "HR",
-                "Marketing", "Engineering", "C-Level"
-            ]
-        else:
-            accessible_roles = [department, "C-Level"]
-
-        collection.add(
-            ids=[chunk_id],
-            embeddings=[embedding],
-            metadatas=[{
-                "source_document": chunk["source_document"],
-                "department": department,
-                "accessible_roles": ",".join(accessible_roles),
-                "token_count": chunk["token_count"]
-            }],
-            documents=[chunk["text"]]
+    pending, stale_ids = sync_collection(collection, chunks, store, args.upsert_batch_size, args.full)
+
+    print(f"Index changes: {len(pending)} upserted, {len(stale_ids)} deleted, "
+          f"{len(chunks) - len(pending)} unchanged")
+
+    lexical_dir = VECTOR_DB_PATH / LEXICAL_INDEX_DIR
+    if pending or stale_ids or not lexical_dir.exists():
+        print("Building lexical index...")
+        partitions = build_lexical_index(chunks, lexical_dir)
+        print("Lexical partitions: " + ", ".join(
+            f"{name} ({info['chunks']} chunks, {info['terms']} terms)"
+            for name, info in sorted(partitions.items())
+        ))
+
+    numpy_dir = VECTOR_DB_PATH / NUMPY_INDEX_DIR
+    if pending or stale_ids or stored_dtype(numpy_dir) != args.index_dtype:
+        print("Building NumPy vector index...")
+        info = build_numpy_index(
+            chunks, store.get_vectors([chunk["chunk_id"] for chunk in chunks]), numpy_dir,
+            dtype=args.index_dtype
+        )
+        print(f"NumPy index: {info['rows']} rows, {info['dtype']}, {info['mb']:.1f} MB")
+
+    # Only a real change invalidates query-side caches
+    if pending or stale_ids:
+        (VECTOR_DB_PATH / INDEX_VERSION_FILE).write_text(
+            datetime.now(timezone.utc).isoformat(), encoding="utf-8"
         )
 
-    save_embedding_cache(updated_records, EMBEDDED_PATH)
+    total_seconds = time.perf_counter() - start
+    peak_mb = peak_memory_mb()
 
-    print(f"Embedded {len(updated_records)} chunks")
-    print(f"Saved cache to: {EMBEDDED_PATH}")
+    print(f"Embedded {len(chunks)} chunks")
+    print(f"Throughput: {len(chunks) / total_seconds:.1f} chunks/s overall ({total_seconds:.1f}s)")
+    if peak_mb is not None:
+        print(f"Peak memory: {peak_mb:.0f} MB")
+    print(f"Embedding store: {EMBEDDINGS_DIR} ({store.rows} rows, {store.dtype}, {store.nbytes() / 1e6:.1f} MB)")
     print(f"Chroma collection name: {COLLECTION_NAME}")
     print(f"Vector DB stored at: {VECTOR_DB_PATH}")
 
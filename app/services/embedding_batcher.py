@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching scheduler in front of a sentence encoder.
+
+    Callers on any thread call `encode(text)` and block on a Future. A single
+    worker thread collects the texts that arrive within `max_wait_ms` of the
+    first one (or until `max_batch_size` is reached), encodes them in one
+    batched call and hands each caller its own vector. A caller waits at
+    most `timeout` seconds.
+
+    Each worker consumes its own queue, so a worker started after stop()
+    never competes with one that is still draining.
+    """
+
+    def __init__(self, encode_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 timeout: float = 30.0):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+
+    def _start(self):
+        # Called with the lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, args=(self._queue,), name="embedding-batcher", daemon=True
+            )
+            self._thread.start()
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            thread, work = self._thread, self._queue
+            self._thread = None
+            # Texts queued before stop() are still encoded by the old worker
+            self._queue = queue.Queue()
+            work.put(_STOP)
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def encode(self, text: str, timeout: float = None):
+        """
+        Queue `text` for the next batch and wait for its vector.
+        Raises TimeoutError if none arrives within `timeout` (default self.timeout).
+        """
+        future = Future()
+
+        with self._lock:
+            self._start()
+            self._queue.put((text, future))
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        wait = self.timeout if timeout is None else timeout
+        try:
+            return future.result(wait)
+        except TimeoutError:
+            # If still queued, the worker skips it
+            future.cancel()
+            raise TimeoutError(f"query encoding timed out after {wait}s") from None
+
+    def _collect(self, work: queue.Queue, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = work.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then let the worker loop exit
+                work.put(_STOP)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self, work: queue.Queue):
+        while True:
+            first = work.get()
+            if first is _STOP:
+                return
+
+            # Callers that timed out have cancelled their futures
+            batch = [
+                (text, future) for text, future in self._collect(work, first)
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+
+            # Identical texts in the same window are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                vectors = self.encode_batch(texts)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                future.set_result(by_text[text])
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            queue_depth = self._queue.qsize()
+            max_queue_depth = self.max_queue_depth
+
+        return {
+            "queue_depth": queue_depth,
+            "max_queue_depth": max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": max(self.batch_sizes) if self.batch_sizes else 0,
+            "batch_size_counts": dict(sorted(self.batch_sizes.items()))
+        }
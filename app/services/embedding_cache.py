@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: lower-cased with whitespace collapsed.
+    MiniLM is uncased, so this does not change the resulting embedding.
+    """
+    return " ".join(query.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings with a time-to-live.
+
+    Entries are evicted when the cache exceeds `max_size` (least recently
+    used first) or when they are older than `ttl_seconds`. If `path` is set
+    the cache can be saved to and restored from disk across restarts.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 86400,
+                 path: Path = None, model_name: str = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        self.model_name = model_name
+
+        self._entries = OrderedDict()  # key -> (created_at, embedding)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            created_at, embedding = entry
+
+            if self._expired(created_at, now):
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, query: str, embedding: list, created_at: float = None):
+        key = normalize_query(query)
+
+        with self._lock:
+            self._entries[key] = (created_at or time.time(), embedding)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def save(self):
+        """
+        Persist non-expired entries (oldest first) to `path`.
+        """
+        if self.path is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, created_at, embedding]
+                for key, (created_at, embedding) in self._entries.items()
+                if not self._expired(created_at, now)
+            ]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "entries": entries}, f)
+
+        # Atomic swap so a crash mid-write never leaves a corrupt cache
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """
+        Restore entries saved by `save`. Caches written for a different
+        model, or unreadable files, are ignored.
+        """
+        if self.path is None or not self.path.exists():
+            return 0
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        if data.get("model") != self.model_name:
+            return 0
+
+        now = time.time()
+        loaded = 0
+
+        for key, created_at, embedding in data.get("entries", []):
+            if not self._expired(created_at, now):
+                self.put(key, embedding, created_at=created_at)
+                loaded += 1
+
+        return loaded
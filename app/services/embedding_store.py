@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+VECTORS_FILE = "vectors.bin"
+INDEX_FILE = "index.json"
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mappable embedding matrix on disk.
+
+    `vectors.bin` is a raw row-major matrix of `dtype` values, one row per
+    vector. `index.json` maps each chunk id to its row and the hash of the
+    text it was computed from, so changed chunks are re-encoded and
+    unchanged ones are reused. New vectors are appended without rewriting
+    existing rows; rows orphaned by re-encoding are dropped by `compact`.
+    """
+
+    def __init__(self, directory: Path, dim: int = 384, dtype: str = "float32",
+                 model_name: str = None):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {SUPPORTED_DTYPES}")
+
+        self.directory = Path(directory)
+        self.dim = dim
+        self.dtype = dtype
+        self.model_name = model_name
+
+        self.rows = 0
+        self.ids = {}  # chunk_id -> [row, content_hash]
+        self._matrix = None
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.directory / VECTORS_FILE
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE
+
+    def exists(self) -> bool:
+        return self.index_path.exists()
+
+    def load(self):
+        if not self.exists():
+            return self
+
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        # The stored layout wins over constructor defaults
+        self.dim = index["dim"]
+        self.dtype = index["dtype"]
+        self.model_name = index.get("model", self.model_name)
+        self.rows = index["rows"]
+        self.ids = index["ids"]
+        self._matrix = None
+        return self
+
+    def save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "model": self.model_name,
+                "rows": self.rows,
+                "ids": self.ids
+            }, f)
+
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, chunk_id: str, text_hash: str = None):
+        """
+        Row of `chunk_id`, or None if missing or computed from different text.
+        """
+        entry = self.ids.get(chunk_id)
+        if entry is None:
+            return None
+        if text_hash is not None and entry[1] != text_hash:
+            return None
+        return entry[0]
+
+    def adopt(self, chunk_ids: list, text_hashes: list) -> int:
+        """
+        Point chunk ids with no usable row at a row stored under another id
+        for the same text hash (e.g. migrated under a legacy chunk id).
+        Returns how many ids were adopted; their vectors need no encoding.
+        """
+        rows_by_hash = {}
+        for row, text_hash in self.ids.values():
+            rows_by_hash.setdefault(text_hash, row)
+
+        adopted = 0
+        for chunk_id, text_hash in zip(chunk_ids, text_hashes):
+            if self.lookup(chunk_id, text_hash) is None and text_hash in rows_by_hash:
+                self.ids[chunk_id] = [rows_by_hash[text_hash], text_hash]
+                adopted += 1
+
+        return adopted
+
+    def matrix(self):
+        """
+        Read-only memory map of all stored rows (live and orphaned).
+        """
+        if self._matrix is None:
+            if self.rows == 0:
+                self._matrix = np.empty((0, self.dim), dtype=self.dtype)
+            else:
+                self._matrix = np.memmap(
+                    self.vectors_path, dtype=self.dtype, mode="r",
+                    shape=(self.rows, self.dim)
+                )
+        return self._matrix
+
+    def get_vectors(self, chunk_ids: list):
+        rows = [self.ids[chunk_id][0] for chunk_id in chunk_ids]
+        return np.asarray(self.matrix()[rows], dtype=np.float32)
+
+    def append(self, chunk_ids: list, text_hashes: list, vectors, save: bool = True):
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        row_bytes = self.dim * np.dtype(self.dtype).itemsize
+
+        # Drop any bytes past the last indexed row (e.g. from an interrupted run)
+        mode = "r+b" if self.vectors_path.exists() else "wb"
+        with open(self.vectors_path, mode) as f:
+            f.truncate(self.rows * row_bytes)
+            f.seek(self.rows * row_bytes)
+            f.write(vectors.tobytes())
+
+        for i, (chunk_id, text_hash) in enumerate(zip(chunk_ids, text_hashes)):
+            self.ids[chunk_id] = [self.rows + i, text_hash]
+
+        self.rows += len(vectors)
+        self._matrix = None
+
+        if save:
+            self.save_index()
+
+    def remove(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.ids.pop(chunk_id, None)
+
+    @property
+    def orphaned_rows(self) -> int:
+        # Adopted ids can share a row with the id they were adopted from
+        return self.rows - len({entry[0] for entry in self.ids.values()})
+
+    def compact(self):
+        """
+        Rewrite the matrix keeping only rows still referenced by the index.
+        """
+        live_ids = sorted(self.ids, key=lambda chunk_id: self.ids[chunk_id][0])
+        rows = [self.ids[chunk_id][0] for chunk_id in live_ids]
+        vectors = np.array(self.matrix()[rows]) if rows else np.empty((0, self.dim), dtype=self.dtype)
+        hashes = [self.ids[chunk_id][1] for chunk_id in live_ids]
+
+        self._matrix = None
+        self.rows = 0
+        self.ids = {}
+
+        if self.vectors_path.exists():
+            self.vectors_path.unlink()
+
+        if live_ids:
+            self.append(live_ids, hashes, vectors)
+        else:
+            self.save_index()
+
+    def nbytes(self) -> int:
+        return self.rows * self.dim * np.dtype(self.dtype).itemsize
+
+
+def migrate_jsonl(jsonl_path: Path, store: EmbeddingStore, batch_size: int = 1024):
+    """
+    One-time import of the legacy chunks_with_embeddings.jsonl cache.
+    """
+    migrated = 0
+    ids, hashes, vectors = [], [], []
+
+    def flush():
+        nonlocal migrated
+        if ids:
+            store.append(ids, hashes, np.asarray(vectors, dtype=np.float32), save=False)
+            migrated += len(ids)
+            ids.clear()
+            hashes.clear()
+            vectors.clear()
+
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            ids.append(record["chunk_id"])
+            hashes.append(content_hash(record["text"]))
+            vectors.append(record["embedding"])
+
+            if len(ids) >= batch_size:
+                flush()
+
+    flush()
+    store.save_index()
+    return migrated
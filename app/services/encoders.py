@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import numpy as np
+
+
+ONNX_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxEncoder:
+    """
+    all-MiniLM-L6-v2 exported to ONNX, run with onnxruntime on CPU.
+
+    Reproduces the sentence-transformers pipeline (word-piece tokenization,
+    mean pooling over the attention mask, L2 normalization) without
+    importing torch, and exposes the subset of `SentenceTransformer`
+    used by the query path so it can be swapped in directly.
+    Export a model with `python -m app.services.export_onnx`.
+    """
+
+    def __init__(self, model_dir: Path, quantized: bool = False,
+                 max_seq_length: int = MAX_SEQ_LENGTH, threads: int = None):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx encoder backend needs onnxruntime and tokenizers "
+                "(pip install onnxruntime tokenizers)"
+            ) from e
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / (QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"Missing {model_path}; export it with python -m app.services.export_onnx"
+            )
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id("[PAD]") or 0, pad_token="[PAD]"
+        )
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_path = model_path
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def _encode_batch(self, texts: list):
+        encodings = self.tokenizer.encode_batch(texts)
+
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then unit length
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        vectors = np.vstack([
+            self._encode_batch(list(texts[i:i + batch_size]))
+            for i in range(0, len(texts), batch_size)
+        ]).astype(np.float32)
+
+        return vectors[0] if single else vectors
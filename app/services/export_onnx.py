@@ -0,0 +1,77 @@
+"""
+Export the query encoder to ONNX for the onnxruntime backend.
+
+Needs the full training stack (torch, sentence-transformers) plus onnx
+for --quantize; the exported model then runs with onnxruntime alone.
+
+Run from the project root:
+    python -m app.services.export_onnx --quantize
+"""
+import argparse
+from pathlib import Path
+
+from app.services.encoders import ONNX_MODEL_FILE, QUANTIZED_MODEL_FILE
+from app.services.search_service import MODEL_NAME, ONNX_MODEL_DIR
+
+
+OPSET_VERSION = 14
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the query encoder to ONNX")
+    parser.add_argument("--output", type=Path, default=Path(ONNX_MODEL_DIR))
+    parser.add_argument("--quantize", action="store_true",
+                        help="also write a dynamically int8-quantized model")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    print(f"Loading {MODEL_NAME}...")
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    # Writes tokenizer.json, which the tokenizers library loads directly
+    tokenizer.save_pretrained(str(args.output))
+
+    dummy = tokenizer(["warm up the encoder"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = args.output / ONNX_MODEL_FILE
+
+    print(f"Exporting {model_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "last_hidden_state": {0: "batch", 1: "sequence"}
+            },
+            opset_version=OPSET_VERSION
+        )
+
+    if args.quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = args.output / QUANTIZED_MODEL_FILE
+        print(f"Quantizing to {quantized_path}...")
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+
+    for path in sorted(args.output.glob("*.onnx")):
+        print(f"{path.name}: {path.stat().st_size / 1e6:.1f} MB")
+
+    print("Check parity with: python -m pytest tests/test_onnx_encoder.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import gzip
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from app.services.version_watcher import VersionWatcher
+
+
+META_FILE = "meta.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the
+this to was were what when where which who why will with do does did our we you
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list:
+    """
+    Lower-cased alphanumeric terms. Keeps ids and labels such as
+    "finemp1001", "q4" and "2024" intact so they match exactly.
+    """
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def partition_name(department: str) -> str:
+    return department.strip().lower()
+
+
+def build_lexical_index(chunks: list, directory: Path):
+    """
+    Write one gzipped inverted index per department.
+
+    Postings are stored as flat [doc, tf, doc, tf, ...] lists per term,
+    with doc being the position of the chunk id in the partition's `ids`.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    partitions = defaultdict(list)
+    for chunk in chunks:
+        partitions[partition_name(chunk["department"])].append(chunk)
+
+    for old in directory.glob("*.json.gz"):
+        if old.name[:-len(".json.gz")] not in partitions:
+            old.unlink()
+
+    stats = {}
+
+    for name, members in partitions.items():
+        ids = []
+        lengths = []
+        postings = defaultdict(list)
+
+        for doc, chunk in enumerate(members):
+            terms = Counter(tokenize(chunk["text"]))
+            ids.append(chunk["chunk_id"])
+            lengths.append(sum(terms.values()))
+
+            for term, tf in terms.items():
+                postings[term].extend((doc, tf))
+
+        tmp_path = directory / f"{name}.json.gz.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"ids": ids, "lengths": lengths, "postings": postings}, f, separators=(",", ":"))
+        os.replace(tmp_path, directory / f"{name}.json.gz")
+
+        stats[name] = {"chunks": len(ids), "terms": len(postings)}
+
+    with open(directory / META_FILE, "w", encoding="utf-8") as f:
+        json.dump({"partitions": stats}, f, indent=2)
+
+    return stats
+
+
+class LexicalIndex:
+    """
+    BM25 search over department partitions written by `build_lexical_index`.
+
+    RBAC is enforced by which partitions are searched: a query only ever
+    loads and scores the partitions of the caller's departments. Partitions
+    are loaded lazily and reloaded when the index is rebuilt.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._partitions = {}
+        self._names = None
+        self._lock = threading.Lock()
+        self.watcher = VersionWatcher(self.directory / META_FILE)
+
+    def available(self) -> bool:
+        return (self.directory / META_FILE).exists()
+
+    def _refresh(self):
+        # Called with the lock held
+        if self.watcher.changed():
+            self._partitions.clear()
+            self._names = None
+
+    def _partition(self, name: str):
+        if name not in self._partitions:
+            path = self.directory / f"{name}.json.gz"
+            if not path.exists():
+                self._partitions[name] = None
+            else:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    self._partitions[name] = json.load(f)
+        return self._partitions[name]
+
+    def partition_names(self) -> list:
+        # Listed once per index build, not on every unfiltered (C-Level) query
+        with self._lock:
+            self._refresh()
+            if self._names is None:
+                self._names = sorted(p.name[:-len(".json.gz")] for p in self.directory.glob("*.json.gz"))
+            return list(self._names)
+
+    def search(self, query: str, departments, n: int = 10) -> list:
+        """
+        Top-n (chunk_id, score) pairs from the given department partitions.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._refresh()
+            partitions = [
+                p for p in (self._partition(partition_name(d)) for d in departments)
+                if p is not None
+            ]
+
+        if not partitions:
+            return []
+
+        # Collection statistics over the searched partitions only
+        total_docs = sum(len(p["ids"]) for p in partitions)
+        avg_len = sum(sum(p["lengths"]) for p in partitions) / total_docs or 1.0
+        df = {t: sum(len(p["postings"].get(t, ())) // 2 for p in partitions) for t in terms}
+
+        scores = []
+
+        for p in partitions:
+            ids = p["ids"]
+            lengths = p["lengths"]
+            doc_scores = defaultdict(float)
+
+            for term in terms:
+                plist = p["postings"].get(term)
+                if not plist:
+                    continue
+
+                idf = math.log(1 + (total_docs - df[term] + 0.5) / (df[term] + 0.5))
+
+                for i in range(0, len(plist), 2):
+                    doc, tf = plist[i], plist[i + 1]
+                    norm = K1 * (1 - B + B * lengths[doc] / avg_len)
+                    doc_scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+            scores.extend((ids[doc], score) for doc, score in doc_scores.items())
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:n]
@@ -1,24 +1,121 @@
 import os
-from groq import Groq
+import time
+from groq import Groq, AsyncGroq
 
-# Initialize Groq client using environment variable
-client = Groq(
-    api_key=os.getenv("GROQ_API_KEY")
-)
+from app.core.metrics import idk_total, record_stage, span
+from app.services.llm_gateway import gateway, LLMUnavailable
+
+LLM_MODEL = "llama3-8b-8192"
+
+# Point at another OpenAI-compatible endpoint, e.g. a local fake server in tests
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
+# Groq clients are created on first use (normally by the startup warm-up)
+client = None
+
+# Async client for streaming, so a slow generation never holds a threadpool worker
+async_client = None
+
+
+def get_client():
+    global client
+
+    if client is None:
+        # Initialize Groq client using environment variable; retries and
+        # timeouts are handled by the gateway over its keep-alive connections
+        client = Groq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url=GROQ_BASE_URL,
+            max_retries=0,
+            http_client=gateway.http_client()
+        )
+
+    return client
+
+
+def get_async_client():
+    global async_client
+
+    if async_client is None:
+        async_client = AsyncGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url=GROQ_BASE_URL,
+            max_retries=0,
+            http_client=gateway.async_http_client()
+        )
+
+    return async_client
+
+
+def build_completion_args(prompt: str):
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.2,
+        "max_tokens": 300
+    }
 
 
 def generate_answer(prompt: str):
+    args = build_completion_args(prompt)
+
     try:
-        completion = client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=300
-        )
+        with span("generate_answer"):
+            completion = gateway.complete(
+                lambda timeout: get_client().chat.completions.create(**args, timeout=timeout)
+            )
 
         return completion.choices[0].message.content.strip()
 
+    except LLMUnavailable as exc:
+        idk_total.inc(f"llm_{exc.reason}")
+        return "I don't know"
+
     except Exception:
+        idk_total.inc("llm_error")
         return "I don't know"
+
+
+async def stream_answer(prompt: str):
+    """
+    Yield answer text fragments as the LLM produces them.
+    Falls back to "I don't know" if the call fails before any output.
+    """
+    produced = False
+    start = time.perf_counter()
+    args = build_completion_args(prompt)
+
+    async def open_stream(timeout):
+        return await get_async_client().chat.completions.create(**args, stream=True, timeout=timeout)
+
+    try:
+        async for chunk in gateway.stream(open_stream):
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not produced:
+                    record_stage("llm_first_token", time.perf_counter() - start)
+                produced = True
+                yield delta
+
+    except LLMUnavailable as exc:
+        if not produced:
+            idk_total.inc(f"llm_{exc.reason}")
+            yield "I don't know"
+
+    except Exception:
+        if not produced:
+            idk_total.inc("llm_error")
+            yield "I don't know"
+
+    finally:
+        record_stage("stream_answer", time.perf_counter() - start)
+
+
+async def shutdown():
+    # Closes the blocking and the streaming HTTP clients
+    await gateway.aclose()
@@ -0,0 +1,477 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from app.core.metrics import registry
+
+
+# Concurrent provider calls per client (blocking and streaming are limited separately)
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))
+
+# Longest a call waits for a free slot before failing fast
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "2.0"))
+
+# Overall budget per call, retries included; each attempt gets at most LLM_ATTEMPT_TIMEOUT
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20.0"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "10.0"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.0"))
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", "0.25"))
+LLM_RETRY_MAX = float(os.getenv("LLM_RETRY_MAX", "2.0"))
+
+# Consecutive failures that open the circuit, and how long it stays open
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30.0"))
+
+LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_KEEPALIVE_CONNECTIONS", "20"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+llm_queue_wait_seconds = registry.histogram(
+    "chatbot_llm_queue_wait_seconds",
+    "Time LLM calls waited for an in-flight slot",
+    ("mode",)
+)
+
+llm_call_seconds = registry.histogram(
+    "chatbot_llm_call_seconds",
+    "LLM call latency per attempt",
+    ("mode", "outcome")
+)
+
+llm_failures_total = registry.counter(
+    "chatbot_llm_failures_total",
+    "Failed LLM calls by reason",
+    ("reason",)
+)
+
+llm_retries_total = registry.counter(
+    "chatbot_llm_retries_total",
+    "LLM call attempts that were retried"
+)
+
+
+class LLMUnavailable(Exception):
+    """
+    The call was not made or did not succeed; `reason` says why
+    (queue_timeout, circuit_open, deadline, retries_exhausted, error).
+    """
+
+    def __init__(self, reason: str, cause: Exception = None):
+        super().__init__(reason if cause is None else f"{reason}: {cause!r}")
+        self.reason = reason
+        self.cause = cause
+
+
+def status_code(exc: Exception):
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        response = getattr(exc, "response", None)
+        code = getattr(response, "status_code", None)
+    return code
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    Timeouts, connection errors, rate limits and 5xx are worth retrying;
+    other client errors (bad request, auth) are not.
+    """
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+
+    import groq
+    return isinstance(exc, (groq.APIConnectionError, httpx.TransportError, TimeoutError))
+
+
+def retry_after(exc: Exception):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails calls fast for
+    `reset_timeout` seconds. Then one probe call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, reset_timeout: float = LLM_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """
+        False if the call must fail fast, otherwise a permit: True on a closed
+        circuit, or the probe token when this call is the half-open probe.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe = None
+
+            # Half-open: a single probe at a time
+            if self._probe is not None:
+                return False
+            self._probe = object()
+            return self._probe
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe = None
+
+    def release(self, permit):
+        """
+        A probe that ended without a verdict (e.g. a rejected request) frees the slot.
+        Permits of other calls, and probes already decided, leave it alone.
+        """
+        with self._lock:
+            if permit is self._probe:
+                self._probe = None
+
+
+class FairSlots:
+    """
+    Counting semaphore that hands freed slots to waiters in arrival order.
+    threading.Semaphore lets a releasing thread take the slot straight back,
+    which starves queued callers until their queue timeout under load.
+    """
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._available = size
+        self._waiters = deque()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._lock:
+            if self._available and not self._waiters:
+                self._available -= 1
+                return True
+            granted = threading.Event()
+            self._waiters.append(granted)
+
+        if granted.wait(timeout):
+            return True
+
+        with self._lock:
+            # The slot may have been handed over just as the wait timed out
+            if granted.is_set():
+                return True
+            self._waiters.remove(granted)
+            return False
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._available += 1
+
+
+class LLMGateway:
+    """
+    Every LLM call goes through here.
+
+    Calls take an in-flight slot (waiting at most `queue_timeout`), pass the
+    circuit breaker, and are retried with jittered exponential backoff on
+    retryable errors until `deadline` runs out. `call(timeout)` receives the
+    time left for the attempt, so the provider client enforces it.
+    The shared httpx clients keep connections to the provider alive.
+    """
+
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, queue_timeout: float = LLM_QUEUE_TIMEOUT,
+                 deadline: float = LLM_DEADLINE, attempt_timeout: float = LLM_ATTEMPT_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, breaker: CircuitBreaker = None):
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+
+        self._slots = FairSlots(max_in_flight)
+        # asyncio.Semaphore is already FIFO; it binds to the running loop on first use
+        self._async_slots = asyncio.Semaphore(max_in_flight)
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+        self._http_client = None
+        self._async_http_client = None
+
+    # ---------- Connection reuse ----------
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_in_flight,
+            max_keepalive_connections=min(LLM_KEEPALIVE_CONNECTIONS, self.max_in_flight)
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.attempt_timeout, connect=LLM_CONNECT_TIMEOUT)
+
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+            return self._http_client
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+            return self._async_http_client
+
+    # ---------- Bookkeeping ----------
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _reject(self, reason: str, cause: Exception = None):
+        with self._lock:
+            self.rejected += 1
+        llm_failures_total.inc(reason)
+        raise LLMUnavailable(reason, cause)
+
+    def _fail(self, reason: str, cause: Exception):
+        with self._lock:
+            self.failures += 1
+        llm_failures_total.inc(reason)
+        raise LLMUnavailable(reason, cause)
+
+    def _record_error(self, exc: Exception):
+        # Only provider-side trouble counts against the circuit; a bad request does not
+        if is_retryable(exc):
+            self.breaker.record_failure()
+
+    def _retry_delay(self, attempt: int, exc: Exception, remaining: float):
+        """
+        Seconds to sleep before the next attempt, or None to give up.
+        """
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return None
+
+        # Full jitter, but honour the provider's Retry-After when it fits
+        delay = random.uniform(0, min(LLM_RETRY_MAX, LLM_RETRY_BASE * 2 ** attempt))
+        hinted = retry_after(exc)
+        if hinted is not None:
+            delay = max(delay, hinted)
+
+        if delay >= remaining:
+            return None
+
+        with self._lock:
+            self.retries += 1
+        llm_retries_total.inc()
+        return delay
+
+    def _attempt_timeout(self, deadline_at: float) -> float:
+        return min(self.attempt_timeout, deadline_at - time.monotonic())
+
+    # ---------- Calls ----------
+
+    def complete(self, call):
+        """
+        Run a blocking provider call, `call(timeout)`, under the gateway's limits.
+        """
+        deadline_at = time.monotonic() + self.deadline
+
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        llm_queue_wait_seconds.observe(time.perf_counter() - start, "blocking")
+        if not acquired:
+            self._reject("queue_timeout")
+
+        self._enter()
+        permit = None
+        try:
+            attempt = 0
+            while True:
+                permit = self.breaker.allow()
+                if not permit:
+                    self._reject("circuit_open")
+
+                timeout = self._attempt_timeout(deadline_at)
+                if timeout <= 0:
+                    self._fail("deadline", None)
+
+                start = time.perf_counter()
+                try:
+                    result = call(timeout)
+                except Exception as exc:
+                    llm_call_seconds.observe(time.perf_counter() - start, "blocking", "error")
+                    self._record_error(exc)
+
+                    delay = self._retry_delay(attempt, exc, deadline_at - time.monotonic())
+                    if delay is None:
+                        self._fail("retries_exhausted" if is_retryable(exc) else "error", exc)
+
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+                llm_call_seconds.observe(time.perf_counter() - start, "blocking", "ok")
+                self.breaker.record_success()
+                return result
+
+        finally:
+            # A call that ended without a verdict hands back its probe, if it held one
+            self.breaker.release(permit)
+            self._leave()
+            self._slots.release()
+
+    async def stream(self, open_stream):
+        """
+        Yield fragments from `open_stream(timeout)`, an async callable returning
+        an async iterator. Failures before the first fragment are retried;
+        once output has been produced a failure ends the stream with LLMUnavailable.
+        """
+        deadline_at = time.monotonic() + self.deadline
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._async_slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            llm_queue_wait_seconds.observe(time.perf_counter() - start, "stream")
+            self._reject("queue_timeout")
+        llm_queue_wait_seconds.observe(time.perf_counter() - start, "stream")
+
+        self._enter()
+        permit = None
+        try:
+            attempt = 0
+            while True:
+                permit = self.breaker.allow()
+                if not permit:
+                    self._reject("circuit_open")
+
+                timeout = self._attempt_timeout(deadline_at)
+                if timeout <= 0:
+                    self._fail("deadline", None)
+
+                produced = False
+                start = time.perf_counter()
+                try:
+                    # The provider client enforces `timeout` per read; the deadline bounds the whole stream
+                    stream = await asyncio.wait_for(open_stream(timeout), deadline_at - time.monotonic())
+                    fragments = stream.__aiter__()
+                    while True:
+                        try:
+                            fragment = await asyncio.wait_for(
+                                fragments.__anext__(), deadline_at - time.monotonic()
+                            )
+                        except StopAsyncIteration:
+                            break
+                        produced = True
+                        yield fragment
+
+                except Exception as exc:
+                    llm_call_seconds.observe(time.perf_counter() - start, "stream", "error")
+                    self._record_error(exc)
+
+                    delay = None if produced else self._retry_delay(
+                        attempt, exc, deadline_at - time.monotonic()
+                    )
+                    if delay is None:
+                        reason = "deadline" if isinstance(exc, TimeoutError) else (
+                            "retries_exhausted" if is_retryable(exc) else "error"
+                        )
+                        self._fail(reason, exc)
+
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+                llm_call_seconds.observe(time.perf_counter() - start, "stream", "ok")
+                self.breaker.record_success()
+                return
+
+        finally:
+            # As in complete(); also covers a consumer that stops reading mid-stream
+            self.breaker.release(permit)
+            self._leave()
+            self._async_slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "limit": self.max_in_flight,
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "circuit_open": int(self.breaker.state != CircuitBreaker.CLOSED),
+                "circuit_trips": self.breaker.trips
+            }
+
+    def close(self):
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+
+
+gateway = LLMGateway()
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.database import fetch_user
+from app.models.models import verify_password
+
+
+# bcrypt runs on its own small pool so login storms cannot take every
+# worker thread from /chat; logins beyond LOGIN_MAX_IN_FLIGHT are shed
+LOGIN_BCRYPT_WORKERS = int(os.getenv("LOGIN_BCRYPT_WORKERS", "2"))
+LOGIN_MAX_IN_FLIGHT = int(os.getenv("LOGIN_MAX_IN_FLIGHT", "32"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=LOGIN_BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+                )
+
+    return _executor
+
+
+class LoginMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.verifications = 0
+        self.queue_wait_ms_total = 0.0
+        self.queue_wait_ms_max = 0.0
+        self.verify_ms_total = 0.0
+        self.verify_ms_max = 0.0
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self.in_flight >= LOGIN_MAX_IN_FLIGHT:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def leave(self, succeeded: bool):
+        with self._lock:
+            self.in_flight -= 1
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def record_verify(self, queue_wait_ms: float, verify_ms: float):
+        with self._lock:
+            self.verifications += 1
+            self.queue_wait_ms_total += queue_wait_ms
+            self.queue_wait_ms_max = max(self.queue_wait_ms_max, queue_wait_ms)
+            self.verify_ms_total += verify_ms
+            self.verify_ms_max = max(self.verify_ms_max, verify_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.verifications
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "limit": LOGIN_MAX_IN_FLIGHT,
+                "bcrypt_workers": LOGIN_BCRYPT_WORKERS,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.queue_wait_ms_total / n, 2) if n else 0.0,
+                "max_queue_wait_ms": round(self.queue_wait_ms_max, 2),
+                "avg_verify_ms": round(self.verify_ms_total / n, 2) if n else 0.0,
+                "max_verify_ms": round(self.verify_ms_max, 2)
+            }
+
+
+login_metrics = LoginMetrics()
+
+
+async def verify_password_off_loop(password: str, hashed_password: str) -> bool:
+    submitted = time.perf_counter()
+    timings = {}
+
+    def verify():
+        started = time.perf_counter()
+        try:
+            return verify_password(password, hashed_password)
+        finally:
+            timings["queue_wait_ms"] = (started - submitted) * 1000
+            timings["verify_ms"] = (time.perf_counter() - started) * 1000
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), verify)
+    finally:
+        if timings:
+            login_metrics.record_verify(timings["queue_wait_ms"], timings["verify_ms"])
+
+
+async def authenticate(username: str, password: str):
+    """
+    Return (username, role) for valid credentials, raising 401 otherwise
+    and 503 when too many logins are already in progress.
+    """
+    if not login_metrics.try_enter():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    succeeded = False
+    try:
+        user = await run_in_threadpool(fetch_user, username)
+
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        db_username, db_password, role = user
+
+        if not await verify_password_off_loop(password, db_password):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        succeeded = True
+        return db_username, role
+
+    finally:
+        login_metrics.leave(succeeded)
+
+
+def shutdown():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -1,3 +1,8 @@
+import json
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -8,11 +13,213 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # Log file stored at project root
 LOG_FILE = BASE_DIR / "access.log"
 
+# "text" keeps the original line format; "json" writes one JSON object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
 
-def log_access(username: str, role: str, query: str, confidence: float):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
 
-    log_line = f'{timestamp} {username} {role} "{query}" {confidence}\n'
+# Rotate when the file exceeds LOG_MAX_BYTES or is older than LOG_ROTATE_SECONDS (0 disables)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", "86400"))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
 
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(log_line)
+
+def format_record(record: dict, fmt: str = LOG_FORMAT) -> str:
+    if fmt == "json":
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    return f'{record["ts"]} {record["username"]} {record["role"]} "{record["query"]}" {record["confidence"]}\n'
+
+
+class AccessLogWriter:
+    """
+    Background access logger.
+
+    `write` only enqueues the record; a daemon thread drains the queue,
+    writes records in batches with a single file write, and rotates the file
+    by size and age. When the queue is full the record is dropped and
+    counted instead of blocking the request. `stop` drains what is left.
+
+    The file's creation time is kept in a hidden sidecar next to it
+    (".access.log.created"), so age rotation survives restarts.
+    """
+
+    def __init__(self, path: Path, fmt: str = LOG_FORMAT, max_queue: int = LOG_QUEUE_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL,
+                 max_bytes: int = LOG_MAX_BYTES, rotate_seconds: float = LOG_ROTATE_SECONDS,
+                 backup_count: int = LOG_BACKUP_COUNT):
+        self.path = Path(path)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._opened_at = None
+        self._created_path = self.path.with_name(f".{self.path.name}.created")
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="access-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def write(self, record: dict) -> bool:
+        if self._thread is None:
+            self.start()
+
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Flush queued records and stop the writer thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._drain(block=True)
+
+        # Shutdown: write everything still queued
+        while not self._queue.empty():
+            self._drain(block=False)
+
+    def _drain(self, block: bool):
+        batch = []
+
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        try:
+            self._maybe_rotate()
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(format_record(record, self.fmt) for record in batch))
+
+            self.written += len(batch)
+            self.batches += 1
+
+        except OSError:
+            # Never let a logging failure kill the writer
+            self.errors += 1
+
+    def _mark_created(self):
+        self._opened_at = time.time()
+        try:
+            self._created_path.write_text(repr(self._opened_at), encoding="utf-8")
+        except OSError:
+            # Age is still tracked for this process
+            pass
+
+    def _read_created(self):
+        try:
+            return float(self._created_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _maybe_rotate(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # The batch about to be written creates the file
+            self._mark_created()
+            return
+
+        if self._opened_at is None:
+            # After a restart; a file from before the sidecar existed ages from now
+            self._opened_at = self._read_created()
+            if self._opened_at is None:
+                self._mark_created()
+
+        too_big = self.max_bytes and stat.st_size >= self.max_bytes
+        too_old = self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds
+
+        if not (too_big or too_old):
+            return
+
+        suffix = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.{suffix}"))
+        self._mark_created()
+        self.rotations += 1
+
+        backups = sorted(self.path.parent.glob(f"{self.path.name}.*"))
+        for old in backups[:max(0, len(backups) - self.backup_count)]:
+            old.unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            dropped = self.dropped
+
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "errors": self.errors
+        }
+
+
+access_log = AccessLogWriter(LOG_FILE)
+
+
+def log_access(username: str, role: str, query: str, confidence: float, stages: dict = None,
+               prompt_tokens: dict = None):
+    """
+    Queue an access log record; never blocks the request.
+    `stages` optionally maps pipeline stages to their latency in milliseconds;
+    `prompt_tokens` holds the prompt size before and after context packing.
+    """
+    record = {
+        "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "username": username,
+        "role": role,
+        "query": query,
+        "confidence": confidence
+    }
+
+    if stages:
+        record["stages_ms"] = {name: round(ms, 2) for name, ms in stages.items()}
+
+    if prompt_tokens:
+        record["prompt_tokens"] = prompt_tokens
+
+    access_log.write(record)
+
+
+def shutdown():
+    access_log.stop()
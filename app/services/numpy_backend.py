@@ -0,0 +1,381 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.services.version_watcher import VersionWatcher
+from preprocessing.metadata import load_role_mapping
+
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+FULL_VECTORS_FILE = "vectors_full.npy"
+CHUNKS_FILE = "chunks.jsonl"
+
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+# Rows converted to float32 at a time when scoring a reduced-precision matrix;
+# small enough for the converted block to stay in cache for the product
+SCORE_BLOCK_ROWS = 2048
+
+
+def save_array(path: Path, array):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def quantize_int8(vectors):
+    """
+    Symmetric per-vector scalar quantization: v ~= q * scale / 127.
+    """
+    scales = np.abs(vectors).max(axis=1).astype(np.float32)
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, None] * 127).astype(np.int8)
+    return quantized, scales
+
+
+def build_numpy_index(chunks: list, vectors, directory: Path, dtype: str = "float32"):
+    """
+    Write a normalized matrix and the chunk records it indexes, row for row.
+
+    With a reduced-precision `dtype` the full float32 matrix is written too,
+    for memory-mapped rescoring of search shortlists.
+    """
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"Unsupported index dtype {dtype!r}, expected one of {INDEX_DTYPES}")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+    # Chunks first: the matrix is the file readers watch for changes
+    tmp_path = directory / f"{CHUNKS_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps({
+                "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"],
+                "source_document": chunk["source_document"],
+                "department": chunk["department"],
+                "token_count": chunk.get("token_count")
+            }) + "\n")
+    os.replace(tmp_path, directory / CHUNKS_FILE)
+
+    for name in (SCALES_FILE, FULL_VECTORS_FILE):
+        if (directory / name).exists():
+            (directory / name).unlink()
+
+    if dtype == "float32":
+        stored = vectors
+    else:
+        save_array(directory / FULL_VECTORS_FILE, vectors)
+
+        if dtype == "float16":
+            stored = vectors.astype(np.float16)
+        else:
+            stored, scales = quantize_int8(vectors)
+            save_array(directory / SCALES_FILE, scales)
+
+    save_array(directory / VECTORS_FILE, stored)
+
+    return {"rows": len(vectors), "dtype": dtype, "mb": stored.nbytes / 1e6}
+
+
+def stored_dtype(directory: Path):
+    """
+    Precision of an existing index, or None if there is none.
+    """
+    path = Path(directory) / VECTORS_FILE
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode="r").dtype.name
+
+
+def compile_role_bits(role_config: dict) -> dict:
+    """
+    Bit position for every role named in role_mapping.yaml.
+    """
+    roles = sorted({
+        role.strip().lower()
+        for config in role_config["roles"].values()
+        for role in config.get("allowed_roles", [])
+    })
+    if len(roles) > 64:
+        raise ValueError(f"At most 64 roles fit in the bitmask, got {len(roles)}")
+    return {role: i for i, role in enumerate(roles)}
+
+
+def compile_department_masks(role_config: dict, role_bits: dict) -> dict:
+    masks = {}
+    for department, config in role_config["roles"].items():
+        mask = 0
+        for role in config.get("allowed_roles", []):
+            mask |= 1 << role_bits[role.strip().lower()]
+        masks[department.strip().lower()] = mask
+    return masks
+
+
+class NumpyVectorIndex:
+    """
+    Exact in-process vector search with RBAC applied as a role bitmask.
+
+    Every chunk carries a uint64 mask of the roles allowed to read it,
+    compiled from role_mapping.yaml at load time. A query is one
+    matrix-vector product over the whole matrix followed by an
+    `argpartition` restricted to the rows the caller's role bit allows.
+
+    A float16 or int8 index keeps only the reduced-precision matrix in
+    memory. Each query ranks a shortlist of `rescore_factor * k` rows with
+    it, then rescores the shortlist against the memory-mapped float32
+    matrix, so only those rows are read at full precision.
+
+    Distances are squared L2 between normalized vectors (2 - 2 * cosine),
+    the same scale Chroma returns, so callers can switch backends freely.
+    """
+
+    def __init__(self, directory: Path, role_config_path: str = None, mmap: bool = False,
+                 rescore_factor: int = 4):
+        self.directory = Path(directory)
+        self.role_config_path = role_config_path
+        self.mmap = mmap
+        self.rescore_factor = rescore_factor
+
+        self.matrix = None
+        self.scales = None
+        self.full = None
+        self.chunks = []
+        self.positions = {}
+        self.role_bits = {}
+        self.masks = None
+
+        self._allowed_rows = {}
+        self._lock = threading.Lock()
+        self.watcher = VersionWatcher(self.vectors_path)
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.directory / VECTORS_FILE
+
+    def available(self) -> bool:
+        return self.vectors_path.exists()
+
+    def load(self):
+        role_config = load_role_mapping(self.role_config_path)
+        role_bits = compile_role_bits(role_config)
+        department_masks = compile_department_masks(role_config, role_bits)
+
+        with open(self.directory / CHUNKS_FILE, "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+
+        matrix = np.load(self.vectors_path, mmap_mode="r" if self.mmap else None)
+
+        scales = None
+        if (self.directory / SCALES_FILE).exists():
+            scales = np.load(self.directory / SCALES_FILE)
+
+        full = None
+        if (self.directory / FULL_VECTORS_FILE).exists():
+            full = np.load(self.directory / FULL_VECTORS_FILE, mmap_mode="r")
+
+        if len(chunks) != len(matrix):
+            raise ValueError(
+                f"{CHUNKS_FILE} has {len(chunks)} rows but {VECTORS_FILE} has {len(matrix)}"
+            )
+
+        # Unknown departments get an empty mask: readable by nobody but c-level
+        masks = np.fromiter(
+            (department_masks.get(c["department"].strip().lower(), 0) for c in chunks),
+            dtype=np.uint64, count=len(chunks)
+        )
+
+        self.matrix = matrix
+        self.scales = scales
+        self.full = full
+        self.chunks = chunks
+        self.positions = {c["chunk_id"]: i for i, c in enumerate(chunks)}
+        self.role_bits = role_bits
+        self.masks = masks
+        self._allowed_rows = {}
+        return self
+
+    @property
+    def dtype(self) -> str:
+        return None if self.matrix is None else self.matrix.dtype.name
+
+    def nbytes(self) -> int:
+        """
+        Bytes of the matrix searched on every query (excludes the rescoring map).
+        """
+        if self.matrix is None:
+            return 0
+        return self.matrix.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def _refresh(self):
+        # Called with the lock held; until a load succeeds every call retries it
+        changed = self.watcher.changed(force=self.matrix is None)
+        if changed or self.matrix is None:
+            try:
+                self.load()
+            except Exception:
+                # Caught mid-rebuild, say; retried on the next check
+                self.watcher.reset()
+                raise
+
+    def ensure_loaded(self):
+        with self._lock:
+            self._refresh()
+        return self
+
+    def role_mask(self, user_role: str):
+        """
+        The role's bit as a uint64 mask, or None when it may read every row.
+        """
+        user_role_norm = user_role.strip().lower()
+
+        if user_role_norm == "c-level":
+            return None
+
+        bit = self.role_bits.get(user_role_norm)
+        return np.uint64(0 if bit is None else 1 << bit)
+
+    def allowed_rows(self, user_role: str):
+        """
+        Row numbers the role may read, or None when it may read every row.
+        """
+        mask = self.role_mask(user_role)
+        if mask is None:
+            return None
+
+        rows = self._allowed_rows.get(int(mask))
+        if rows is None:
+            rows = np.flatnonzero(self.masks & mask)
+            self._allowed_rows[int(mask)] = rows
+
+        return rows
+
+    @staticmethod
+    def _results(chunks: list, rows, similarities) -> list:
+        results = []
+        for row, sim in zip(rows, similarities):
+            chunk = chunks[row]
+            results.append({
+                "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"],
+                "source": chunk["source_document"],
+                "department": chunk["department"],
+                "token_count": chunk.get("token_count"),
+                "distance": float(max(0.0, 2.0 - 2.0 * sim))
+            })
+        return results
+
+    @staticmethod
+    def _similarities(matrix, scales, queries):
+        """
+        (n_rows, n_queries) dot products, converting reduced precision in blocks.
+        """
+        if matrix.dtype == np.float32:
+            return matrix @ queries.T
+
+        out = np.empty((len(matrix), len(queries)), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ queries.T
+
+        if scales is not None:
+            out *= (scales / 127.0)[:, None]
+
+        return out
+
+    @staticmethod
+    def _exact(matrix, scales, full, rows, query):
+        """
+        Full-precision similarities of `rows` to one query.
+        """
+        if full is not None:
+            return np.asarray(full[rows], dtype=np.float32) @ query
+
+        sims = np.asarray(matrix[rows], dtype=np.float32) @ query
+        if scales is not None:
+            sims *= scales[rows] / 127.0
+        return sims
+
+    def search_batch(self, query_embeddings, user_role: str, k: int = 5) -> list:
+        """
+        Top-k allowed chunks for each query row, as one matrix multiply.
+        """
+        with self._lock:
+            self._refresh()
+            matrix, scales, full = self.matrix, self.scales, self.full
+            chunks = self.chunks
+            rows = self.allowed_rows(user_role)
+
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+
+        # (n_rows, n_queries) similarities, restricted to the allowed rows
+        similarities = self._similarities(matrix, scales, queries)
+        if rows is not None:
+            similarities = similarities[rows]
+
+        n = similarities.shape[0]
+        k = min(k, n)
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        rescore = full is not None and self.rescore_factor > 0
+        shortlist = min(n, k * self.rescore_factor) if rescore else k
+
+        if shortlist < n:
+            top = np.argpartition(-similarities, shortlist - 1, axis=0)[:shortlist]
+        else:
+            top = np.tile(np.arange(n)[:, None], (1, len(queries)))
+
+        batch = []
+        for q in range(len(queries)):
+            candidates = top[:, q]
+            matrix_rows = candidates if rows is None else rows[candidates]
+
+            if rescore:
+                # Sorted rows keep reads from the memory map sequential
+                matrix_rows = np.sort(matrix_rows)
+                scores = self._exact(matrix, scales, full, matrix_rows, queries[q])
+            else:
+                scores = similarities[candidates, q]
+
+            order = np.argsort(-scores, kind="stable")[:k]
+            batch.append(self._results(chunks, matrix_rows[order], scores[order]))
+
+        return batch
+
+    def search(self, query_embedding, user_role: str, k: int = 5) -> list:
+        return self.search_batch([query_embedding], user_role, k)[0]
+
+    def get(self, chunk_ids: list, query_embedding, user_role: str) -> dict:
+        """
+        Allowed chunks by id, with distances to the query.
+        """
+        with self._lock:
+            self._refresh()
+            matrix, scales, full = self.matrix, self.scales, self.full
+            chunks = self.chunks
+            positions = self.positions
+            masks = self.masks
+            mask = self.role_mask(user_role)
+
+        wanted = [
+            positions[chunk_id] for chunk_id in chunk_ids
+            if chunk_id in positions and (mask is None or masks[positions[chunk_id]] & mask)
+        ]
+
+        if not wanted:
+            return {}
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self._exact(matrix, scales, full, wanted, query)
+        return {r["chunk_id"]: r for r in self._results(chunks, wanted, similarities)}
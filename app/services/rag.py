@@ -1,5 +1,39 @@
-from app.services.search_service import search_with_rbac
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.metrics import cache_hits_total, idk_total, prompt_tokens, span
+from app.core.rbac import get_role_permissions
+from app.services.search_service import (
+    search_with_rbac, embed_query, VECTOR_DB_PATH, INDEX_VERSION_FILE
+)
 from app.services.llm import generate_answer
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedding_cache import normalize_query
+from app.services.singleflight import SingleFlight
+from app.services.context_packer import pack_context, count_tokens
+
+
+# Semantic answer cache (ANSWER_CACHE_SIZE=0 disables it)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+
+answer_cache = SemanticAnswerCache(
+    threshold=ANSWER_CACHE_THRESHOLD,
+    max_entries=ANSWER_CACHE_SIZE,
+    ttl_seconds=ANSWER_CACHE_TTL,
+    index_version_path=Path(VECTOR_DB_PATH) / INDEX_VERSION_FILE
+)
+
+# Identical questions in flight at the same time share one pipeline run (COALESCE_REQUESTS=0 disables it)
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") != "0"
+
+inflight_requests = SingleFlight()
+
+# Fit retrieved chunks into a token budget (CONTEXT_PACKING=0 keeps the top 3 chunks whole)
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "1") != "0"
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "5"))
 
 
 def build_prompt(user_query: str, chunks: list):
@@ -28,6 +62,24 @@ Answer:
     return prompt
 
 
+@lru_cache(maxsize=1)
+def prompt_overhead() -> int:
+    # Tokens of the prompt template without context or question
+    return count_tokens(build_prompt("", []))
+
+
+def estimate_prompt_tokens(query_tokens: int, chunks: list) -> int:
+    """
+    Prompt size from per-chunk token counts, without encoding the prompt.
+    Each context line adds about two tokens for its bullet and newline.
+    """
+    context_tokens = sum(
+        (c["token_count"] if c.get("token_count") is not None else count_tokens(c["text"])) + 2
+        for c in chunks
+    )
+    return prompt_overhead() + query_tokens + context_tokens
+
+
 def compute_confidence(chunks: list):
     if not chunks:
         return 0.0
@@ -38,33 +90,158 @@ def compute_confidence(chunks: list):
     return round(confidence, 2)
 
 
-def rag_pipeline(query: str, user_role: str):
+def role_scope(user_role) -> frozenset:
+    """
+    Effective department set of a role; answers are cached per scope, not per user.
+    """
+    permissions = get_role_permissions(user_role)
+    return permissions.departments if permissions is not None else frozenset()
+
+
+def coalesce_key(query: str, user_role) -> tuple:
+    """
+    Requests may share a result only if they ask the same question with the
+    same access: same department set, and same unfiltered (C-Level) access.
+    """
+    permissions = get_role_permissions(user_role)
+    all_access = permissions.all_access if permissions is not None else False
+    return normalize_query(query), role_scope(user_role), all_access
+
+
+def get_cached_answer(query: str, user_role: str, query_embedding=None):
+    """
+    Pass `query_embedding` when the caller already has it, so the query is
+    not looked up in the embedding cache again.
+    """
+    if query_embedding is None:
+        query_embedding = embed_query(query)
+
+    with span("answer_cache_lookup"):
+        cached = answer_cache.lookup(role_scope(user_role), query_embedding)
+
+    if cached is not None:
+        cache_hits_total.inc("answer")
+
+    return cached
+
+
+def cache_answer(query: str, user_role: str, context: dict, answer: str, query_embedding=None):
+    # "I don't know" is cheap to recompute and may change after a re-index
+    if context is None or answer == "I don't know":
+        return
+
+    answer_cache.store(
+        role_scope(user_role),
+        query_embedding if query_embedding is not None else embed_query(query),
+        {
+            "answer": answer,
+            "sources": context["sources"],
+            "confidence": context["confidence"]
+        },
+        context["departments"]
+    )
+
+
+def prepare_context(query: str, user_role: str, query_embedding=None):
+    """
+    Retrieval half of the pipeline.
+    Returns the prompt, sources and confidence, or None when nothing relevant is accessible.
+    """
     # RBAC-filtered retrieval
-    chunks = search_with_rbac(query, user_role)
+    chunks = search_with_rbac(query, user_role, k=CONTEXT_CANDIDATES, query_embedding=query_embedding)
+
+    return context_from_chunks(query, chunks)
 
+
+def context_from_chunks(query: str, chunks: list):
+    """
+    Prompt, sources and confidence from retrieved chunks, or None when none is relevant.
+    """
     # Hard relevance guard
     if not chunks or chunks[0]["distance"] > 2.0:
+        return None
+
+    # Confidence comes from the top 3 chunks whether or not the context is packed
+    confidence = compute_confidence(chunks[:3])
+
+    # LIMIT CONTEXT SIZE
+    if not CONTEXT_PACKING:
+        chunks = chunks[:3]
+        with span("build_prompt"):
+            return context_for(chunks, build_prompt(query, chunks), confidence)
+
+    with span("pack_context"):
+        # A budget too small for any sentence still sends the best chunk
+        packed = pack_context(query, chunks) or chunks[:1]
+
+    with span("build_prompt"):
+        context = context_for(packed, build_prompt(query, packed), confidence)
+
+    # Prompt size the unpacked top 3 chunks would have produced, against the packed one
+    query_tokens = count_tokens(query)
+    tokens_before = estimate_prompt_tokens(query_tokens, chunks[:3])
+    tokens_after = estimate_prompt_tokens(query_tokens, packed)
+
+    prompt_tokens.observe(tokens_before, "unpacked")
+    prompt_tokens.observe(tokens_after, "packed")
+    context["prompt_tokens"] = {"before": tokens_before, "after": tokens_after}
+
+    return context
+
+
+def context_for(chunks: list, prompt: str, confidence: float) -> dict:
+    return {
+        "prompt": prompt,
+        "sources": list(set(c["source"] for c in chunks)),
+        "confidence": confidence,
+        "departments": set(c["department"].lower() for c in chunks)
+    }
+
+
+def rag_pipeline(query: str, user_role: str):
+    with span("rag_pipeline"):
+        if not COALESCE_REQUESTS:
+            return _rag_pipeline(query, user_role)
+
+        result, shared = inflight_requests.do(
+            coalesce_key(query, user_role),
+            lambda: _rag_pipeline(query, user_role)
+        )
+
+        # Callers get their own copy of a shared result
+        return dict(result, sources=list(result["sources"])) if shared else result
+
+
+def _rag_pipeline(query: str, user_role: str):
+    # Embedded once for the answer cache, retrieval and the cache store
+    query_embedding = embed_query(query)
+
+    cached = get_cached_answer(query, user_role, query_embedding)
+    if cached is not None:
+        return cached
+
+    context = prepare_context(query, user_role, query_embedding)
+
+    if context is None:
+        idk_total.inc("no_context")
         return {
             "answer": "I don't know",
             "sources": [],
             "confidence": 0.0
         }
 
-    # LIMIT CONTEXT SIZE
-    chunks = chunks[:3]
-
-    prompt = build_prompt(query, chunks)
-    answer = generate_answer(prompt)
+    answer = generate_answer(context["prompt"])
 
     # Guard against empty output
     if not answer or not answer.strip():
+        idk_total.inc("empty_answer")
         answer = "I don't know"
 
-    confidence = compute_confidence(chunks)
-    sources = list(set(c["source"] for c in chunks))
+    cache_answer(query, user_role, context, answer, query_embedding)
 
     return {
         "answer": answer,
-        "sources": sources,
-        "confidence": confidence
+        "sources": context["sources"],
+        "confidence": context["confidence"],
+        "prompt_tokens": context.get("prompt_tokens")
     }
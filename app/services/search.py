@@ -2,6 +2,9 @@ import chromadb
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
 
+from app.core.rbac import get_role_permissions
+from app.services.search_service import filtered_query
+
 
 # Resolve project root safely
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -27,36 +30,17 @@ def main():
     user_role = input("\nEnter your role: ").strip()
     query = input("Enter your query: ").strip()
 
-    user_role_norm = user_role.lower()
+    permissions = get_role_permissions(user_role)
+    if permissions is None:
+        print("\nUnknown role: no documents are accessible.")
+        return
 
     print("\nEmbedding query...")
     query_embedding = model.encode(query).tolist()
 
-    print("Searching vector DB...")
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=10,
-        include=["documents", "metadatas", "distances"]
-    )
-
-    print("\nApplying RBAC filtering...")
-
-    allowed_results = []
-
-    for doc, meta, dist in zip(
-        results["documents"][0],
-        results["metadatas"][0],
-        results["distances"][0]
-    ):
-        roles_allowed = [r.strip().lower() for r in meta["accessible_roles"].split(",")]
-
-        # C-Level override
-        if user_role_norm == "c-level":
-            allowed_results.append((doc, meta, dist))
-            continue
-
-        if user_role_norm in roles_allowed:
-            allowed_results.append((doc, meta, dist))
+    # C-Level has no filter; every other role is pre-filtered and re-checked
+    print("Searching vector DB with RBAC filter...")
+    allowed_results = filtered_query(collection, [query_embedding], permissions, 10)[0]
 
     if not allowed_results:
         print("\nNo accessible results found for your role.")
@@ -64,14 +48,14 @@ def main():
 
     print("\nTop accessible results:\n")
 
-    for i, (doc, meta, dist) in enumerate(allowed_results, start=1):
+    for i, result in enumerate(allowed_results, start=1):
         print(f"Result {i}")
-        print(f"Source document : {meta['source_document']}")
-        print(f"Department      : {meta['department']}")
-        print(f"Token count     : {meta['token_count']}")
-        print(f"Distance        : {dist:.4f}")
+        print(f"Source document : {result['source']}")
+        print(f"Department      : {result['department']}")
+        print(f"Token count     : {result['token_count']}")
+        print(f"Distance        : {result['distance']:.4f}")
         print("Text:")
-        print(doc[:500], "...\n")
+        print(result["text"][:500], "...\n")
 
 
 if __name__ == "__main__":
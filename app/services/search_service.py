@@ -1,5 +1,15 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.metrics import cache_hits_total, empty_results_total, span
+from app.core.rbac import get_role_permissions, role_filter_key
+from app.services.embedding_cache import EmbeddingCache, normalize_query
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.lexical_index import LexicalIndex
+from app.services.numpy_backend import NumpyVectorIndex
 
 # Correct path (since chroma_db is at project root)
 VECTOR_DB_PATH = "chroma_db"
@@ -7,39 +17,402 @@ VECTOR_DB_PATH = "chroma_db"
 COLLECTION_NAME = "chroma_db"
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-model = SentenceTransformer(MODEL_NAME)
-client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
-collection = client.get_collection(COLLECTION_NAME)
+# Query encoder runtime: "sentence-transformers" (PyTorch) or "onnx" (onnxruntime)
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "sentence-transformers").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "0") == "1"
+
+# Rewritten by the embedder after every indexing run
+INDEX_VERSION_FILE = "index_version"
+
+# Vector backend: "chroma" (default) or "numpy" (in-process exact search)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "chroma").lower()
+NUMPY_INDEX_DIR = "numpy_index"
+NUMPY_INDEX_MMAP = os.getenv("NUMPY_INDEX_MMAP", "0") == "1"
+# Shortlist size multiplier for full-precision rescoring of float16/int8 indexes (0 disables)
+NUMPY_RESCORE_FACTOR = int(os.getenv("NUMPY_RESCORE_FACTOR", "4"))
+
+# Department-partitioned BM25 index, written by the embedder next to Chroma
+LEXICAL_INDEX_DIR = "lexical_index"
+
+# Hybrid retrieval: fuse vector and BM25 rankings (HYBRID_SEARCH=0 disables)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") != "0"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = 60
+
+# Query embedding cache (set EMBEDDING_CACHE_PATH to persist across restarts)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+
+# Micro-batching of concurrent query encodes
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+# Longest a request waits for its query vector
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))
+
+# Heavy resources are created on first use (normally by the startup warm-up)
+model = None
+client = None
+collection = None
+
+_resource_lock = threading.Lock()
+
+
+def get_model():
+    global model
+
+    if model is None:
+        with _resource_lock:
+            if model is None:
+                if ENCODER_BACKEND == "onnx":
+                    from app.services.encoders import OnnxEncoder
+                    model = OnnxEncoder(ONNX_MODEL_DIR, quantized=ONNX_QUANTIZED)
+                else:
+                    # Imported here: torch alone takes seconds to import
+                    from sentence_transformers import SentenceTransformer
+                    model = SentenceTransformer(MODEL_NAME)
+
+    return model
+
+
+def get_collection():
+    global client, collection
+
+    if collection is None:
+        with _resource_lock:
+            if collection is None:
+                import chromadb
+                client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+                collection = client.get_collection(COLLECTION_NAME)
+
+    return collection
+
+
+embedding_cache = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_SIZE,
+    ttl_seconds=EMBEDDING_CACHE_TTL,
+    path=EMBEDDING_CACHE_PATH,
+    model_name=MODEL_NAME
+)
+
+numpy_index = NumpyVectorIndex(
+    Path(VECTOR_DB_PATH) / NUMPY_INDEX_DIR,
+    mmap=NUMPY_INDEX_MMAP,
+    rescore_factor=NUMPY_RESCORE_FACTOR
+)
+
+lexical_index = LexicalIndex(Path(VECTOR_DB_PATH) / LEXICAL_INDEX_DIR)
+
+embedding_batcher = EmbeddingBatcher(
+    encode_batch=lambda texts: get_model().encode(texts, batch_size=EMBED_BATCH_SIZE),
+    max_batch_size=EMBED_BATCH_SIZE,
+    max_wait_ms=EMBED_BATCH_WAIT_MS,
+    timeout=EMBED_TIMEOUT
+)
+
+
+def embed_query(query: str):
+    """
+    Embed a query, reusing cached vectors for repeated (normalized) queries.
+    """
+    with span("embed_query"):
+        embedding = embedding_cache.get(query)
+
+        if embedding is None:
+            embedding = embedding_batcher.encode(normalize_query(query)).tolist()
+            embedding_cache.put(query, embedding)
+        else:
+            cache_hits_total.inc("embedding")
+
+    return embedding
+
+
+def embed_queries(queries: list) -> list:
+    """
+    Embed many queries at once: cached vectors are reused and the rest are
+    encoded in a single model call.
+    """
+    with span("embed_queries"):
+        embeddings = [embedding_cache.get(query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if len(missing) < len(queries):
+            cache_hits_total.inc("embedding", amount=len(queries) - len(missing))
+
+        if missing:
+            encoded = get_model().encode(
+                [normalize_query(queries[i]) for i in missing], batch_size=EMBED_BATCH_SIZE
+            )
+            for i, vector in zip(missing, encoded):
+                embeddings[i] = vector.tolist()
+                embedding_cache.put(queries[i], embeddings[i])
+
+    return embeddings
+
+
+def warm_up(timed):
+    """
+    Load the model and collection and exercise each once.
+    `timed(component)` is a context manager that records how long each step took.
+    """
+    with timed("embedding_model"):
+        get_model()
+
+    with timed("vector_store"):
+        if SEARCH_BACKEND == "numpy":
+            numpy_index.ensure_loaded()
+        else:
+            get_collection()
+
+    if EMBEDDING_CACHE_PATH:
+        with timed("embedding_cache"):
+            embedding_cache.load()
+
+    with timed("warmup_encode"):
+        embedding_batcher.start()
+        vector = embedding_batcher.encode("warm up").tolist()
+
+    with timed("warmup_query"):
+        if SEARCH_BACKEND == "numpy":
+            numpy_index.search(vector, "c-level", 1)
+        else:
+            get_collection().query(query_embeddings=[vector], n_results=1, include=[])
+
+
+def shutdown():
+    embedding_batcher.stop()
+
+    if EMBEDDING_CACHE_PATH:
+        embedding_cache.save()
+
+
+def build_role_filter(user_role):
+    """
+    Chroma `where` clause restricting a query to chunks the role may read.
+    C-Level can read every chunk, so no filter is applied.
+    """
+    permissions = get_role_permissions(user_role)
+
+    if permissions is None:
+        # Unknown roles match no chunk
+        return {role_filter_key(user_role): True}
+
+    return permissions.role_filter
+
+
+def role_departments(permissions) -> list:
+    """
+    Lexical index partitions a role may search.
+    """
+    if permissions.all_access:
+        return lexical_index.partition_names()
 
+    return list(permissions.departments)
 
-def search_with_rbac(query: str, user_role: str, k: int = 5):
-    user_role_norm = user_role.lower()
-    query_embedding = model.encode(query).tolist()
 
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=10,
-        include=["documents", "metadatas", "distances"]
+def is_allowed(meta: dict, permissions) -> bool:
+    if permissions.all_access:
+        return True
+
+    roles_allowed = [
+        r.strip().lower()
+        for r in meta["accessible_roles"].split(",")
+    ]
+    return permissions.role in roles_allowed
+
+
+def to_result(chunk_id: str, doc: str, meta: dict, dist: float) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "text": doc,
+        "source": meta["source_document"],
+        "department": meta["department"],
+        "token_count": meta.get("token_count"),
+        "distance": dist
+    }
+
+
+def vector_search(query_embedding, permissions, n: int):
+    return vector_search_batch([query_embedding], permissions, n)[0]
+
+
+def vector_search_batch(query_embeddings: list, permissions, n: int) -> list:
+    """
+    Top-n allowed chunks for every query embedding, in one index query.
+    """
+    if SEARCH_BACKEND == "numpy":
+        with span("vector_query"):
+            return numpy_index.search_batch(query_embeddings, permissions.role, n)
+
+    return filtered_query(get_collection(), query_embeddings, permissions, n)
+
+
+def filtered_query(collection, query_embeddings: list, permissions, n: int) -> list:
+    """
+    Top-n allowed chunks for every query embedding from a pre-filtered Chroma query.
+
+    RBAC is applied inside the vector query, so Chroma ranks only allowed
+    chunks. Each row is still checked against `accessible_roles` (stale role
+    flags must not leak text); when rows are dropped, the query is re-run
+    with a larger n_results so every query still gets n rows if they exist.
+    """
+    fetch = n
+
+    while True:
+        with span("vector_query"):
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=fetch,
+                where=permissions.role_filter,
+                include=["documents", "metadatas", "distances"]
+            )
+
+        batch = []
+        short = False
+
+        with span("rbac_filter"):
+            for q in range(len(query_embeddings)):
+                allowed = []
+                for chunk_id, doc, meta, dist in zip(
+                    results["ids"][q],
+                    results["documents"][q],
+                    results["metadatas"][q],
+                    results["distances"][q]
+                ):
+                    # Defence in depth: the filter above should already guarantee this
+                    if is_allowed(meta, permissions):
+                        allowed.append(to_result(chunk_id, doc, meta, dist))
+
+                # Rows were dropped and the collection may hold more allowed ones
+                if len(allowed) < n and len(results["ids"][q]) == fetch:
+                    short = True
+                batch.append(allowed[:n])
+
+        if not short:
+            return batch
+        fetch *= 2
+
+
+def fetch_chunks(chunk_ids: list, query_embedding, permissions) -> dict:
+    """
+    Load lexical-only hits from Chroma, with the same distance metric as vector hits.
+    """
+    if SEARCH_BACKEND == "numpy":
+        return numpy_index.get(chunk_ids, query_embedding, permissions.role)
+
+    results = get_collection().get(
+        ids=chunk_ids,
+        where=permissions.role_filter,
+        include=["documents", "metadatas", "embeddings"]
     )
 
-    allowed = []
+    query = np.asarray(query_embedding, dtype=np.float32)
+    fetched = {}
 
-    for doc, meta, dist in zip(
-        results["documents"][0],
-        results["metadatas"][0],
-        results["distances"][0]
+    for chunk_id, doc, meta, embedding in zip(
+        results["ids"],
+        results["documents"],
+        results["metadatas"],
+        results["embeddings"]
     ):
-        roles_allowed = [
-            r.strip().lower()
-            for r in meta["accessible_roles"].split(",")
-        ]
-
-        if user_role_norm == "c-level" or user_role_norm in roles_allowed:
-            allowed.append({
-                "text": doc,
-                "source": meta["source_document"],
-                "department": meta["department"],
-                "distance": dist
-            })
-
-    return allowed[:k]
+        if is_allowed(meta, permissions):
+            # Squared L2, matching Chroma's default distance
+            dist = float(np.sum((np.asarray(embedding, dtype=np.float32) - query) ** 2))
+            fetched[chunk_id] = to_result(chunk_id, doc, meta, dist)
+
+    return fetched
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def search_with_rbac(query: str, user_role, k: int = 5, query_embedding=None):
+    """
+    `user_role` is a role name or its precompiled RolePermissions.
+    `query_embedding` skips embedding the query when the caller already has it.
+    """
+    with span("search_with_rbac"):
+        results = _search_with_rbac(query, user_role, k, query_embedding)
+
+    if not results:
+        empty_results_total.inc()
+
+    return results
+
+
+def _search_with_rbac(query: str, user_role, k: int, query_embedding=None):
+    permissions = get_role_permissions(user_role)
+
+    # Unknown roles can read nothing
+    if permissions is None:
+        return []
+
+    if query_embedding is None:
+        query_embedding = embed_query(query)
+
+    if not HYBRID_SEARCH or not lexical_index.available():
+        return vector_search(query_embedding, permissions, k)
+
+    n = max(k, HYBRID_CANDIDATES)
+
+    vector_hits = vector_search(query_embedding, permissions, n)
+
+    return fuse_hybrid(query, query_embedding, vector_hits, permissions, k, n)
+
+
+def fuse_hybrid(query: str, query_embedding, vector_hits: list, permissions, k: int, n: int) -> list:
+    # RBAC for the lexical side: only the role's department partitions are searched
+    with span("lexical_query"):
+        lexical_hits = lexical_index.search(query, role_departments(permissions), n)
+
+    by_id = {r["chunk_id"]: r for r in vector_hits}
+    missing = [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in by_id]
+    if missing:
+        with span("fetch_lexical_hits"):
+            by_id.update(fetch_chunks(missing, query_embedding, permissions))
+
+    fused = reciprocal_rank_fusion([
+        [r["chunk_id"] for r in vector_hits],
+        [chunk_id for chunk_id, _ in lexical_hits]
+    ])
+
+    return [by_id[chunk_id] for chunk_id in fused if chunk_id in by_id][:k]
+
+
+def search_with_rbac_batch(queries: list, user_role, k: int = 5, query_embeddings: list = None) -> list:
+    """
+    search_with_rbac for many queries under one role: one batched encode and
+    one vector query for all of them; BM25 fusion still runs per query.
+    `query_embeddings` skips the encode when the caller already has them.
+    """
+    permissions = get_role_permissions(user_role)
+
+    # Unknown roles can read nothing
+    if permissions is None:
+        return [[] for _ in queries]
+
+    with span("search_with_rbac_batch"):
+        embeddings = query_embeddings if query_embeddings is not None else embed_queries(queries)
+
+        if not HYBRID_SEARCH or not lexical_index.available():
+            batch = vector_search_batch(embeddings, permissions, k)
+        else:
+            n = max(k, HYBRID_CANDIDATES)
+            batch = [
+                fuse_hybrid(query, embedding, vector_hits, permissions, k, n)
+                for query, embedding, vector_hits in zip(
+                    queries, embeddings, vector_search_batch(embeddings, permissions, n)
+                )
+            ]
+
+    for results in batch:
+        if not results:
+            empty_results_total.inc()
+
+    return batch
@@ -0,0 +1,81 @@
+import threading
+
+from app.core.metrics import registry, span
+
+
+coalesced_total = registry.counter(
+    "chatbot_coalesced_requests_total",
+    "Requests that shared the result of an identical in-flight request"
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it runs wait for it and get the same
+    result, or the same exception. Nothing is kept once the call finishes,
+    so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Returns (result, shared); `shared` is True for callers that waited on a leader.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            coalesced_total.inc()
+            with span("coalesced_wait"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced
+            }
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def token_digest(token: str) -> str:
+    """
+    Cache key for a bearer token; the raw token is never stored.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU cache of verified token claims.
+
+    Entries are keyed by token digest and expire at the token's own `exp`,
+    so a cached token is never accepted for longer than the JWT allows.
+    Revoked digests are rejected before the cache is consulted; they can
+    be added at runtime or loaded from a file with one token or digest
+    per line.
+    """
+
+    def __init__(self, max_size: int = 4096, revocation_path: Path = None):
+        self.max_size = max_size
+        self.revocation_path = Path(revocation_path) if revocation_path else None
+
+        self._entries = OrderedDict()  # digest -> (exp, claims)
+        self._revoked = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+        if self.revocation_path is not None and self.revocation_path.exists():
+            self.load_revocations()
+
+    def get(self, digest: str):
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            exp, claims = entry
+
+            if exp <= now:
+                del self._entries[digest]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest: str, claims: dict, exp: float):
+        with self._lock:
+            if digest in self._revoked:
+                return
+
+            self._entries[digest] = (exp, claims)
+            self._entries.move_to_end(digest)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def is_revoked(self, digest: str) -> bool:
+        if digest in self._revoked:
+            with self._lock:
+                self.rejected += 1
+            return True
+        return False
+
+    def revoke(self, digest: str):
+        with self._lock:
+            self._revoked.add(digest)
+            self._entries.pop(digest, None)
+
+    def load_revocations(self) -> int:
+        """
+        Add every token or digest listed in `revocation_path`.
+        """
+        loaded = 0
+        with open(self.revocation_path, "r", encoding="utf-8") as f:
+            for line in f:
+                value = line.strip()
+                if not value or value.startswith("#"):
+                    continue
+                # Raw JWTs contain dots; digests are 64 hex characters
+                self.revoke(token_digest(value) if "." in value else value)
+                loaded += 1
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "revoked": len(self._revoked),
+                "rejected": self.rejected,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
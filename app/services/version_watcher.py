@@ -0,0 +1,53 @@
+import os
+import time
+from pathlib import Path
+
+
+# Never seen a version yet, so the first check reports a change
+_UNSEEN = object()
+
+
+class VersionWatcher:
+    """
+    Detects rewrites of a file by its mtime.
+
+    `changed()` calls stat() at most once per `interval` seconds and
+    reports whether the mtime differs from the last one it saw; a missing
+    file counts as version None. Not thread-safe: callers hold their own lock.
+    """
+
+    def __init__(self, path: Path, interval: float = 1.0):
+        self.path = Path(path)
+        self.interval = interval
+        self.version = _UNSEEN
+        self._checked_at = None
+
+    def read(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self, force: bool = False) -> bool:
+        """
+        True when the file changed since the last check. `force` skips the throttle.
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.interval:
+            return False
+        self._checked_at = now
+
+        version = self.read()
+        if version == self.version:
+            return False
+
+        self.version = version
+        return True
+
+    def expire(self):
+        # The next changed() checks the file regardless of the interval
+        self._checked_at = None
+
+    def reset(self):
+        # The next check reports a change, e.g. to retry a load that failed
+        self.version = _UNSEEN
@@ -0,0 +1,159 @@
+"""
+Chroma vs in-process NumPy vector search on synthetic corpora.
+
+For every --sizes value a random corpus of normalized 384-dim vectors is
+spread over the departments in role_mapping.yaml, then indexed into a
+temporary Chroma collection (same metadata layout as the embedder) and a
+temporary NumPy index. Each backend answers the same queries for every
+role; NumPy is also timed on the whole query set as one batch. Overlap is
+the share of Chroma's top-k that the exact NumPy search also returns.
+
+Run from the project root:
+    python -m benchmarks.backend_benchmark --sizes 10000 100000 1000000 --chroma-max 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean, median
+
+import numpy as np
+
+from app.core.rbac import RBAC_RULES, role_filter_key
+from app.services.numpy_backend import NumpyVectorIndex, build_numpy_index
+from preprocessing.metadata import get_allowed_roles, load_role_mapping
+
+
+DIM = 384
+K = 5
+UPSERT_BATCH_SIZE = 5000
+
+
+def synthetic_corpus(size: int, departments: list, rng):
+    vectors = rng.standard_normal((size, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    chunks = [
+        {
+            "chunk_id": f"chunk_{i}",
+            "text": f"synthetic chunk {i}",
+            "source_document": f"doc_{i // 20}.md",
+            "department": departments[i % len(departments)]
+        }
+        for i in range(size)
+    ]
+    return chunks, vectors
+
+
+def chroma_metadata(chunk: dict, role_config: dict) -> dict:
+    roles = [r.lower() for r in get_allowed_roles(chunk["department"], role_config)]
+    metadata = {
+        "source_document": chunk["source_document"],
+        "department": chunk["department"],
+        "accessible_roles": ",".join(roles)
+    }
+    for role in RBAC_RULES:
+        metadata[role_filter_key(role)] = role in roles
+    return metadata
+
+
+def build_chroma(chunks: list, vectors, role_config: dict, path: str):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection("benchmark")
+
+    for start in range(0, len(chunks), UPSERT_BATCH_SIZE):
+        batch = chunks[start:start + UPSERT_BATCH_SIZE]
+        collection.add(
+            ids=[c["chunk_id"] for c in batch],
+            embeddings=vectors[start:start + len(batch)].tolist(),
+            metadatas=[chroma_metadata(c, role_config) for c in batch],
+            documents=[c["text"] for c in batch]
+        )
+
+    return collection
+
+
+def chroma_search(collection, query, role: str):
+    where = None if role == "c-level" else {role_filter_key(role): True}
+    results = collection.query(
+        query_embeddings=[query.tolist()],
+        n_results=K,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+    return results["ids"][0]
+
+
+def time_each(fn, queries) -> tuple:
+    latencies = []
+    outputs = []
+    for query in queries:
+        start = time.perf_counter()
+        outputs.append(fn(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--chroma-max", type=int, default=100_000,
+                        help="skip Chroma above this corpus size (ingestion dominates the run)")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the NumPy matrix")
+    args = parser.parse_args()
+
+    role_config = load_role_mapping()
+    departments = list(role_config["roles"])
+    rng = np.random.default_rng(0)
+
+    print(f"{'chunks':>9} {'backend':<12} {'role':<12} {'build s':>8} {'mean ms':>8} "
+          f"{'p50 ms':>7} {'overlap':>8}")
+
+    for size in args.sizes:
+        chunks, vectors = synthetic_corpus(size, departments, rng)
+        queries = rng.standard_normal((args.queries, DIM), dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            build_numpy_index(chunks, vectors, Path(tmp) / "numpy_index")
+            index = NumpyVectorIndex(Path(tmp) / "numpy_index", mmap=args.mmap).ensure_loaded()
+            numpy_build = time.perf_counter() - start
+
+            collection = None
+            if size <= args.chroma_max:
+                start = time.perf_counter()
+                collection = build_chroma(chunks, vectors, role_config, str(Path(tmp) / "chroma"))
+                chroma_build = time.perf_counter() - start
+
+            for role in RBAC_RULES:
+                latencies, numpy_ids = time_each(
+                    lambda q: [r["chunk_id"] for r in index.search(q, role, K)], queries
+                )
+                print(f"{size:>9} {'numpy':<12} {role:<12} {numpy_build:>8.1f} "
+                      f"{mean(latencies):>8.2f} {median(latencies):>7.2f} {'-':>8}")
+
+                start = time.perf_counter()
+                index.search_batch(queries, role, K)
+                per_query = (time.perf_counter() - start) * 1000 / len(queries)
+                print(f"{size:>9} {'numpy-batch':<12} {role:<12} {numpy_build:>8.1f} "
+                      f"{per_query:>8.2f} {'-':>7} {'-':>8}")
+
+                if collection is None:
+                    continue
+
+                latencies, chroma_ids = time_each(
+                    lambda q: chroma_search(collection, q, role), queries
+                )
+                overlap = mean(
+                    len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(chroma_ids, numpy_ids)
+                )
+                print(f"{size:>9} {'chroma':<12} {role:<12} {chroma_build:>8.1f} "
+                      f"{mean(latencies):>8.2f} {median(latencies):>7.2f} {overlap:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
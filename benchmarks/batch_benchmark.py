@@ -0,0 +1,64 @@
+"""
+Retrieval for a batch of questions: one search per query against the
+batched path used by /chat/batch (one encode, one vector query).
+
+Queries are the RBAC benchmark questions repeated to --batch-size, with a
+suffix so every query is distinct and nothing comes from the embedding
+cache. Both paths run under every role.
+
+Run from the project root after indexing:
+    python -m benchmarks.batch_benchmark --batch-size 100
+"""
+import argparse
+import time
+
+from app.core.rbac import RBAC_RULES
+from app.services import search_service
+from app.services.rag import CONTEXT_CANDIDATES
+from app.services.search_service import get_model, search_with_rbac, search_with_rbac_batch
+from benchmarks.rbac_search_benchmark import QUERIES
+
+
+def make_queries(n: int, run: int) -> list:
+    return [f"{QUERIES[i % len(QUERIES)]} ({run}-{i})" for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs batched retrieval")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    # Load the model before timing anything
+    get_model().encode(["warm up"])
+    search_service.embedding_batcher.start()
+
+    header = f"{'role':<12} {'sequential ms':>14} {'batched ms':>11} {'speedup':>8} {'same top-1':>11}"
+    print(header)
+    print("-" * len(header))
+
+    for run, role in enumerate(RBAC_RULES):
+        sequential_queries = make_queries(args.batch_size, 2 * run)
+        batched_queries = make_queries(args.batch_size, 2 * run + 1)
+
+        start = time.perf_counter()
+        sequential = [search_with_rbac(q, role, k=CONTEXT_CANDIDATES) for q in sequential_queries]
+        sequential_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        batched = search_with_rbac_batch(batched_queries, role, k=CONTEXT_CANDIDATES)
+        batched_ms = (time.perf_counter() - start) * 1000
+
+        # Same questions, different suffix: top-1 should mostly agree
+        same = sum(
+            bool(a and b and a[0]["chunk_id"] == b[0]["chunk_id"])
+            for a, b in zip(sequential, batched)
+        )
+
+        print(f"{role:<12} {sequential_ms:>14.1f} {batched_ms:>11.1f} "
+              f"{sequential_ms / batched_ms:>7.1f}x {same / args.batch_size:>11.0%}")
+
+    search_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Micro-benchmark: legacy sentence/word re-encoding chunker vs the
+single-pass token-offset chunk_text.
+
+Inputs are the engineering master doc and a synthetic document built by
+repeating every markdown file under data/raw until it reaches --synthetic-mb.
+
+Run from the project root:
+    python -m benchmarks.chunk_text_benchmark --synthetic-mb 10
+"""
+import argparse
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from preprocessing.chunker import ENCODER, RAW_DATA_DIR, chunk_text, count_tokens
+from preprocessing.cleaner import clean_text
+from preprocessing.io_utils import list_documents, read_markdown
+
+
+ENGINEERING_DOC = RAW_DATA_DIR / "engineering" / "engineering_master_doc.md"
+
+
+# ---------- Legacy implementation (before single-pass chunking) ----------
+
+def trim_to_last_tokens(text: str, max_tokens: int) -> str:
+    tokens = ENCODER.encode(text)
+    return ENCODER.decode(tokens[-max_tokens:])
+
+
+def hard_trim_to_max(text: str, max_tokens: int) -> str:
+    tokens = ENCODER.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return ENCODER.decode(tokens[:max_tokens])
+
+
+def legacy_chunk_text(text: str, min_tokens: int = 300, max_tokens: int = 512, overlap_tokens: int = 50):
+    sentences = sent_tokenize(text)
+    chunks = []
+
+    current_chunk = []
+    current_tokens = 0
+
+    for sentence in sentences:
+        sentence_tokens = count_tokens(sentence)
+
+        if sentence_tokens > max_tokens:
+            words = sentence.split()
+            temp_chunk = []
+            temp_tokens = 0
+
+            for word in words:
+                word_tokens = count_tokens(word + " ")
+
+                if temp_tokens + word_tokens > max_tokens:
+                    chunks.append(hard_trim_to_max(" ".join(temp_chunk), max_tokens))
+                    temp_chunk = [word]
+                    temp_tokens = word_tokens
+                else:
+                    temp_chunk.append(word)
+                    temp_tokens += word_tokens
+
+            if temp_chunk:
+                chunks.append(hard_trim_to_max(" ".join(temp_chunk), max_tokens))
+
+            continue
+
+        if current_tokens + sentence_tokens > max_tokens:
+            chunk_text_str = hard_trim_to_max(" ".join(current_chunk), max_tokens)
+            chunks.append(chunk_text_str)
+
+            overlap_text = trim_to_last_tokens(chunk_text_str, overlap_tokens)
+            current_chunk = [overlap_text, sentence]
+            current_tokens = count_tokens(overlap_text) + sentence_tokens
+        else:
+            current_chunk.append(sentence)
+            current_tokens += sentence_tokens
+
+    if current_chunk:
+        chunks.append(hard_trim_to_max(" ".join(current_chunk), max_tokens))
+
+    final_chunks = []
+
+    for chunk in chunks:
+        chunk = hard_trim_to_max(chunk, max_tokens)
+        token_count = count_tokens(chunk)
+
+        if token_count < min_tokens and final_chunks:
+            merged = hard_trim_to_max(final_chunks[-1] + " " + chunk, max_tokens)
+            if count_tokens(merged) <= max_tokens:
+                final_chunks[-1] = merged
+            else:
+                final_chunks.append(chunk)
+        else:
+            final_chunks.append(chunk)
+
+    return final_chunks
+
+
+# ---------- Benchmark ----------
+
+def synthetic_document(target_mb: float) -> str:
+    sources = [
+        clean_text(read_markdown(doc))
+        for doc in sorted(list_documents(str(RAW_DATA_DIR)))
+        if doc.endswith(".md")
+    ]
+    parts = []
+    size = 0
+    i = 0
+
+    while size < target_mb * 1e6:
+        text = sources[i % len(sources)]
+        parts.append(text)
+        size += len(text) + 1
+        i += 1
+
+    return " ".join(parts)
+
+
+def measure(fn, text: str, n_tokens: int):
+    start = time.perf_counter()
+    chunks = fn(text)
+    seconds = time.perf_counter() - start
+
+    counts = [count_tokens(c) for c in chunks]
+    in_range = sum(1 for c in counts if 300 <= c <= 512)
+    return {
+        "seconds": seconds,
+        "tokens_per_s": n_tokens / seconds,
+        "chunks": len(chunks),
+        "in_range": f"{in_range}/{len(chunks)}"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic-mb", type=float, default=10.0)
+    parser.add_argument("--skip-legacy-synthetic", action="store_true",
+                        help="only time the new chunker on the synthetic document")
+    args = parser.parse_args()
+
+    inputs = [
+        ("engineering_master_doc", clean_text(read_markdown(str(ENGINEERING_DOC)))),
+        (f"synthetic_{args.synthetic_mb:g}mb", synthetic_document(args.synthetic_mb)),
+    ]
+
+    print(f"{'input':<24} {'chunker':<8} {'tokens':>10} {'seconds':>9} {'tokens/s':>12} {'chunks':>7} {'300-512':>9}")
+
+    for name, text in inputs:
+        n_tokens = len(ENCODER.encode(text))
+        runs = [("new", chunk_text)]
+        if not (args.skip_legacy_synthetic and name.startswith("synthetic")):
+            runs.insert(0, ("legacy", legacy_chunk_text))
+
+        for label, fn in runs:
+            stats = measure(fn, text, n_tokens)
+            print(f"{name:<24} {label:<8} {n_tokens:>10} {stats['seconds']:>9.2f} "
+                  f"{stats['tokens_per_s']:>12.0f} {stats['chunks']:>7} {stats['in_range']:>9}")
+
+
+if __name__ == "__main__":
+    main()
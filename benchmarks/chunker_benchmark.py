@@ -0,0 +1,76 @@
+"""
+Serial vs parallel document chunking over a corpus scaled up from data/raw.
+
+Every document under data/raw is copied --scale times (each copy gets a
+unique first line so chunk ids differ), then the corpus is chunked once
+serially and once per worker count. Outputs are checked to be identical.
+
+Run from the project root:
+    python -m benchmarks.chunker_benchmark --scale 50 --workers 2 4 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from preprocessing.chunker import RAW_DATA_DIR, ROLE_CONFIG_PATH, chunk_documents
+from preprocessing.io_utils import list_documents
+from preprocessing.metadata import load_role_mapping
+
+
+def build_corpus(target: Path, scale: int):
+    for doc in list_documents(str(RAW_DATA_DIR)):
+        src = Path(doc)
+        relative = src.relative_to(RAW_DATA_DIR)
+
+        for i in range(scale):
+            dest = target / relative.parent / f"{src.stem}_{i:04d}{src.suffix}"
+            dest.parent.mkdir(parents=True, exist_ok=True)
+
+            if src.suffix == ".csv":
+                shutil.copyfile(src, dest)
+            else:
+                dest.write_text(f"Copy {i} of {src.name}.\n" + src.read_text(encoding="utf-8"),
+                                encoding="utf-8")
+
+    return sorted(list_documents(str(target)))
+
+
+def run(documents: list, role_config: dict, workers: int):
+    start = time.perf_counter()
+    records = [r for _, doc_records in chunk_documents(documents, role_config, workers)
+               for r in doc_records]
+    return records, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=20, help="copies of each raw document")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    role_config = load_role_mapping(str(ROLE_CONFIG_PATH))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Infer departments from the copied tree the same way as data/raw
+        corpus = Path(tmp) / "data" / "raw"
+        documents = build_corpus(corpus, args.scale)
+        size_mb = sum(os.path.getsize(d) for d in documents) / 1e6
+        print(f"Corpus: {len(documents)} documents, {size_mb:.1f} MB")
+
+        baseline, serial_seconds = run(documents, role_config, workers=1)
+        print(f"\n{'workers':>8} {'seconds':>9} {'docs/s':>9} {'chunks/s':>10} {'speedup':>8} identical")
+        print(f"{1:>8} {serial_seconds:>9.2f} {len(documents) / serial_seconds:>9.1f} "
+              f"{len(baseline) / serial_seconds:>10.1f} {1.0:>8.2f} -")
+
+        for workers in sorted(set(args.workers) - {1}):
+            records, seconds = run(documents, role_config, workers)
+            print(f"{workers:>8} {seconds:>9.2f} {len(documents) / seconds:>9.1f} "
+                  f"{len(records) / seconds:>10.1f} {serial_seconds / seconds:>8.2f} "
+                  f"{records == baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Prompt tokens with and without context packing, per role.
+
+For every role and benchmark query the RBAC-filtered candidates are
+retrieved once; the unpacked prompt is the old top-3 whole chunks, the
+packed prompt is app.services.context_packer at each --budgets value.
+Tokens are counted with cl100k_base, the chunker's tokenizer.
+
+Run from the project root after indexing:
+    python -m benchmarks.context_packing_benchmark --budgets 400 700 1000
+"""
+import argparse
+import time
+from statistics import mean
+
+from app.core.rbac import RBAC_RULES
+from app.services.context_packer import count_tokens, pack_context
+from app.services.rag import CONTEXT_CANDIDATES, build_prompt
+from app.services.search_service import search_with_rbac
+from benchmarks.rbac_search_benchmark import QUERIES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens with and without context packing")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[400, 700, 1000])
+    args = parser.parse_args()
+
+    retrieved = []
+    for role in RBAC_RULES:
+        for query in QUERIES:
+            chunks = search_with_rbac(query, role, k=CONTEXT_CANDIDATES)
+            if chunks:
+                retrieved.append((role, query, chunks))
+
+    header = f"{'role':<12} {'budget':>7} {'tokens before':>14} {'tokens after':>13} {'saved':>7} {'pack ms':>8}"
+    print(header)
+    print("-" * len(header))
+
+    for role in RBAC_RULES:
+        cases = [(query, chunks) for r, query, chunks in retrieved if r == role]
+        if not cases:
+            continue
+
+        before = mean(count_tokens(build_prompt(query, chunks[:3])) for query, chunks in cases)
+
+        for budget in args.budgets:
+            after, pack_ms = [], []
+            for query, chunks in cases:
+                start = time.perf_counter()
+                packed = pack_context(query, chunks, budget) or chunks[:1]
+                pack_ms.append((time.perf_counter() - start) * 1000)
+                after.append(count_tokens(build_prompt(query, packed)))
+
+            print(f"{role:<12} {budget:>7} {before:>14.0f} {mean(after):>13.0f} "
+                  f"{1 - mean(after) / before:>7.0%} {mean(pack_ms):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
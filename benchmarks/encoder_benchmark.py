@@ -0,0 +1,103 @@
+"""
+Query encoder backends side by side.
+
+Every backend is measured in a fresh interpreter so import cost and memory
+are attributed correctly:
+    startup  - import + model load + first encode
+    RSS      - peak resident memory of that process
+    latency  - single-query encodes of the RBAC benchmark questions
+
+Parity of the ONNX models with sentence-transformers is checked by
+tests/test_onnx_encoder.py.
+
+Run from the project root after exporting with app.services.export_onnx:
+    python -m benchmarks.encoder_benchmark
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from statistics import mean, median
+
+BACKENDS = ["sentence-transformers", "onnx", "onnx-int8"]
+
+LATENCY_ROUNDS = 5
+
+
+def load_encoder(backend: str):
+    if backend == "sentence-transformers":
+        from sentence_transformers import SentenceTransformer
+        from app.services.search_service import MODEL_NAME
+        return SentenceTransformer(MODEL_NAME)
+
+    from app.services.encoders import OnnxEncoder
+    from app.services.search_service import ONNX_MODEL_DIR
+    return OnnxEncoder(ONNX_MODEL_DIR, quantized=backend == "onnx-int8")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def measure(backend: str) -> dict:
+    from benchmarks.rbac_search_benchmark import QUERIES
+
+    start = time.perf_counter()
+    encoder = load_encoder(backend)
+    encoder.encode("warm up")
+    startup = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(LATENCY_ROUNDS):
+        for query in QUERIES:
+            start = time.perf_counter()
+            encoder.encode(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "startup_s": startup,
+        "rss_mb": peak_rss_mb(),
+        "mean_ms": mean(latencies),
+        "p50_ms": median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1]
+    }
+
+
+def run_isolated(backend: str):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.encoder_benchmark", "--child", backend],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"backend": backend, "error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    print(f"{'backend':<22} {'startup s':>9} {'RSS MB':>8} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for backend in args.backends:
+        stats = run_isolated(backend)
+        if "error" in stats:
+            print(f"{backend:<22} unavailable: {stats['error']}")
+            continue
+        print(f"{backend:<22} {stats['startup_s']:>9.2f} {stats['rss_mb']:>8.0f} "
+              f"{stats['mean_ms']:>8.2f} {stats['p50_ms']:>7.2f} {stats['p95_ms']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
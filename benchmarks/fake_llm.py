@@ -0,0 +1,264 @@
+"""
+Deterministic local stand-ins for the Groq clients used by app.services.llm.
+
+Answers are derived from a hash of the prompt, so the same prompt always
+gets the same answer. Latency is `latency_ms` before the first token plus
+`answer_tokens / tokens_per_s` for the rest, for both blocking and
+streaming calls.
+
+FakeLLMServer serves the same answers over HTTP as an OpenAI-compatible
+chat completions endpoint, with injectable errors, so the real Groq SDK
+and the LLM gateway can be exercised end to end (GROQ_BASE_URL):
+    python -m benchmarks.fake_llm --port 8090 --error-rate 0.2
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+WORDS = (
+    "policy employees quarter revenue leave benefits report team process "
+    "approval manager department data review system customer growth"
+).split()
+
+
+def fake_answer(prompt: str, answer_tokens: int) -> list:
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    words = []
+    for _ in range(answer_tokens):
+        words.append(WORDS[seed % len(WORDS)])
+        seed //= len(WORDS)
+        if seed == 0:
+            seed = answer_tokens * 7919
+    return [w + " " for w in words]
+
+
+def completion(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _Completions:
+    def __init__(self, llm):
+        self.llm = llm
+
+    def create(self, messages, stream=False, **kwargs):
+        tokens = fake_answer(messages[-1]["content"], self.llm.answer_tokens)
+        self.llm.calls += 1
+
+        if stream:
+            return self._stream(tokens)
+
+        time.sleep(self.llm.total_seconds())
+        return completion("".join(tokens).strip())
+
+    def _stream(self, tokens):
+        time.sleep(self.llm.latency_ms / 1000)
+        for token in tokens:
+            time.sleep(1 / self.llm.tokens_per_s)
+            yield chunk(token)
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, messages, stream=False, **kwargs):
+        tokens = fake_answer(messages[-1]["content"], self.llm.answer_tokens)
+        self.llm.calls += 1
+
+        if stream:
+            return self._astream(tokens)
+
+        await asyncio.sleep(self.llm.total_seconds())
+        return completion("".join(tokens).strip())
+
+    async def _astream(self, tokens):
+        await asyncio.sleep(self.llm.latency_ms / 1000)
+        for token in tokens:
+            await asyncio.sleep(1 / self.llm.tokens_per_s)
+            yield chunk(token)
+
+
+class FakeLLM:
+    """
+    Drop-in for `Groq` (sync=True) or `AsyncGroq` (sync=False).
+    """
+
+    def __init__(self, latency_ms: float = 300, tokens_per_s: float = 200,
+                 answer_tokens: int = 60, sync: bool = True):
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.answer_tokens = answer_tokens
+        self.calls = 0
+
+        completions = _Completions(self) if sync else _AsyncCompletions(self)
+        self.chat = SimpleNamespace(completions=completions)
+
+    def total_seconds(self) -> float:
+        return self.latency_ms / 1000 + self.answer_tokens / self.tokens_per_s
+
+
+def install(latency_ms: float = 300, tokens_per_s: float = 200, answer_tokens: int = 60):
+    """
+    Replace the Groq clients in app.services.llm with fakes.
+    """
+    from app.services import llm
+
+    llm.client = FakeLLM(latency_ms, tokens_per_s, answer_tokens, sync=True)
+    llm.async_client = FakeLLM(latency_ms, tokens_per_s, answer_tokens, sync=False)
+    return llm.client, llm.async_client
+
+
+# ---------- HTTP server ----------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.fake.connections += 1
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        if self.path.rstrip("/") != "/openai/v1/chat/completions":
+            return self._json(404, {"error": {"message": "not found"}})
+
+        fake.requests += 1
+
+        if fake.rng.random() < fake.error_rate:
+            fake.errors += 1
+            return self._json(fake.error_status, {"error": {"message": "injected failure"}})
+
+        tokens = fake_answer(body["messages"][-1]["content"], fake.answer_tokens)
+        time.sleep(fake.latency_ms / 1000)
+
+        if body.get("stream"):
+            return self._stream(body, tokens)
+
+        time.sleep(fake.answer_tokens / fake.tokens_per_s)
+        self._json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+        })
+
+    def _json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: dict, tokens: list):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data: str):
+            payload = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+            self.wfile.flush()
+
+        for token in tokens:
+            time.sleep(1 / self.server.fake.tokens_per_s)
+            send(json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }))
+
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up (deadline) close the connection mid-response
+        pass
+
+
+class FakeLLMServer:
+    """
+    OpenAI-compatible /openai/v1/chat/completions on 127.0.0.1, run in a thread.
+    `error_rate` of requests fail with `error_status`; the attributes can be
+    changed while the server runs. `connections` counts accepted TCP connections.
+    """
+
+    def __init__(self, port: int = 0, latency_ms: float = 300, tokens_per_s: float = 200,
+                 answer_tokens: int = 60, error_rate: float = 0.0, error_status: int = 503, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.answer_tokens = answer_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-s", type=float, default=200)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args(argv)
+
+    server = FakeLLMServer(args.port, args.latency_ms, args.tokens_per_s, args.answer_tokens,
+                           args.error_rate, args.error_status)
+    print(f"Fake LLM at {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
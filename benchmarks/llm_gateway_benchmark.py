@@ -0,0 +1,130 @@
+"""
+The LLM gateway against a local fake provider (benchmarks.fake_llm).
+
+Each scenario runs --calls answer generations from --concurrency threads
+through app.services.llm with the real Groq SDK pointed at a
+FakeLLMServer over HTTP:
+  healthy  every call succeeds
+  flaky    a share of requests fail with 503 and are retried
+  outage   every request fails; the circuit opens and calls fail fast
+  slow     the provider is slower than the deadline
+  stream   streaming answers under the same limits
+
+Reported per scenario: answered / "I don't know" counts, p50/p95 latency,
+provider requests and TCP connections (keep-alive reuse), and gateway
+retries, rejections and circuit trips.
+
+Run from the project root:
+    python -m benchmarks.llm_gateway_benchmark --concurrency 32 --calls 200
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import llm
+from app.services.llm_gateway import CircuitBreaker, LLMGateway
+from benchmarks.fake_llm import FakeLLMServer
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def fresh_gateway(server: FakeLLMServer, args) -> LLMGateway:
+    gateway = LLMGateway(
+        max_in_flight=args.max_in_flight,
+        queue_timeout=args.queue_timeout,
+        deadline=args.deadline,
+        attempt_timeout=args.deadline,
+        breaker=CircuitBreaker(threshold=5, reset_timeout=args.breaker_reset)
+    )
+
+    # New clients on the new gateway's connection pool
+    llm.gateway = gateway
+    llm.GROQ_BASE_URL = server.base_url
+    llm.client = None
+    llm.async_client = None
+    return gateway
+
+
+def run_blocking(args) -> list:
+    def one(i):
+        start = time.perf_counter()
+        answer = llm.generate_answer(f"Question {i % 20}: what is the leave policy?")
+        return answer, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        return list(pool.map(one, range(args.calls)))
+
+
+def run_streaming(args) -> list:
+    async def one(i):
+        start = time.perf_counter()
+        parts = [t async for t in llm.stream_answer(f"Question {i % 20}: what is the leave policy?")]
+        return "".join(parts), (time.perf_counter() - start) * 1000
+
+    async def main():
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i):
+            async with limit:
+                return await one(i)
+
+        results = await asyncio.gather(*(bounded(i) for i in range(args.calls)))
+        await llm.gateway.aclose()
+        return results
+
+    return asyncio.run(main())
+
+
+SCENARIOS = {
+    "healthy": {"error_rate": 0.0},
+    "flaky": {"error_rate": 0.3},
+    "outage": {"error_rate": 1.0},
+    "slow": {"error_rate": 0.0, "slow": True},
+    "stream": {"error_rate": 0.0, "stream": True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    parser.add_argument("--breaker-reset", type=float, default=30.0)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'answered':>8} {'idk':>5} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'provider':>8} {'conns':>6} {'retries':>7} {'rejected':>8} {'trips':>5}")
+
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        latency_ms = args.deadline * 1500 if scenario.get("slow") else args.latency_ms
+
+        server = FakeLLMServer(latency_ms=latency_ms, tokens_per_s=2000, answer_tokens=40,
+                               error_rate=scenario["error_rate"]).start()
+        try:
+            gateway = fresh_gateway(server, args)
+            results = run_streaming(args) if scenario.get("stream") else run_blocking(args)
+            gateway.close()
+        finally:
+            server.stop()
+
+        answered = [ms for answer, ms in results if answer.strip() != "I don't know"]
+        stats = gateway.stats()
+        latencies = [ms for _, ms in results]
+
+        print(f"{name:<10} {len(answered):>8} {len(results) - len(answered):>5} "
+              f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+              f"{server.requests:>8} {server.connections:>6} {stats['retries']:>7} "
+              f"{stats['rejected']:>8} {stats['circuit_trips']:>5}")
+
+
+if __name__ == "__main__":
+    main()
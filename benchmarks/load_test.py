@@ -0,0 +1,332 @@
+"""
+End-to-end load test of the FastAPI app with a local LLM stand-in.
+
+The app (app.main) is started in a child process with the Groq clients
+replaced by benchmarks.fake_llm, using the real embedding model, vector
+store and users database. Every seeded user from app/core/init_db.py logs
+in, then --concurrency workers replay a query mix against /chat for
+--duration seconds.
+
+Per-stage timings are read back from the app's access log (JSON mode), so
+the report covers throughput plus p50/p95/p99 per role and per stage.
+Results are saved as JSON under benchmarks/results; --compare prints the
+change against an earlier result.
+
+Run from the project root after indexing and init_db:
+    python -m benchmarks.load_test --concurrency 16 --duration 60
+    python -m benchmarks.load_test --queries-file requests.jsonl --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+from app.core.init_db import DEMO_USERS
+from benchmarks.rbac_search_benchmark import QUERIES
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+READY_TIMEOUT = 300
+
+
+# ---------- Server (child process) ----------
+
+def serve(args):
+    import uvicorn
+    from benchmarks import fake_llm
+    from app.services import logs
+
+    fake_llm.install(args.llm_latency_ms, args.llm_tokens_per_s, args.llm_answer_tokens)
+
+    # Stage timings per request, read back by the driver
+    logs.access_log = logs.AccessLogWriter(args.access_log, fmt="json")
+
+    uvicorn.run("app.main:app", host="127.0.0.1", port=args.port,
+                workers=1, log_level="warning")
+
+
+# ---------- Driver ----------
+
+def load_queries(path: Path) -> list:
+    """
+    One query per line; JSON lines use their "query" field, or "title".
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                line = record.get("query") or record.get("title")
+            if line:
+                queries.append(line)
+    return queries
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(p / 100 * len(values)))], 2)
+
+    return {"count": len(values), "p50": pct(50), "p95": pct(95), "p99": pct(99),
+            "mean": round(sum(values) / len(values), 2)}
+
+
+def wait_until_ready(base_url: str, process):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("App exited during startup")
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"App not ready after {READY_TIMEOUT}s")
+
+
+def login_all(base_url: str) -> list:
+    sessions = []
+    for username, password, role in DEMO_USERS:
+        response = requests.post(f"{base_url}/login",
+                                 data={"username": username, "password": password}, timeout=30)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        sessions.append({"username": username, "role": role.lower(),
+                         "headers": {"Authorization": f"Bearer {token}"}})
+    return sessions
+
+
+def run_load(base_url: str, sessions: list, queries: list, concurrency: int,
+             duration: float, seed: int) -> list:
+    results = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        http = requests.Session()
+
+        while time.monotonic() < stop_at:
+            session = rng.choice(sessions)
+            query = rng.choice(queries)
+
+            start = time.perf_counter()
+            try:
+                response = http.post(f"{base_url}/chat", json={"query": query},
+                                     headers=session["headers"], timeout=120)
+                status = response.status_code
+            except requests.RequestException:
+                status = 0
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with lock:
+                results.append({"role": session["role"], "status": status, "ms": elapsed_ms})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def stage_report(access_log: Path) -> dict:
+    per_stage = defaultdict(list)
+    per_role_stage = defaultdict(lambda: defaultdict(list))
+
+    if access_log.exists():
+        with open(access_log, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                for stage, ms in record.get("stages_ms", {}).items():
+                    per_stage[stage].append(ms)
+                    per_role_stage[record["role"]][stage].append(ms)
+
+    return {
+        "stages": {stage: percentiles(v) for stage, v in sorted(per_stage.items())},
+        "stages_by_role": {
+            role: {stage: percentiles(v) for stage, v in sorted(stages.items())}
+            for role, stages in sorted(per_role_stage.items())
+        }
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RESULTS_DIR.parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def summarize(results: list, duration: float) -> dict:
+    ok = [r for r in results if r["status"] == 200]
+    by_role = defaultdict(list)
+    for r in ok:
+        by_role[r["role"]].append(r["ms"])
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "throughput_rps": round(len(ok) / duration, 2),
+        "latency_ms": percentiles([r["ms"] for r in ok]),
+        "latency_ms_by_role": {role: percentiles(v) for role, v in sorted(by_role.items())}
+    }
+
+
+def print_report(report: dict):
+    summary = report["summary"]
+    print(f"\n{summary['requests']} requests, {summary['errors']} errors, "
+          f"{summary['throughput_rps']} req/s")
+
+    print(f"\n{'role':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [("all", summary["latency_ms"])] + list(summary["latency_ms_by_role"].items())
+    for name, p in rows:
+        if p["count"]:
+            print(f"{name:<14} {p['count']:>6} {p['p50']:>9} {p['p95']:>9} {p['p99']:>9}")
+
+    print(f"\n{'stage':<22} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, p in report["stages"]["stages"].items():
+        print(f"{name:<22} {p['count']:>6} {p['p50']:>9} {p['p95']:>9} {p['p99']:>9}")
+
+
+def compare(report: dict, baseline_path: Path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def delta(new, old):
+        if not old:
+            return "-"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nAgainst {baseline_path.name} ({baseline.get('revision', '?')})")
+    new, old = report["summary"], baseline["summary"]
+    print(f"  throughput {old['throughput_rps']} -> {new['throughput_rps']} req/s "
+          f"({delta(new['throughput_rps'], old['throughput_rps'])})")
+
+    for p in ("p50", "p95", "p99"):
+        if p in new["latency_ms"] and p in old["latency_ms"]:
+            print(f"  {p} {old['latency_ms'][p]} -> {new['latency_ms'][p]} ms "
+                  f"({delta(new['latency_ms'][p], old['latency_ms'][p])})")
+
+    for stage, stats in report["stages"]["stages"].items():
+        previous = baseline["stages"]["stages"].get(stage)
+        if previous and "p95" in previous and "p95" in stats:
+            print(f"  {stage} p95 {previous['p95']} -> {stats['p95']} ms "
+                  f"({delta(stats['p95'], previous['p95'])})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test /chat with a local LLM stand-in")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--queries-file", type=Path,
+                        help="text or JSON lines file of queries (default: built-in mix)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200)
+    parser.add_argument("--llm-answer-tokens", type=int, default=60)
+    parser.add_argument("--no-answer-cache", action="store_true",
+                        help="disable the semantic answer cache in the app")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/...)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--access-log", type=Path, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return
+
+    queries = load_queries(args.queries_file) if args.queries_file else QUERIES
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        access_log = Path(tmp) / "access.log"
+
+        env = dict(os.environ, LOG_FORMAT="json")
+        if args.no_answer_cache:
+            env["ANSWER_CACHE_SIZE"] = "0"
+
+        child_args = [
+            "--serve", "--port", str(args.port), "--access-log", str(access_log),
+            "--llm-latency-ms", str(args.llm_latency_ms),
+            "--llm-tokens-per-s", str(args.llm_tokens_per_s),
+            "--llm-answer-tokens", str(args.llm_answer_tokens),
+        ]
+        server = subprocess.Popen([sys.executable, "-m", "benchmarks.load_test", *child_args], env=env)
+
+        try:
+            print("Waiting for the app to warm up...")
+            wait_until_ready(base_url, server)
+
+            sessions = login_all(base_url)
+            print(f"Logged in {len(sessions)} users; {len(queries)} queries, "
+                  f"{args.concurrency} workers, {args.duration:g}s")
+
+            results = run_load(base_url, sessions, queries, args.concurrency,
+                               args.duration, args.seed)
+        finally:
+            # SIGTERM lets the app shut down cleanly and flush the access log
+            server.terminate()
+            server.wait(timeout=30)
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "config": {
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "queries": len(queries),
+                "queries_file": str(args.queries_file) if args.queries_file else None,
+                "seed": args.seed,
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_tokens_per_s": args.llm_tokens_per_s,
+                "llm_answer_tokens": args.llm_answer_tokens,
+                "answer_cache": not args.no_answer_cache
+            },
+            "summary": summarize(results, args.duration),
+            "stages": stage_report(access_log)
+        }
+
+    print_report(report)
+
+    output = args.output or RESULTS_DIR / (
+        f"load_test-{report['revision']}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
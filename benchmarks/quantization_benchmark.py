@@ -0,0 +1,108 @@
+"""
+Memory, latency and recall@k of float16 / int8 NumPy indexes against float32.
+
+The corpus is the embedder's output (data/processed/chunks.jsonl and the
+embedding store). --scale N adds N-1 noisy copies of every vector to see how
+results hold up on a larger index. Queries are the RBAC benchmark questions,
+encoded with the production model. Recall@k is the share of the exact
+float32 top-k that each configuration also returns, averaged over queries
+and roles.
+
+Run from the project root after indexing:
+    python -m benchmarks.quantization_benchmark --scale 20
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+
+import numpy as np
+
+from app.core.rbac import RBAC_RULES
+from app.services.embedder import CHUNKS_PATH, EMBEDDINGS_DIR, load_chunks
+from app.services.embedding_store import EmbeddingStore
+from app.services.numpy_backend import NumpyVectorIndex, build_numpy_index
+from app.services.search_service import get_model
+from benchmarks.rbac_search_benchmark import QUERIES
+
+
+K = 5
+NOISE = 0.05
+
+
+def load_corpus(scale: int, rng):
+    chunks = load_chunks(CHUNKS_PATH)
+    store = EmbeddingStore(EMBEDDINGS_DIR).load()
+    vectors = store.get_vectors([chunk["chunk_id"] for chunk in chunks])
+
+    all_chunks = list(chunks)
+    all_vectors = [vectors]
+
+    for copy in range(1, scale):
+        noisy = vectors + rng.standard_normal(vectors.shape, dtype=np.float32) * NOISE
+        all_vectors.append(noisy / np.linalg.norm(noisy, axis=1, keepdims=True))
+        all_chunks.extend(dict(chunk, chunk_id=f"{chunk['chunk_id']}#{copy}") for chunk in chunks)
+
+    return all_chunks, np.vstack(all_vectors)
+
+
+def run(index, queries, role: str):
+    start = time.perf_counter()
+    results = [[r["chunk_id"] for r in index.search(q, role, K)] for q in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="noisy copies of the corpus")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    chunks, vectors = load_corpus(args.scale, rng)
+    queries = np.asarray(get_model().encode(QUERIES), dtype=np.float32)
+    print(f"Corpus: {len(chunks)} chunks, {len(queries)} queries, k={K}")
+
+    configs = [
+        ("float32", 0),
+        ("float16", 0),
+        ("float16", args.rescore_factor),
+        ("int8", 0),
+        ("int8", args.rescore_factor),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = {}
+        print(f"\n{'dtype':<8} {'rescore':>7} {'matrix MB':>10} {'bytes/chunk':>12} "
+              f"{'mean ms':>8} {'recall@k':>9}")
+
+        for dtype, rescore_factor in configs:
+            directory = Path(tmp) / dtype
+            if not directory.exists():
+                build_numpy_index(chunks, vectors, directory, dtype=dtype)
+
+            index = NumpyVectorIndex(directory, rescore_factor=rescore_factor).ensure_loaded()
+
+            latencies = []
+            recalls = []
+
+            for role in RBAC_RULES:
+                results, ms = run(index, queries, role)
+                latencies.append(ms)
+
+                if dtype == "float32":
+                    exact[role] = results
+
+                recalls.extend(
+                    len(set(got) & set(want)) / max(len(want), 1)
+                    for got, want in zip(results, exact[role])
+                )
+
+            print(f"{dtype:<8} {rescore_factor or '-':>7} {index.nbytes() / 1e6:>10.2f} "
+                  f"{index.nbytes() / len(chunks):>12.0f} {mean(latencies):>8.2f} "
+                  f"{mean(recalls):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare post-filter and pre-filter RBAC retrieval for every role.
+
+Post-filter is the old behaviour: fetch a fixed top-10 from Chroma and drop
+chunks the role cannot read. Pre-filter pushes the role into the Chroma
+`where` clause so only allowed chunks are ranked, then re-checks each row's
+`accessible_roles` (see search_service.filtered_query).
+
+Run from the project root after indexing:
+    python -m benchmarks.rbac_search_benchmark
+"""
+import time
+from statistics import mean
+
+from app.core.rbac import RBAC_RULES, get_role_permissions
+from app.services.search_service import filtered_query, get_collection, get_model, build_role_filter
+
+
+K = 5
+POST_FILTER_FETCH = 10
+REPEATS = 3
+
+QUERIES = [
+    "What is the leave policy?",
+    "How many days of annual leave do employees get?",
+    "What was the Q4 revenue?",
+    "Summarize the quarterly financial report",
+    "What are the marketing campaign results for Q2 2024?",
+    "Which channels drove the most customer acquisition?",
+    "Describe the system architecture",
+    "What is the incident response process?",
+    "Who is the manager of FINEMP1001?",
+    "What is the average attendance percentage?",
+    "What is the code of conduct?",
+    "How are performance reviews conducted?",
+]
+
+
+def post_filter_search(query_embedding, user_role: str, k: int = K):
+    user_role_norm = user_role.lower()
+
+    results = get_collection().query(
+        query_embeddings=[query_embedding],
+        n_results=POST_FILTER_FETCH,
+        include=["documents", "metadatas", "distances"]
+    )
+
+    allowed = []
+    for doc, meta in zip(results["documents"][0], results["metadatas"][0]):
+        roles_allowed = [r.strip().lower() for r in meta["accessible_roles"].split(",")]
+        if user_role_norm == "c-level" or user_role_norm in roles_allowed:
+            allowed.append(doc)
+
+    return allowed[:k]
+
+
+def pre_filter_search(query_embedding, user_role: str, k: int = K):
+    results = filtered_query(get_collection(), [query_embedding], get_role_permissions(user_role), k)
+    return [r["text"] for r in results[0]]
+
+
+def accessible_count(user_role: str) -> int:
+    role_filter = build_role_filter(user_role)
+    if role_filter is None:
+        return get_collection().count()
+    return len(get_collection().get(where=role_filter, include=[])["ids"])
+
+
+def run_strategy(search_fn, embeddings, user_role: str, expected: int):
+    latencies = []
+    full_hits = 0
+    returned = []
+
+    for embedding in embeddings:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            docs = search_fn(embedding, user_role)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        returned.append(len(docs))
+        if len(docs) >= expected:
+            full_hits += 1
+
+    latencies.sort()
+    return {
+        "hit_rate": full_hits / len(embeddings),
+        "avg_returned": mean(returned),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    print(f"Collection size: {get_collection().count()} chunks")
+    print("Embedding benchmark queries...")
+    embeddings = [e.tolist() for e in get_model().encode(QUERIES)]
+
+    header = f"{'role':<12} {'strategy':<12} {'hit rate':>9} {'avg k':>7} {'p50 ms':>8} {'p95 ms':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+
+    for role in RBAC_RULES:
+        expected = min(K, accessible_count(role))
+
+        for name, fn in (("post-filter", post_filter_search), ("pre-filter", pre_filter_search)):
+            stats = run_strategy(fn, embeddings, role, expected)
+            print(
+                f"{role:<12} {name:<12} {stats['hit_rate']:>9.0%} "
+                f"{stats['avg_returned']:>7.2f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}"
+            )
+
+    print(f"\nhit rate = share of queries returning min({K}, accessible chunks) results")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import json
+
 import streamlit as st
 import requests
 
@@ -8,6 +10,31 @@ st.set_page_config(
     layout="wide"
 )
 
+
+def iter_sse_events(response):
+    """
+    Parse a Server-Sent Events response into (event, data) pairs.
+    """
+    event = "message"
+    data_lines = []
+
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event = "message"
+            data_lines = []
+
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
 # ---------------- Session State ----------------
 if "token" not in st.session_state:
     st.session_state.token = None
@@ -23,18 +50,18 @@ if st.session_state.token is None:
 
     if st.button("Login"):
         try:
-            with st.spinner("Connecting to backend, please wait..."):
+            with st.spinner("Logging in..."):
                 response = requests.post(
                     f"{API_URL}/login",
                     data={
                         "username": username,
                         "password": password
                     },
-                    timeout=25
+                    timeout=10
                 )
 
         except requests.exceptions.ReadTimeout:
-            st.error("⏳ Backend is still starting. Please wait a few seconds and try again.")
+            st.error("⏳ Backend did not respond in time. Please try again.")
             st.stop()
 
         except requests.exceptions.ConnectionError:
@@ -87,15 +114,24 @@ else:
     # ---------------- Main Chat UI ----------------
     st.title("💬 Company Internal Chatbot")
 
+    # Readiness: search resources may still be warming up after a restart
+    try:
+        ready_response = requests.get(f"{API_URL}/ready", timeout=5)
+        if ready_response.status_code != 200:
+            st.info("⏳ Search index is still warming up; the first answer may take a little longer.")
+    except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout):
+        pass
+
     query = st.text_input("Ask a question related to company documents")
 
     if st.button("Ask") and query.strip():
         try:
             with st.spinner("Processing your query..."):
                 chat_response = requests.post(
-                    f"{API_URL}/chat",
+                    f"{API_URL}/chat/stream",
                     json={"query": query},
                     headers=headers,
+                    stream=True,
                     timeout=35
                 )
 
@@ -108,27 +144,45 @@ else:
             st.error("🚫 You are not authorized to access this information.")
 
         elif chat_response.status_code == 200:
-            data = chat_response.json()
-
-            # Answer
+            # Placeholders keep the original layout while tokens stream in
             st.markdown("### 🧠 Answer")
-            if data.get("answer"):
-                st.write(data["answer"])
-            else:
-                st.warning("No direct answer generated.")
-
-            # Confidence
-            st.markdown(f"**Confidence Score:** {data.get('confidence', 0.0)}")
-
-            # Sources
+            answer_box = st.empty()
+            confidence_box = st.empty()
             st.markdown("### 📚 Source Documents")
-            if data.get("sources"):
-                for src in data["sources"]:
-                    st.write("-", src)
+            sources_box = st.container()
+
+            answer = ""
+
+            try:
+                for event, data in iter_sse_events(chat_response):
+                    if event == "meta":
+                        confidence_box.markdown(
+                            f"**Confidence Score:** {data.get('confidence', 0.0)}"
+                        )
+                        with sources_box:
+                            if data.get("sources"):
+                                for src in data["sources"]:
+                                    st.write("-", src)
+                            else:
+                                st.write("No sources returned.")
+
+                    elif event == "token":
+                        answer += data.get("text", "")
+                        answer_box.markdown(answer + "▌")
+
+                    elif event == "done":
+                        answer = data.get("answer", answer)
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                st.error("❌ Connection lost while streaming the answer.")
+
+            finally:
+                chat_response.close()
+
+            if answer.strip():
+                answer_box.markdown(answer)
             else:
-                st.write("No sources returned.")
+                answer_box.warning("No direct answer generated.")
 
         else:
             st.error("Something went wrong while processing your request.")
-
-
@@ -1,13 +1,18 @@
 import nltk
 from nltk.tokenize import sent_tokenize
 import tiktoken
+import argparse
+import hashlib
 import json
 import os
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 # Correct relative imports (since we are inside preprocessing folder)
 from preprocessing.metadata import load_role_mapping, infer_department, get_allowed_roles
-from preprocessing.io_utils import list_documents, read_markdown, read_csv
+from preprocessing.io_utils import list_documents, read_markdown, iter_csv_records
 from preprocessing.cleaner import clean_text
 
 nltk.download("punkt", quiet=True)
@@ -21,145 +26,456 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 RAW_DATA_DIR = BASE_DIR / "data" / "raw"
 ROLE_CONFIG_PATH = BASE_DIR / "config" / "role_mapping.yaml"
 OUTPUT_PATH = BASE_DIR / "data" / "processed" / "chunks.jsonl"
+MANIFEST_PATH = BASE_DIR / "data" / "processed" / "manifest.json"
+
+# Bump when chunking logic changes so the next run rebuilds every document
+CHUNKER_VERSION = "5"
 
 
 def count_tokens(text: str) -> int:
     return len(ENCODER.encode(text))
 
 
-def trim_to_last_tokens(text: str, max_tokens: int) -> str:
-    tokens = ENCODER.encode(text)
-    return ENCODER.decode(tokens[-max_tokens:])
+def sentence_boundaries(text: str, token_starts: list) -> list:
+    """
+    Token indices at which sentences start, plus the end-of-text index.
+    """
+    boundaries = []
+    pos = 0
+
+    for sentence in sent_tokenize(text):
+        char_start = text.find(sentence, pos)
+        if char_start < 0:
+            continue
+        pos = char_start + len(sentence)
+        boundaries.append(bisect_left(token_starts, char_start))
 
+    boundaries.append(len(token_starts))
+    return sorted(set(boundaries))
 
-def hard_trim_to_max(text: str, max_tokens: int) -> str:
-    tokens = ENCODER.encode(text)
-    if len(tokens) <= max_tokens:
-        return text
-    return ENCODER.decode(tokens[:max_tokens])
 
+def chunk_spans(boundaries: list, n_tokens: int, min_tokens: int,
+                max_tokens: int, overlap_tokens: int) -> list:
+    """
+    Greedy (start, end) token spans that end on sentence boundaries.
 
-def chunk_text(
+    Each span holds at most `max_tokens`, consecutive spans overlap by at
+    least `overlap_tokens`, and every span has at least `min_tokens` unless
+    the whole text is shorter. A sentence longer than `max_tokens` is split
+    at the token limit.
+    """
+    spans = []
+    start = 0
+
+    while start < n_tokens:
+        limit = start + max_tokens
+
+        if limit >= n_tokens:
+            end = n_tokens
+        else:
+            # Last sentence boundary that still fits in this chunk
+            i = bisect_right(boundaries, limit) - 1
+            end = boundaries[i] if i >= 0 else limit
+            if end - start < min_tokens:
+                end = limit
+
+        spans.append((start, end))
+
+        if end >= n_tokens:
+            break
+        start = max(end - overlap_tokens, start + 1)
+
+    # A short tail is merged into the previous chunk if it fits, otherwise
+    # its start moves back (preferably to a sentence start) to reach min_tokens
+    if len(spans) > 1 and spans[-1][1] - spans[-1][0] < min_tokens:
+        prev_start = spans[-2][0]
+
+        if n_tokens - prev_start <= max_tokens:
+            spans[-2:] = [(prev_start, n_tokens)]
+        else:
+            lo = bisect_left(boundaries, n_tokens - max_tokens)
+            hi = bisect_right(boundaries, n_tokens - min_tokens)
+            start = boundaries[lo] if lo < hi else n_tokens - min_tokens
+            spans[-1] = (start, n_tokens)
+
+    return spans
+
+
+def char_starts(tokens: list) -> list:
+    """
+    Token indices at which a character starts, plus the end-of-tokens index.
+
+    A token whose first byte is a UTF-8 continuation byte finishes a
+    character begun by the token before it; cutting in front of it would
+    split that character.
+    """
+    starts = [
+        i for i, token in enumerate(ENCODER.decode_tokens_bytes(tokens))
+        if not 0x80 <= token[0] < 0xC0
+    ]
+    starts.append(len(tokens))
+    return starts
+
+
+def chunk_text_with_counts(
     text: str,
     min_tokens: int = 300,
     max_tokens: int = 512,
     overlap_tokens: int = 50
 ):
-    sentences = sent_tokenize(text)
+    """
+    Chunk `text` into (chunk, token_count) pairs.
+
+    The text is encoded once and chunks are cut on token offsets aligned to
+    sentence boundaries. Span edges are moved back to the nearest token that
+    starts a character, so no multi-byte character is split. Token counts
+    are measured on the final chunk text, which is trimmed at its end in the
+    rare case that re-encoding it exceeds `max_tokens`.
+    """
+    tokens = ENCODER.encode(text)
+    if not tokens:
+        return []
+
+    _, token_starts = ENCODER.decode_with_offsets(tokens)
+    boundaries = sentence_boundaries(text, token_starts)
+    cuts = char_starts(tokens)
+
+    def snap(i: int) -> int:
+        return cuts[bisect_right(cuts, i) - 1]
+
     chunks = []
 
-    current_chunk = []
-    current_tokens = 0
+    for start, end in chunk_spans(boundaries, len(tokens), min_tokens, max_tokens, overlap_tokens):
+        start, end = snap(start), snap(end)
+        chunk = ENCODER.decode(tokens[start:end]).strip()
+        token_count = count_tokens(chunk)
+
+        # Re-encoding the decoded text can tokenize its edges differently
+        while token_count > max_tokens:
+            end = snap(end - 1)
+            chunk = ENCODER.decode(tokens[start:end]).strip()
+            token_count = count_tokens(chunk)
+
+        if chunk:
+            chunks.append((chunk, token_count))
+
+    return chunks
+
+
+def rows_tokens(rows: list) -> int:
+    # Upper bound: a newline costs at most one token, fewer when it merges with the row before it
+    return sum(n for _, n in rows) + len(rows) - 1
+
+
+def join_rows(rows: list):
+    text = "\n".join(text for text, _ in rows)
+    return text, count_tokens(text)
+
+
+def rebalance_tail(pending: list, current: list, min_tokens: int, max_tokens: int):
+    """
+    Rows for the last two chunks when the final one is under `min_tokens`
+    and the two do not fit in one chunk.
 
-    for sentence in sentences:
-        sentence_tokens = count_tokens(sentence)
+    The most even split with both sides within bounds wins. Failing that,
+    the tail takes rows back from the previous chunk, overlapping it, until
+    it reaches `min_tokens`. A tail that cannot reach `min_tokens` without
+    exceeding `max_tokens` stays short.
+    """
+    rows = pending + current
 
-        if sentence_tokens > max_tokens:
-            words = sentence.split()
-            temp_chunk = []
-            temp_tokens = 0
+    total = sum(n for _, n in rows)
+    head_rows = 0
+    best = None
 
-            for word in words:
-                word_tokens = count_tokens(word + " ")
+    for split in range(1, len(rows)):
+        head_rows += rows[split - 1][1]
+        head = head_rows + split - 1
+        tail = total - head_rows + len(rows) - split - 1
+        if min_tokens <= head <= max_tokens and min_tokens <= tail <= max_tokens:
+            if best is None or abs(head - tail) < best[0]:
+                best = (abs(head - tail), split)
 
-                if temp_tokens + word_tokens > max_tokens:
-                    chunk_text_str = hard_trim_to_max(" ".join(temp_chunk), max_tokens)
-                    chunks.append(chunk_text_str)
-                    temp_chunk = [word]
-                    temp_tokens = word_tokens
-                else:
-                    temp_chunk.append(word)
-                    temp_tokens += word_tokens
+    if best is not None:
+        return rows[:best[1]], rows[best[1]:]
 
-            if temp_chunk:
-                chunk_text_str = hard_trim_to_max(" ".join(temp_chunk), max_tokens)
-                chunks.append(chunk_text_str)
+    for start in range(len(pending) - 1, -1, -1):
+        tokens = rows_tokens(rows[start:])
+        if tokens > max_tokens:
+            break
+        if tokens >= min_tokens:
+            return pending, rows[start:]
 
+    return pending, current
+
+
+def chunk_rows(
+    records,
+    min_tokens: int = 300,
+    max_tokens: int = 512
+):
+    """
+    Group tabular records into (chunk, token_count) pairs on row boundaries.
+
+    Rows are consumed from an iterator and each is encoded once; only the
+    chunk being built and the previous one are held in memory. Rows never
+    overlap between chunks, except to bring a short final chunk up to
+    `min_tokens`, and a row longer than `max_tokens` is split on token
+    offsets. A short final chunk is merged into the previous one, or the two
+    are rebalanced (see rebalance_tail) when the merge would exceed
+    `max_tokens`. Token counts are measured on the joined chunk text.
+    """
+    pending = None  # last full chunk, held back in case the tail is short
+    current = []
+    current_tokens = 0
+
+    for record in records:
+        row = clean_text(record)
+        if not row:
             continue
 
-        if current_tokens + sentence_tokens > max_tokens:
-            chunk_text_str = hard_trim_to_max(" ".join(current_chunk), max_tokens)
-            chunks.append(chunk_text_str)
+        tokens = ENCODER.encode(row)
+        pieces = [tokens[i:i + max_tokens] for i in range(0, len(tokens), max_tokens)]
 
-            overlap_text = trim_to_last_tokens(chunk_text_str, overlap_tokens)
-            current_chunk = [overlap_text, sentence]
-            current_tokens = count_tokens(overlap_text) + sentence_tokens
-        else:
-            current_chunk.append(sentence)
-            current_tokens += sentence_tokens
+        for piece in pieces:
+            piece_text = row if len(pieces) == 1 else ENCODER.decode(piece).strip()
+            cost = len(piece) + (1 if current else 0)
 
-    if current_chunk:
-        chunk_text_str = hard_trim_to_max(" ".join(current_chunk), max_tokens)
-        chunks.append(chunk_text_str)
+            if current and current_tokens + cost > max_tokens:
+                if pending:
+                    yield join_rows(pending)
+                pending = current
+                current, current_tokens = [], 0
+                cost = len(piece)
 
-    final_chunks = []
+            current.append((piece_text, len(piece)))
+            current_tokens += cost
 
-    for chunk in chunks:
-        chunk = hard_trim_to_max(chunk, max_tokens)
-        token_count = count_tokens(chunk)
+    if not current:
+        if pending:
+            yield join_rows(pending)
+        return
 
-        if token_count < min_tokens and final_chunks:
-            merged = hard_trim_to_max(final_chunks[-1] + " " + chunk, max_tokens)
-            if count_tokens(merged) <= max_tokens:
-                final_chunks[-1] = merged
-            else:
-                final_chunks.append(chunk)
-        else:
-            final_chunks.append(chunk)
+    if pending and current_tokens < min_tokens:
+        if rows_tokens(pending + current) <= max_tokens:
+            yield join_rows(pending + current)
+            return
 
-    return final_chunks
+        pending, current = rebalance_tail(pending, current, min_tokens, max_tokens)
 
+    if pending:
+        yield join_rows(pending)
+    yield join_rows(current)
 
-def main():
-    print("Chunking documents...\n")
 
-    documents = list_documents(str(RAW_DATA_DIR))
+def chunk_text(
+    text: str,
+    min_tokens: int = 300,
+    max_tokens: int = 512,
+    overlap_tokens: int = 50
+):
+    return [
+        chunk for chunk, _ in
+        chunk_text_with_counts(text, min_tokens, max_tokens, overlap_tokens)
+    ]
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_key(doc: str) -> str:
+    return Path(doc).resolve().relative_to(RAW_DATA_DIR.resolve()).as_posix()
+
+
+def process_document(doc: str, role_config: dict):
+    """
+    Chunk one document into chunk records.
+
+    Chunk ids are derived from the chunk text ("<file>_<hash12>"), so they
+    stay stable when text elsewhere in the document changes.
+    """
+    if doc.endswith(".md"):
+        chunks = chunk_text_with_counts(clean_text(read_markdown(doc)))
+    elif doc.endswith(".csv"):
+        chunks = chunk_rows(iter_csv_records(doc))
+    else:
+        return []
+
+    department = infer_department(doc, role_config)
+    allowed_roles = get_allowed_roles(department, role_config)
+
+    records = []
+    seen_ids = set()
+
+    for chunk, token_count in chunks:
+        chunk_hash = sha256_hex(chunk.encode("utf-8"))
+        chunk_id = f"{os.path.basename(doc)}_{chunk_hash[:12]}"
+
+        # Identical chunks inside one document get an ordinal suffix
+        base_id, n = chunk_id, 1
+        while chunk_id in seen_ids:
+            n += 1
+            chunk_id = f"{base_id}_{n}"
+        seen_ids.add(chunk_id)
+
+        records.append({
+            "chunk_id": chunk_id,
+            "text": chunk,
+            "source_document": os.path.basename(doc),
+            "department": department,
+            "accessible_roles": allowed_roles,
+            "token_count": token_count,
+            "content_hash": chunk_hash
+        })
+
+    return records
+
+
+def chunk_documents(documents: list, role_config: dict, workers: int = 1):
+    """
+    Yield (doc, chunk records) for each document, in input order.
+
+    With workers > 1 documents are chunked in a process pool; results are
+    still yielded in input order, so output is identical to a serial run.
+    """
+    if workers <= 1 or len(documents) <= 1:
+        for doc in documents:
+            yield doc, process_document(doc, role_config)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(process_document, documents, repeat(role_config))
+        yield from zip(documents, results)
+
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {"settings": {}, "documents": {}}
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_previous_chunks(path: Path) -> dict:
+    records = {}
+    if not path.exists():
+        return records
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            records[record["chunk_id"]] = record
+    return records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chunk raw documents into chunks.jsonl")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for chunking (0 = one per CPU core)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    print(f"Chunking documents ({workers} worker{'s' if workers > 1 else ''})...\n")
+
+    documents = sorted(list_documents(str(RAW_DATA_DIR)))
     role_config = load_role_mapping(str(ROLE_CONFIG_PATH))
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    total_chunks = 0
+    # Any change to chunking logic or role mapping invalidates every document
+    settings = {
+        "chunker_version": CHUNKER_VERSION,
+        "role_config_hash": file_hash(str(ROLE_CONFIG_PATH))
+    }
+
+    manifest = load_manifest(MANIFEST_PATH)
+    previous_docs = manifest["documents"] if manifest.get("settings") == settings else {}
+
+    if manifest["documents"] and not previous_docs:
+        print("Chunker version or role mapping changed: rebuilding all documents\n")
+    previous_chunks = load_previous_chunks(OUTPUT_PATH) if previous_docs else {}
+
+    new_manifest = {"settings": settings, "documents": {}}
     all_chunk_records = []
+    report = {"added": [], "changed": [], "unchanged": [], "removed": []}
+
+    doc_hashes = {}
+    to_process = []
 
     for doc in documents:
-        if doc.endswith(".md"):
-            raw_content = read_markdown(doc)
-        elif doc.endswith(".csv"):
-            raw_content = read_csv(doc)
+        key = document_key(doc)
+        doc_hashes[doc] = file_hash(doc)
+        previous = previous_docs.get(key)
+
+        reusable = (
+            previous is not None
+            and previous["hash"] == doc_hashes[doc]
+            and all(c["chunk_id"] in previous_chunks for c in previous["chunks"])
+        )
+
+        if reusable:
+            report["unchanged"].append(key)
         else:
-            continue
+            to_process.append(doc)
+            report["changed" if previous else "added"].append(key)
 
-        cleaned_content = clean_text(raw_content)
-        chunks = chunk_text(cleaned_content)
+    # Results stream back in the same order as `to_process`
+    processed = chunk_documents(to_process, role_config, workers)
+    pending = set(to_process)
 
-        department = infer_department(doc, role_config)
-        allowed_roles = get_allowed_roles(department, role_config)
-
-        print(f"Chunked: {doc} → {len(chunks)} chunks")
+    for doc in documents:
+        key = document_key(doc)
 
-        for i, chunk in enumerate(chunks, start=1):
-            tokens = count_tokens(chunk)
-            chunk_id = f"{os.path.basename(doc)}_{i:03d}"
+        if doc in pending:
+            _, records = next(processed)
+            print(f"Chunked: {doc} → {len(records)} chunks")
+        else:
+            records = [previous_chunks[c["chunk_id"]] for c in previous_docs[key]["chunks"]]
 
-            chunk_record = {
-                "chunk_id": chunk_id,
-                "text": chunk,
-                "source_document": os.path.basename(doc),
-                "department": department,
-                "accessible_roles": allowed_roles,
-                "token_count": tokens
-            }
+        new_manifest["documents"][key] = {
+            "hash": doc_hashes[doc],
+            "chunks": [
+                {"chunk_id": r["chunk_id"], "hash": r["content_hash"]}
+                for r in records
+            ]
+        }
+        all_chunk_records.extend(records)
 
-            all_chunk_records.append(chunk_record)
+    report["removed"] = sorted(set(previous_docs) - set(new_manifest["documents"]))
 
-        total_chunks += len(chunks)
+    old_ids = {c["chunk_id"] for d in previous_docs.values() for c in d["chunks"]}
+    new_ids = {r["chunk_id"] for r in all_chunk_records}
 
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
         for record in all_chunk_records:
             f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-    print(f"\nTotal chunks created: {total_chunks}")
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(new_manifest, f, indent=2)
+
+    print("\nDocuments: " + ", ".join(f"{len(v)} {k}" for k, v in report.items()))
+    for status in ("added", "changed", "removed"):
+        for key in report[status]:
+            print(f"  {status:<8} {key}")
+    print(f"Chunks: {len(new_ids - old_ids)} added, {len(old_ids - new_ids)} removed, "
+          f"{len(new_ids & old_ids)} kept")
+
+    print(f"\nTotal chunks: {len(all_chunk_records)}")
     print(f"Saved to: {OUTPUT_PATH}")
+    print(f"Manifest: {MANIFEST_PATH}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
+import csv
 import os
-import pandas as pd
 
 def list_documents(raw_dir):
     docs = []
@@ -13,6 +13,19 @@ def read_markdown(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
         return f.read()
 
+def iter_csv_records(file_path):
+    # Stream rows as compact "column: value; column: value" records,
+    # so memory stays bounded regardless of file size
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            fields = [
+                f"{column}: {value.strip()}"
+                for column, value in row.items()
+                if column is not None and value is not None and value.strip()
+            ]
+            if fields:
+                yield "; ".join(fields)
+
 def read_csv(file_path):
-    df = pd.read_csv(file_path)
-    return df.to_string(index=False)
\ No newline at end of file
+    return "\n".join(iter_csv_records(file_path))
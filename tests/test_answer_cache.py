@@ -0,0 +1,96 @@
+import numpy as np
+
+from app.core.rbac import get_role_permissions
+from app.services import rag, search_service
+from app.services.answer_cache import SemanticAnswerCache
+
+
+def scope(role: str) -> frozenset:
+    # As rag.role_scope: answers are cached per department set
+    return get_role_permissions(role).departments
+
+
+def unit(*values) -> np.ndarray:
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+ANSWER = {"answer": "Q4 revenue grew 20%", "sources": ["finance.md"], "confidence": 0.8}
+
+
+def test_answers_do_not_cross_roles():
+    cache = SemanticAnswerCache()
+    cache.store(scope("finance"), unit(1), ANSWER, ["Finance"])
+
+    assert cache.lookup(scope("finance"), unit(1)) == ANSWER
+    for role in ("hr", "engineering", "marketing", "employees", "c-level"):
+        assert cache.lookup(scope(role), unit(1)) is None
+
+
+def test_answer_built_from_other_departments_is_not_stored():
+    cache = SemanticAnswerCache()
+    cache.store(scope("employees"), unit(1), ANSWER, ["Finance", "General"])
+
+    assert cache.lookup(scope("employees"), unit(1)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_out_of_scope_entry_does_not_hide_a_usable_one():
+    cache = SemanticAnswerCache(threshold=0.9)
+    finance = scope("finance")
+    cache.store(finance, unit(1, 0.2), ANSWER, ["Finance"])
+    cache.store(finance, unit(1), {"answer": "leaked"}, ["Finance"])
+
+    # Simulate an entry whose chunks fall outside the scope, and make it the best match
+    entries = cache._scopes[finance]
+    entries[1]["departments"] = frozenset({"hr"})
+    cache._matrices.clear()
+
+    assert cache.lookup(finance, unit(1)) == ANSWER
+
+
+def test_expired_entries_are_skipped_and_evicted(monkeypatch):
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    finance = scope("finance")
+
+    now = 1_000_000.0
+    monkeypatch.setattr("app.services.answer_cache.time.time", lambda: now)
+    cache.store(finance, unit(1), {"answer": "stale"}, ["Finance"])
+
+    now += 30
+    cache.store(finance, unit(1, 0.2), ANSWER, ["Finance"])
+
+    # The best match has expired; the next best still answers
+    now += 45
+    assert cache.lookup(finance, unit(1)) == ANSWER
+    assert cache.stats()["entries"] == 1
+
+    now += 30
+    assert cache.lookup(finance, unit(1)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_pipeline_embeds_each_query_once(monkeypatch):
+    embedded = []
+
+    def embed_query(query):
+        embedded.append(query)
+        return unit(1).tolist()
+
+    chunk = {"text": "Q4 revenue grew 20%", "source": "finance.md", "department": "Finance", "distance": 0.3}
+
+    monkeypatch.setattr(rag, "embed_query", embed_query)
+    monkeypatch.setattr(search_service, "embed_query", embed_query)
+    monkeypatch.setattr(search_service, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(search_service, "vector_search", lambda embedding, permissions, n: [chunk])
+    monkeypatch.setattr(rag, "CONTEXT_PACKING", False)
+    monkeypatch.setattr(rag, "generate_answer", lambda prompt: "Revenue grew 20%")
+    monkeypatch.setattr(rag, "answer_cache", SemanticAnswerCache())
+
+    # Miss: answer cache lookup, retrieval and store share one embedding
+    assert rag._rag_pipeline("What was Q4 revenue?", "finance")["answer"] == "Revenue grew 20%"
+    assert embedded == ["What was Q4 revenue?"]
+
+    assert rag._rag_pipeline("What was Q4 revenue?", "finance")["answer"] == "Revenue grew 20%"
+    assert len(embedded) == 2
@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.core.rbac import get_role_permissions
+from app.services import batch_chat, rag, search_service
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedding_cache import EmbeddingCache
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None):
+        self.encoded.extend(texts)
+        return np.tile(np.eye(1, 8, dtype=np.float32), (len(texts), 1))
+
+
+CHUNK = {"text": "Q4 revenue grew 20%", "source": "finance.md", "department": "Finance", "distance": 0.3}
+
+
+def test_batch_embeds_each_query_once(monkeypatch):
+    model = FakeModel()
+    cache = EmbeddingCache()
+
+    monkeypatch.setattr(search_service, "get_model", lambda: model)
+    monkeypatch.setattr(search_service, "embedding_cache", cache)
+    monkeypatch.setattr(search_service, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(
+        search_service, "vector_search_batch",
+        lambda embeddings, permissions, n: [[CHUNK] for _ in embeddings]
+    )
+    monkeypatch.setattr(rag, "CONTEXT_PACKING", False)
+    monkeypatch.setattr(rag, "answer_cache", SemanticAnswerCache())
+
+    queries = ["What was Q4 revenue?", "What were Q4 margins?"]
+    prepared, embeddings = batch_chat.prepare_batch(queries, get_role_permissions("finance"))
+
+    assert [kind for kind, _ in prepared] == ["context", "context"]
+    assert len(model.encoded) == 2
+    # One lookup per query, by the batched encode; no repeat lookups count as hits
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    monkeypatch.setattr(batch_chat, "generate_answer", lambda prompt: "Revenue grew 20%")
+    batch_chat.generate(queries[0], get_role_permissions("finance"), prepared[0][1], embeddings[0])
+
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert rag.answer_cache.stats()["entries"] == 1
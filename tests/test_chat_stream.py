@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.api import ai_routes
+from app.core.rbac import get_role_permissions
+
+
+CONTEXT = {"prompt": "prompt", "sources": ["finance.md"], "confidence": 0.8, "departments": {"finance"}}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"cached": [], "logged": []}
+
+    async def stream_answer(prompt):
+        for token in ("Revenue ", "grew ", "20%"):
+            yield token
+
+    monkeypatch.setattr(ai_routes, "embed_query", lambda query: [1.0])
+    monkeypatch.setattr(ai_routes, "get_cached_answer", lambda query, permissions, embedding: None)
+    monkeypatch.setattr(ai_routes, "prepare_context", lambda query, permissions, embedding: CONTEXT)
+    monkeypatch.setattr(ai_routes, "stream_answer", stream_answer)
+    monkeypatch.setattr(ai_routes, "cache_answer", lambda *args: calls["cached"].append(args[3]))
+    monkeypatch.setattr(ai_routes, "log_access", lambda **kwargs: calls["logged"].append(kwargs))
+    return calls
+
+
+async def read_events(limit: int = None) -> list:
+    response = await ai_routes.chat_stream(
+        ai_routes.ChatRequest(query="What was Q4 revenue?"),
+        current_user={"username": "alice", "role": "finance"},
+        permissions=get_role_permissions("finance")
+    )
+
+    events = []
+    stream = response.body_iterator
+    try:
+        async for event in stream:
+            events.append(event)
+            if limit is not None and len(events) >= limit:
+                break
+    finally:
+        # What the server does when the client goes away
+        await stream.aclose()
+    return events
+
+
+def test_completed_stream_is_cached_and_logged(calls):
+    events = asyncio.run(read_events())
+
+    assert events[-1].startswith("event: done")
+    assert calls["cached"] == ["Revenue grew 20%"]
+    assert len(calls["logged"]) == 1
+
+
+def test_disconnect_mid_stream_is_logged_but_not_cached(calls):
+    # meta and the first token only
+    asyncio.run(read_events(limit=2))
+
+    assert calls["cached"] == []
+    assert len(calls["logged"]) == 1
+    assert calls["logged"][0]["username"] == "alice"
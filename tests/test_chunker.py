@@ -0,0 +1,220 @@
+import json
+from pathlib import Path
+
+import pytest
+
+try:
+    from preprocessing import chunker
+except Exception as exc:  # nltk missing, or the cl100k_base tokenizer cannot be downloaded
+    pytest.skip(f"chunker unavailable: {exc}", allow_module_level=True)
+
+
+MIN_TOKENS = 300
+MAX_TOKENS = 512
+
+
+def make_row(n_tokens: int, label: str) -> str:
+    # Grow the row until it encodes to exactly `n_tokens`
+    words = [label]
+    while chunker.count_tokens(" ".join(words)) < n_tokens:
+        words.append("pay")
+    row = " ".join(words)
+    assert chunker.count_tokens(row) == n_tokens
+    return row
+
+
+def chunk(rows: list) -> list:
+    return list(chunker.chunk_rows(iter(rows), MIN_TOKENS, MAX_TOKENS))
+
+
+def check_rows_kept(rows: list, chunks: list):
+    lines = [line for text, _ in chunks for line in text.split("\n")]
+    # Every row appears, in order; a rebalanced tail may repeat rows of the chunk before it
+    assert list(dict.fromkeys(lines)) == rows
+
+
+@pytest.mark.parametrize("sizes", [
+    # Merged tail of ~513-599 tokens: halving it would leave both sides under MIN_TOKENS
+    [260, 250, 60],
+    [200, 200, 100, 90],
+    [150] * 7 + [40],
+    [100] * 12,
+    [30] * 40,
+])
+def test_chunks_stay_within_bounds(sizes):
+    rows = [make_row(n, f"row{i}") for i, n in enumerate(sizes)]
+    chunks = chunk(rows)
+
+    check_rows_kept(rows, chunks)
+    for text, token_count in chunks:
+        assert token_count == chunker.count_tokens(text)
+        assert token_count <= MAX_TOKENS
+    if sum(sizes) >= MIN_TOKENS:
+        assert all(token_count >= MIN_TOKENS for _, token_count in chunks)
+
+
+def test_tail_that_cannot_reach_min_stays_short():
+    # The previous chunk is one row; taking it back would exceed MAX_TOKENS
+    rows = [make_row(500, "big"), make_row(100, "small")]
+    chunks = chunk(rows)
+
+    assert [text for text, _ in chunks] == rows
+    assert all(token_count <= MAX_TOKENS for _, token_count in chunks)
+
+
+def test_long_row_is_split_at_max_tokens():
+    chunks = chunk([make_row(1200, "long")])
+
+    assert len(chunks) == 3
+    assert all(token_count <= MAX_TOKENS for _, token_count in chunks)
+
+
+def check_spans(spans: list, n_tokens: int, min_tokens: int, max_tokens: int,
+                overlap_tokens: int):
+    assert spans[0][0] == 0
+    assert spans[-1][1] == n_tokens
+    for start, end in spans:
+        assert end - start <= max_tokens
+        if n_tokens >= min_tokens:
+            assert end - start >= min_tokens
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        assert prev_end - start >= overlap_tokens
+
+
+def test_chunk_spans_end_on_sentence_boundaries():
+    boundaries = list(range(0, 2000, 100)) + [2000]
+    spans = chunker.chunk_spans(boundaries, 2000, 300, 512, 50)
+
+    check_spans(spans, 2000, 300, 512, 50)
+    assert all(end in boundaries for _, end in spans)
+
+
+def test_chunk_spans_split_long_sentence_at_limit():
+    # One sentence longer than max_tokens: cuts fall on the token limit
+    spans = chunker.chunk_spans([0, 1300], 1300, 300, 512, 50)
+
+    check_spans(spans, 1300, 300, 512, 50)
+    assert spans[0] == (0, 512)
+    assert spans[1][0] == 512 - 50
+
+
+def test_chunk_spans_merge_short_tail():
+    spans = chunker.chunk_spans([0, 400, 450], 450, 300, 512, 50)
+
+    assert spans == [(0, 450)]
+
+
+def test_chunk_spans_short_text_is_one_span():
+    assert chunker.chunk_spans([0, 120], 120, 300, 512, 50) == [(0, 120)]
+
+
+@pytest.fixture
+def line_sentences(monkeypatch):
+    # punkt may be unavailable; treat each line as a sentence
+    monkeypatch.setattr(chunker, "sent_tokenize", lambda text: text.split("\n"))
+
+
+MIXED_TEXT = "\n".join(
+    f"Überstunden werden im Folgemonat ausgeglichen ({i}). "
+    f"残業は翌月に精算されます。従業員は申請書を提出してください。{i}"
+    for i in range(200)
+) + "\n" + "日本語の長い文章" * 400
+
+
+def test_chunk_text_does_not_split_characters(line_sentences):
+    chunks = chunker.chunk_text_with_counts(MIXED_TEXT, MIN_TOKENS, MAX_TOKENS, 50)
+
+    assert len(chunks) > 1
+    for text, _ in chunks:
+        assert "�" not in text
+
+
+def test_chunk_text_counts_match_stored_text(line_sentences):
+    chunks = chunker.chunk_text_with_counts(MIXED_TEXT, MIN_TOKENS, MAX_TOKENS, 50)
+
+    for text, token_count in chunks:
+        assert token_count == chunker.count_tokens(text)
+        assert token_count <= MAX_TOKENS
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch, line_sentences):
+    # infer_department matches on "data/raw/<department>" in the path
+    raw = tmp_path / "data" / "raw"
+    for department, text in [
+        ("finance", "Q4 revenue grew 20%.\nMargins held steady."),
+        ("hr", "Leave requests go through the HR portal."),
+        ("general", "The office opens at 9am."),
+    ]:
+        (raw / department).mkdir(parents=True)
+        (raw / department / f"{department}.md").write_text(text, encoding="utf-8")
+
+    monkeypatch.setattr(chunker, "RAW_DATA_DIR", raw)
+    monkeypatch.setattr(chunker, "OUTPUT_PATH", tmp_path / "processed" / "chunks.jsonl")
+    monkeypatch.setattr(chunker, "MANIFEST_PATH", tmp_path / "processed" / "manifest.json")
+    return raw
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    # Basenames of the documents chunked by each run
+    calls = []
+    process_document = chunker.process_document
+
+    def record(doc, role_config):
+        calls.append(Path(doc).name)
+        return process_document(doc, role_config)
+
+    monkeypatch.setattr(chunker, "process_document", record)
+    return calls
+
+
+def run_chunker() -> list:
+    chunker.main([])
+    with open(chunker.OUTPUT_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_unchanged_documents_are_reused(raw_dir, processed):
+    first = run_chunker()
+    processed.clear()
+
+    assert run_chunker() == first
+    assert processed == []
+
+
+def test_edited_document_is_rechunked(raw_dir, processed):
+    first = run_chunker()
+    old_ids = {r["chunk_id"] for r in first if r["source_document"] == "hr.md"}
+    processed.clear()
+
+    (raw_dir / "hr" / "hr.md").write_text("Leave requests now go through Workday.", encoding="utf-8")
+    records = run_chunker()
+
+    assert processed == ["hr.md"]
+    hr = [r for r in records if r["source_document"] == "hr.md"]
+    assert [r["text"] for r in hr] == ["Leave requests now go through Workday."]
+    assert not old_ids & {r["chunk_id"] for r in records}
+
+
+def test_removed_document_drops_out(raw_dir, processed):
+    run_chunker()
+    processed.clear()
+
+    (raw_dir / "finance" / "finance.md").unlink()
+    records = run_chunker()
+
+    assert processed == []
+    assert {r["source_document"] for r in records} == {"hr.md", "general.md"}
+    manifest = json.loads(chunker.MANIFEST_PATH.read_text(encoding="utf-8"))
+    assert "finance/finance.md" not in manifest["documents"]
+
+
+def test_chunker_version_change_rebuilds_everything(raw_dir, processed, monkeypatch):
+    run_chunker()
+    processed.clear()
+
+    monkeypatch.setattr(chunker, "CHUNKER_VERSION", chunker.CHUNKER_VERSION + "-next")
+    run_chunker()
+
+    assert sorted(processed) == ["finance.md", "general.md", "hr.md"]
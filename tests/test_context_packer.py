@@ -0,0 +1,101 @@
+import pytest
+
+from app.services import context_packer
+from app.services.context_packer import dedupe_overlaps, pack_context, strip_overlap
+
+
+SHARED = "Annual leave requests must be approved by the line manager in advance."
+
+
+def chunk(chunk_id: str, text: str, source: str, distance: float) -> dict:
+    return {"chunk_id": chunk_id, "text": text, "source": source, "department": "HR", "distance": distance}
+
+
+@pytest.fixture
+def encoder():
+    try:
+        context_packer.get_encoder()
+    except Exception as exc:  # the cl100k_base tokenizer cannot be downloaded
+        pytest.skip(f"tokenizer unavailable: {exc}")
+
+
+def test_strip_overlap_removes_shared_prefix():
+    # `text` starts where `other` ends, as consecutive chunker windows do
+    other = "Employees get 24 days of annual leave. " + SHARED
+    text = SHARED + " Unused days expire at the end of March."
+
+    assert strip_overlap(text, other) == "Unused days expire at the end of March."
+
+
+def test_strip_overlap_removes_shared_suffix():
+    text = "Employees get 24 days of annual leave. " + SHARED
+    other = SHARED + " Unused days expire at the end of March."
+
+    assert strip_overlap(text, other) == "Employees get 24 days of annual leave."
+
+
+def test_strip_overlap_keeps_unrelated_text():
+    text = "Employees get 24 days of annual leave every calendar year."
+    other = "Quarterly revenue grew by twenty percent over the last year."
+
+    assert strip_overlap(text, other) == text
+
+
+def test_dedupe_overlaps_drops_near_duplicate_chunk():
+    best = chunk("hr_1", "Employees get 24 days of annual leave. " + SHARED, "leave.md", 0.2)
+    duplicate = chunk("hr_2", SHARED, "leave.md", 0.4)
+    other_doc = chunk("hr_3", SHARED, "handbook.md", 0.5)
+
+    texts = dedupe_overlaps([best, duplicate, other_doc])
+
+    assert texts[0] == best["text"]
+    # Wholly covered by the better chunk of the same document
+    assert texts[1] == ""
+    # Overlap is only removed within one source document
+    assert texts[2] == SHARED
+
+
+def retrieved() -> list:
+    return [
+        chunk("hr_1", "Employees get 24 days of annual leave. " + SHARED, "leave.md", 0.3),
+        chunk("hr_2", SHARED + " Unused annual leave expires at the end of March.", "leave.md", 0.5),
+        chunk("hr_3", "Sick leave needs a doctor's note after three days. Leave is tracked in the HR portal.",
+              "sick_leave.md", 0.6),
+        chunk("general_1", "The office opens at 9am. Visitors sign in at reception.", "office.md", 0.9),
+    ]
+
+
+@pytest.mark.parametrize("budget", [20, 40, 80, 700])
+def test_pack_context_stays_within_budget(encoder, budget):
+    packed = pack_context("how many days of annual leave", retrieved(), budget=budget)
+
+    # Each sentence also costs about one token for its bullet or separator
+    sentences = sum(len(context_packer.split_sentences(c["text"])) for c in packed)
+    assert sum(c["token_count"] for c in packed) + sentences <= budget
+    for c in packed:
+        assert c["token_count"] == sum(
+            context_packer.count_tokens(s) for s in context_packer.split_sentences(c["text"])
+        )
+
+
+def test_pack_context_keeps_top_chunk_first(encoder):
+    chunks = retrieved()
+    packed = pack_context("how many days of annual leave", chunks, budget=40)
+
+    assert packed[0]["chunk_id"] == chunks[0]["chunk_id"]
+    assert "24 days of annual leave" in packed[0]["text"]
+
+
+def test_pack_context_keeps_source_attribution(encoder):
+    chunks = retrieved()
+    by_id = {c["chunk_id"]: c for c in chunks}
+
+    packed = pack_context("annual leave and sick leave", chunks)
+
+    assert packed
+    for c in packed:
+        original = by_id[c["chunk_id"]]
+        assert (c["source"], c["department"]) == (original["source"], original["department"])
+        # Packed text only holds sentences of the chunk it is attributed to
+        for sentence in context_packer.split_sentences(c["text"]):
+            assert sentence in original["text"]
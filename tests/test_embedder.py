@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from app.services import embedder
+
+
+def make_chunk(chunk_id: str, text: str, source: str, department: str) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "text": text,
+        "source_document": source,
+        "department": department,
+        "token_count": len(text.split())
+    }
+
+
+class FakeCollection:
+    def __init__(self):
+        self.metadatas = {}
+        self.deleted = []
+        self.upserted = []
+
+    def get(self, include, limit, offset):
+        ids = sorted(self.metadatas)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [self.metadatas[i] for i in ids]}
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for chunk_id in ids:
+            del self.metadatas[chunk_id]
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        # Like Chroma, upsert merges new metadata into an existing record
+        self.upserted.extend(ids)
+        for chunk_id, meta in zip(ids, metadatas):
+            self.metadatas.setdefault(chunk_id, {}).update(meta)
+
+    def readable_by(self, role: str) -> list:
+        # What a `where={"role_<x>": True}` pre-filter returns
+        key = embedder.role_filter_key(role)
+        return sorted(i for i, meta in self.metadatas.items() if meta.get(key) is True)
+
+
+class FakeStore:
+    def get_vectors(self, ids):
+        return np.zeros((len(ids), 4), dtype=np.float32)
+
+
+FINANCE = make_chunk("finance.md_a", "Q4 revenue grew 20%", "finance.md", "Finance")
+HR = make_chunk("hr.md_b", "Leave requests go through the HR portal", "hr.md", "HR")
+GENERAL = make_chunk("general.md_c", "The office opens at 9am", "general.md", "General")
+
+
+def synced(chunks: list) -> FakeCollection:
+    collection = FakeCollection()
+    embedder.sync_collection(collection, chunks, FakeStore(), batch_size=2)
+    collection.deleted.clear()
+    collection.upserted.clear()
+    return collection
+
+
+def test_removed_and_changed_chunks_are_deleted():
+    collection = synced([FINANCE, HR, GENERAL])
+
+    # finance.md was removed and hr.md edited (chunk ids follow the text)
+    edited = make_chunk("hr.md_d", "Leave requests now go through Workday", "hr.md", "HR")
+    pending, stale_ids = embedder.sync_collection(
+        collection, [edited, GENERAL], FakeStore(), batch_size=2
+    )
+
+    assert sorted(collection.deleted) == ["finance.md_a", "hr.md_b"]
+    assert sorted(stale_ids) == ["finance.md_a", "hr.md_b"]
+    assert collection.upserted == ["hr.md_d"]
+    assert [chunk["chunk_id"] for chunk in pending] == ["hr.md_d"]
+    assert sorted(collection.metadatas) == ["general.md_c", "hr.md_d"]
+
+
+def test_changed_metadata_is_upserted_without_deletes():
+    collection = synced([FINANCE, HR])
+
+    moved = dict(HR, department="General")
+    embedder.sync_collection(collection, [FINANCE, moved], FakeStore(), batch_size=2)
+
+    assert collection.deleted == []
+    assert collection.upserted == ["hr.md_b"]
+
+
+def test_chunk_moved_to_another_department_loses_old_readers():
+    collection = synced([FINANCE, HR])
+    assert "finance.md_a" in collection.readable_by("finance")
+
+    moved = dict(FINANCE, department="HR")
+    embedder.sync_collection(collection, [moved, HR], FakeStore(), batch_size=2)
+
+    assert collection.upserted == ["finance.md_a"]
+    assert "finance.md_a" not in collection.readable_by("finance")
+    assert "finance.md_a" in collection.readable_by("hr")
+    assert "finance.md_a" in collection.readable_by("c-level")
+    assert collection.metadatas["finance.md_a"]["accessible_roles"] == "HR,C-Level"
+
+
+def test_unchanged_collection_is_left_alone():
+    collection = synced([FINANCE, HR, GENERAL])
+
+    pending, stale_ids = embedder.sync_collection(
+        collection, [FINANCE, HR, GENERAL], FakeStore(), batch_size=2
+    )
+
+    assert pending == [] and stale_ids == []
+    assert collection.deleted == [] and collection.upserted == []
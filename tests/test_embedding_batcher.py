@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def encode_lengths(texts):
+    return [len(text) for text in texts]
+
+
+def workers() -> list:
+    return [t for t in threading.enumerate() if t.name == "embedding-batcher"]
+
+
+def test_concurrent_callers_get_their_own_vectors():
+    batcher = EmbeddingBatcher(encode_lengths, max_wait_ms=20)
+    results = {}
+
+    def call(text):
+        results[text] = batcher.encode(text)
+
+    threads = [threading.Thread(target=call, args=("x" * n,)) for n in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    assert results == {"x" * n: n for n in range(1, 9)}
+    assert batcher.stats()["items"] == 8
+
+
+def test_encode_times_out_instead_of_hanging():
+    release = threading.Event()
+
+    def stuck(texts):
+        release.wait()
+        return encode_lengths(texts)
+
+    batcher = EmbeddingBatcher(stuck, max_wait_ms=0, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        batcher.encode("first")
+
+    release.set()
+    assert batcher.encode("second") == 6
+    batcher.stop()
+
+
+def test_encode_after_stop_runs_a_single_worker():
+    before = len(workers())
+    batcher = EmbeddingBatcher(encode_lengths)
+    assert batcher.encode("abc") == 3
+
+    stopper = threading.Thread(target=batcher.stop)
+    stopper.start()
+    assert batcher.encode("abcd") == 4
+    stopper.join()
+
+    assert len(workers()) - before <= 1
+    batcher.stop()
+    assert len(workers()) == before
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+
+from app.services.embedding_store import EmbeddingStore, content_hash, migrate_jsonl
+
+
+TEXTS = ["Q4 revenue grew 20%", "Leave requests go through the HR portal", "The office opens at 9am"]
+
+VECTORS = np.random.default_rng(0).normal(size=(len(TEXTS), 8)).astype(np.float32)
+
+
+def write_legacy(path):
+    # Legacy cache records use the old positional chunk ids
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (text, vector) in enumerate(zip(TEXTS, VECTORS)):
+            f.write(json.dumps({"chunk_id": f"doc.md_{i}", "text": text, "embedding": vector.tolist()}) + "\n")
+
+
+def test_migrated_vectors_are_reused_under_new_ids(tmp_path):
+    legacy = tmp_path / "chunks_with_embeddings.jsonl"
+    write_legacy(legacy)
+    store = EmbeddingStore(tmp_path / "embeddings", dim=8)
+    assert migrate_jsonl(legacy, store) == len(TEXTS)
+
+    new_ids = [f"doc.md_{content_hash(text)[:12]}" for text in TEXTS]
+    hashes = [content_hash(text) for text in TEXTS]
+    assert all(store.lookup(chunk_id, h) is None for chunk_id, h in zip(new_ids, hashes))
+
+    assert store.adopt(new_ids, hashes) == len(TEXTS)
+    assert all(store.lookup(chunk_id, h) is not None for chunk_id, h in zip(new_ids, hashes))
+    np.testing.assert_array_equal(store.get_vectors(new_ids), VECTORS)
+
+    # Dropping the legacy ids leaves no orphaned rows, and compaction keeps the vectors
+    store.remove([f"doc.md_{i}" for i in range(len(TEXTS))])
+    assert store.orphaned_rows == 0
+    store.compact()
+    np.testing.assert_array_equal(store.get_vectors(new_ids), VECTORS)
+
+
+def test_adopt_skips_changed_text_and_cached_ids(tmp_path):
+    store = EmbeddingStore(tmp_path, dim=8)
+    store.append(["a"], [content_hash(TEXTS[0])], VECTORS[:1])
+
+    # "a" is already cached; "b" has text no stored row was computed from
+    assert store.adopt(["a", "b"], [content_hash(TEXTS[0]), content_hash(TEXTS[1])]) == 0
+    assert store.lookup("b") is None
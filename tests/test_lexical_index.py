@@ -0,0 +1,43 @@
+import os
+
+from app.services.lexical_index import LexicalIndex, build_lexical_index
+
+
+CHUNKS = [
+    {"chunk_id": "finance_1", "department": "Finance", "text": "Q4 revenue grew 20 percent"},
+    {"chunk_id": "hr_1", "department": "HR", "text": "employee FINEMP1001 revenue bonus"},
+    {"chunk_id": "general_1", "department": "General", "text": "revenue figures are shared quarterly"},
+]
+
+
+def reload(index: LexicalIndex):
+    # Skip the once-per-second version check
+    index.watcher.expire()
+
+
+def test_search_only_reads_the_given_departments(tmp_path):
+    build_lexical_index(CHUNKS, tmp_path)
+    index = LexicalIndex(tmp_path)
+
+    hits = [chunk_id for chunk_id, _ in index.search("revenue", ["hr", "general"])]
+
+    assert sorted(hits) == ["general_1", "hr_1"]
+    assert index.search("revenue", ["engineering"]) == []
+
+
+def test_partition_names_are_cached_until_the_index_changes(tmp_path):
+    build_lexical_index(CHUNKS, tmp_path)
+    index = LexicalIndex(tmp_path)
+    assert index.partition_names() == ["finance", "general", "hr"]
+
+    # A stray file is not picked up until the index is rebuilt
+    (tmp_path / "marketing.json.gz").write_bytes(b"")
+    reload(index)
+    assert index.partition_names() == ["finance", "general", "hr"]
+
+    build_lexical_index(CHUNKS[:2], tmp_path)
+    # Make sure the rebuild is visible even on coarse-mtime filesystems
+    meta = tmp_path / "meta.json"
+    os.utime(meta, ns=(meta.stat().st_atime_ns, meta.stat().st_mtime_ns + 1_000_000))
+    reload(index)
+    assert index.partition_names() == ["finance", "hr"]
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+
+def tripped(reset_timeout: float = 0.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_open_circuit_fails_fast():
+    breaker = tripped(reset_timeout=60.0)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.trips == 1
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    breaker = tripped()
+    barrier = threading.Barrier(16)
+    permits = []
+
+    def call():
+        barrier.wait()
+        permits.append(breaker.allow())
+
+    threads = [threading.Thread(target=call) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for permit in permits if permit) == 1
+
+
+def test_probe_verdict_decides_the_circuit():
+    breaker = tripped()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker = tripped()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker._state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+
+
+def test_release_frees_only_the_probe_it_was_given():
+    breaker = tripped()
+    probe = breaker.allow()
+
+    # A call admitted while the circuit was closed, or a stale probe, must not free the slot
+    breaker.release(True)
+    breaker.release(object())
+    assert not breaker.allow()
+
+    breaker.release(probe)
+    assert breaker.allow()
+
+
+def test_probe_without_verdict_is_released_by_complete():
+    gateway = LLMGateway(max_retries=0)
+    gateway.breaker = tripped()
+
+    def bad_request(timeout):
+        raise ProviderError(400)
+
+    with pytest.raises(LLMUnavailable) as error:
+        gateway.complete(bad_request)
+    assert error.value.reason == "error"
+
+    # The 400 says nothing about the provider, so the next call may probe
+    assert gateway.complete(lambda timeout: "ok") == "ok"
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_abandoned_stream_does_not_free_another_calls_probe():
+    gateway = LLMGateway(max_retries=0)
+    gateway.breaker = CircuitBreaker(threshold=1, reset_timeout=0.0)
+
+    async def open_stream(timeout):
+        async def fragments():
+            yield "a"
+            yield "b"
+        return fragments()
+
+    async def scenario():
+        # Admitted while closed, then the circuit trips and a probe is handed out
+        stream = gateway.stream(open_stream)
+        assert await stream.__anext__() == "a"
+
+        gateway.breaker.record_failure()
+        probe = gateway.breaker.allow()
+        assert probe
+
+        await stream.aclose()
+        return probe
+
+    probe = asyncio.run(scenario())
+
+    assert not gateway.breaker.allow()
+    gateway.breaker.release(probe)
+    assert gateway.breaker.allow()
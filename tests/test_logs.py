@@ -0,0 +1,37 @@
+from app.services import logs
+from app.services.logs import AccessLogWriter
+
+
+RECORD = {"ts": "2026-01-01 00:00:00", "username": "a", "role": "hr", "query": "q", "confidence": 0.5}
+
+
+def write_and_flush(writer: AccessLogWriter):
+    writer.write(dict(RECORD))
+    writer.stop()
+
+
+def test_age_rotation_survives_restarts(tmp_path, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(logs.time, "time", lambda: now)
+    path = tmp_path / "access.log"
+
+    write_and_flush(AccessLogWriter(path, rotate_seconds=3600))
+
+    # Each restart appends to the existing file, so its mtime keeps moving
+    for _ in range(3):
+        now += 1800
+        write_and_flush(AccessLogWriter(path, rotate_seconds=3600))
+
+    backups = list(tmp_path.glob("access.log.*"))
+    assert len(backups) >= 1
+    assert path.read_text(encoding="utf-8").count("\n") < 4
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    writer = AccessLogWriter(tmp_path / "access.log", max_queue=1)
+    # Not started, so nothing drains the queue
+    writer._thread = object()
+
+    assert writer.write(dict(RECORD))
+    assert not writer.write(dict(RECORD))
+    assert writer.stats()["dropped"] == 1
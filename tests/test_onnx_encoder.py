@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+from app.services.encoders import ONNX_MODEL_FILE, QUANTIZED_MODEL_FILE, OnnxEncoder
+from app.services.search_service import MODEL_NAME, ONNX_MODEL_DIR
+
+
+# Minimum cosine similarity to the sentence-transformers vector
+TOLERANCES = {False: 0.999, True: 0.98}
+
+TEXTS = [
+    "What is the leave policy for employees?",
+    "Q4 2024 revenue",
+    "FINEMP1001 attendance",
+    "How does the engineering deployment process work, and who approves a production release?",
+    # Longer than the model's 256 word pieces, so truncation must match too
+    " ".join(["The quarterly financial report covers revenue, margins and operating costs."] * 40),
+]
+
+
+# Download failures surface as OSError: requests and huggingface_hub errors
+# (connection errors, LocalEntryNotFoundError in offline mode) subclass it.
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory) -> Path:
+    # Use an exported model if there is one, otherwise export into a temp dir
+    existing = Path(ONNX_MODEL_DIR)
+    if (existing / ONNX_MODEL_FILE).exists():
+        return existing
+
+    from app.services import export_onnx
+
+    output = tmp_path_factory.mktemp("onnx")
+    try:
+        try:
+            import onnx  # noqa: F401 (needed for --quantize)
+            export_onnx.main(["--output", str(output), "--quantize"])
+        except ImportError:
+            export_onnx.main(["--output", str(output)])
+    except OSError:
+        pytest.skip("model unavailable offline")
+    return output
+
+
+@pytest.fixture(scope="module")
+def reference() -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+    except OSError:
+        pytest.skip("model unavailable offline")
+    return model.encode(TEXTS, normalize_embeddings=True)
+
+
+@pytest.mark.parametrize("quantized", [False, True], ids=["fp32", "int8"])
+def test_onnx_matches_sentence_transformers(model_dir, reference, quantized):
+    if not (model_dir / (QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)).exists():
+        pytest.skip("model not exported")
+
+    encoder = OnnxEncoder(model_dir, quantized=quantized)
+    # Batched and single encodes go through padding differently; both must match
+    batched = encoder.encode(TEXTS)
+    single = np.stack([encoder.encode(text) for text in TEXTS])
+
+    for vectors in (batched, single):
+        cosines = np.sum(vectors * reference, axis=1)
+        assert cosines.min() >= TOLERANCES[quantized], cosines
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.core.rbac import (
+    RBAC_RULES, get_current_permissions, get_role_permissions, rbac_required, role_filter_key
+)
+from app.services import search_service
+from app.services.lexical_index import LexicalIndex, build_lexical_index
+from app.services.numpy_backend import NumpyVectorIndex, build_numpy_index
+
+
+DEPARTMENTS = ["Finance", "HR", "Marketing", "Engineering", "General"]
+
+CHUNKS = [
+    {
+        "chunk_id": f"{department.lower()}_{i}",
+        "text": f"{department} revenue report number {i}",
+        "source_document": f"{department.lower()}.md",
+        "department": department,
+        "token_count": 6
+    }
+    for department in DEPARTMENTS
+    for i in range(3)
+]
+
+VECTORS = np.random.default_rng(0).normal(size=(len(CHUNKS), 16)).astype(np.float32)
+VECTORS /= np.linalg.norm(VECTORS, axis=1, keepdims=True)
+
+
+def allowed_departments(role: str) -> set:
+    return set(RBAC_RULES[role])
+
+
+def readers(department: str) -> list:
+    # As embedder.accessible_roles_for: General is readable by every role
+    return [role for role, departments in RBAC_RULES.items() if department.lower() in departments]
+
+
+def departments_of(results: list) -> set:
+    return {r["department"].lower() for r in results}
+
+
+@pytest.fixture
+def numpy_index(tmp_path, monkeypatch):
+    directory = tmp_path / "numpy_index"
+    build_numpy_index(CHUNKS, VECTORS, directory)
+    index = NumpyVectorIndex(directory).ensure_loaded()
+
+    monkeypatch.setattr(search_service, "SEARCH_BACKEND", "numpy")
+    monkeypatch.setattr(search_service, "numpy_index", index)
+    return index
+
+
+@pytest.fixture
+def chroma_collection(tmp_path, monkeypatch):
+    chromadb = pytest.importorskip("chromadb")
+
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma_db"))
+    collection = client.get_or_create_collection("chroma_db")
+    collection.add(
+        ids=[c["chunk_id"] for c in CHUNKS],
+        embeddings=VECTORS.tolist(),
+        documents=[c["text"] for c in CHUNKS],
+        metadatas=[
+            {
+                "source_document": c["source_document"],
+                "department": c["department"],
+                "accessible_roles": ",".join(readers(c["department"])),
+                **{role_filter_key(role): True for role in readers(c["department"])}
+            }
+            for c in CHUNKS
+        ]
+    )
+
+    monkeypatch.setattr(search_service, "SEARCH_BACKEND", "chroma")
+    monkeypatch.setattr(search_service, "collection", collection)
+    return collection
+
+
+@pytest.mark.parametrize("role", sorted(RBAC_RULES))
+def test_chroma_query_only_ranks_the_roles_chunks(chroma_collection, role):
+    permissions = get_role_permissions(role)
+
+    batch = search_service.vector_search_batch(VECTORS.tolist(), permissions, len(CHUNKS))
+
+    for results in batch:
+        # Nothing from another role's departments, and nothing allowed crowded out
+        assert departments_of(results) == allowed_departments(role)
+
+
+@pytest.mark.parametrize("role", sorted(RBAC_RULES))
+def test_chroma_filter_is_applied_before_top_k(chroma_collection, role):
+    permissions = get_role_permissions(role)
+
+    # Every role can read at least 3 chunks; a post-filter would return fewer
+    batch = search_service.vector_search_batch(VECTORS.tolist(), permissions, 3)
+
+    assert all(len(results) == 3 for results in batch)
+    assert all(departments_of(results) <= allowed_departments(role) for results in batch)
+
+
+def test_chroma_stale_role_flag_does_not_leak(chroma_collection):
+    # An HR chunk still flagged for Finance, as a merged upsert could leave it
+    chroma_collection.add(
+        ids=["stale_hr"],
+        embeddings=[VECTORS[0].tolist()],
+        documents=["HR salary review"],
+        metadatas=[{
+            "source_document": "hr.md",
+            "department": "HR",
+            "accessible_roles": "HR,C-Level",
+            role_filter_key("finance"): True,
+            role_filter_key("hr"): True,
+            role_filter_key("c-level"): True
+        }]
+    )
+
+    results = search_service.vector_search_batch([VECTORS[0].tolist()], get_role_permissions("finance"), 3)[0]
+
+    assert "stale_hr" not in [r["chunk_id"] for r in results]
+    # The dropped row's slot is refilled from the over-fetch
+    assert len(results) == 3
+    assert departments_of(results) <= allowed_departments("finance")
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+@pytest.mark.parametrize("role", sorted(RBAC_RULES))
+def test_numpy_bitmask_only_ranks_the_roles_chunks(tmp_path, role, dtype):
+    build_numpy_index(CHUNKS, VECTORS, tmp_path, dtype=dtype)
+    index = NumpyVectorIndex(tmp_path).ensure_loaded()
+
+    for results in index.search_batch(VECTORS, role, k=3):
+        assert len(results) == 3
+        assert departments_of(results) <= allowed_departments(role)
+
+    everything = index.search_batch(VECTORS, role, k=len(CHUNKS))
+    assert all(departments_of(results) == allowed_departments(role) for results in everything)
+
+
+def test_numpy_get_does_not_load_forbidden_chunks(numpy_index):
+    chunk_ids = [c["chunk_id"] for c in CHUNKS]
+
+    fetched = numpy_index.get(chunk_ids, VECTORS[0], "hr")
+
+    assert departments_of(fetched.values()) == allowed_departments("hr")
+
+
+def test_unknown_role_reads_nothing(numpy_index):
+    assert numpy_index.search(VECTORS[0], "contractor", k=5) == []
+    assert search_service.search_with_rbac("revenue", "contractor") == []
+
+
+@pytest.fixture
+def hybrid(tmp_path, monkeypatch, numpy_index):
+    build_lexical_index(CHUNKS, tmp_path / "lexical_index")
+    monkeypatch.setattr(search_service, "HYBRID_SEARCH", True)
+    monkeypatch.setattr(search_service, "lexical_index", LexicalIndex(tmp_path / "lexical_index"))
+
+    # Every query lands next to a Finance chunk, so the vector side alone would prefer it
+    monkeypatch.setattr(search_service, "embed_query", lambda query: VECTORS[0].tolist())
+    monkeypatch.setattr(search_service, "embed_queries", lambda queries: [VECTORS[0].tolist()] * len(queries))
+
+
+@pytest.mark.parametrize("role", sorted(RBAC_RULES))
+def test_hybrid_search_only_returns_the_roles_chunks(hybrid, role):
+    # "revenue" matches a chunk in every department partition
+    results = search_service.search_with_rbac("finance revenue report", role, k=len(CHUNKS))
+
+    assert departments_of(results) == allowed_departments(role)
+
+
+@pytest.mark.parametrize("role", sorted(RBAC_RULES))
+def test_batched_hybrid_search_only_returns_the_roles_chunks(hybrid, role):
+    batch = search_service.search_with_rbac_batch(["finance revenue", "hr revenue"], role, k=len(CHUNKS))
+
+    assert all(departments_of(results) == allowed_departments(role) for results in batch)
+
+
+@pytest.mark.parametrize("role", [None, 42, ["finance"], {"name": "finance"}])
+def test_malformed_role_claim_is_forbidden(role):
+    user = {"username": "alice", "role": role}
+
+    for check in (get_current_permissions, rbac_required(), rbac_required("finance")):
+        with pytest.raises(HTTPException) as excinfo:
+            check(current_user=user)
+        assert excinfo.value.status_code == 403
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from app.services import rag
+from app.services.singleflight import SingleFlight
+
+
+def run_concurrently(calls: list) -> list:
+    results = [None] * len(calls)
+
+    def run(i, fn):
+        results[i] = fn()
+
+    threads = [threading.Thread(target=run, args=(i, fn)) for i, fn in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def wait_for_waiters(flight: SingleFlight, n: int):
+    deadline = time.monotonic() + 5
+    while flight.stats()["waiting"] < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_same_question_under_different_roles_has_different_keys():
+    finance = rag.coalesce_key("What was Q4 revenue?", "finance")
+
+    assert rag.coalesce_key("  what was q4 REVENUE? ", "Finance") == finance
+    for role in ("hr", "engineering", "marketing", "employees", "c-level"):
+        assert rag.coalesce_key("What was Q4 revenue?", role) != finance
+
+
+def test_identical_concurrent_calls_share_one_leader():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    def call():
+        return flight.do("key", slow)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+
+    followers = [threading.Thread(target=call) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    wait_for_waiters(flight, 4)
+    release.set()
+
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(runs) == 1
+    assert flight.stats() == {"in_flight": 0, "waiting": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_pipeline_results_are_never_shared_across_roles(monkeypatch):
+    monkeypatch.setattr(rag, "COALESCE_REQUESTS", True)
+    monkeypatch.setattr(rag, "inflight_requests", SingleFlight())
+
+    roles = ["finance", "hr", "engineering", "marketing", "employees", "c-level"]
+    lock = threading.Lock()
+    leaders = []
+    all_in_flight = threading.Event()
+
+    def pipeline(query, user_role):
+        # Holds the first leaders until one per role is in flight, so a shared key would coalesce them
+        with lock:
+            leaders.append(user_role)
+            if len(leaders) >= len(roles):
+                all_in_flight.set()
+        all_in_flight.wait(2)
+        return {"answer": f"for {user_role}", "sources": [], "confidence": 1.0}
+
+    monkeypatch.setattr(rag, "_rag_pipeline", pipeline)
+
+    callers = [role for role in roles for _ in range(2)]
+    results = run_concurrently([
+        lambda role=role: rag.rag_pipeline("What was Q4 revenue?", role) for role in callers
+    ])
+
+    assert [result["answer"] for result in results] == [f"for {role}" for role in callers]
+    assert rag.inflight_requests.stats()["leaders"] >= len(roles)
+
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    wait_for_waiters(flight, 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+
+from app.services import auth
+from app.services.token_cache import TokenCache, token_digest
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(max_size=16)
+    monkeypatch.setattr(auth, "token_cache", cache)
+    return cache
+
+
+def make_token(claims: dict, key: str = auth.SECRET_KEY) -> str:
+    return jwt.encode(dict({"exp": int(time.time()) + 600}, **claims), key, algorithm=auth.ALGORITHM)
+
+
+def test_hit_matches_a_full_decode(cache):
+    token = auth.create_access_token({"sub": "alice", "role": "Finance"})
+
+    first = auth._verify_user(token)
+    second = auth._verify_user(token)
+
+    payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    assert first == second == {"username": payload["sub"], "role": payload["role"]}
+    assert cache.stats()["hits"] == 1
+
+    # Callers get a copy; changing it does not change the cached claims
+    second["role"] = "C-Level"
+    assert auth._verify_user(token)["role"] == "Finance"
+
+
+def test_entry_is_not_served_past_exp(cache, monkeypatch):
+    exp = int(time.time()) + 60
+    token = make_token({"sub": "alice", "role": "Finance", "exp": exp})
+    auth._verify_user(token)
+    assert cache.stats()["size"] == 1
+
+    # Past exp the cache misses, and the full decode rejects the token
+    monkeypatch.setattr("app.services.token_cache.time.time", lambda: exp)
+
+    def expired(*args, **kwargs):
+        raise ExpiredSignatureError("Signature has expired.")
+
+    monkeypatch.setattr(auth.jwt, "decode", expired)
+
+    with pytest.raises(HTTPException) as excinfo:
+        auth._verify_user(token)
+    assert excinfo.value.status_code == 401
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_expires_at_exp(monkeypatch):
+    cache = TokenCache()
+    now = 1_000_000.0
+    monkeypatch.setattr("app.services.token_cache.time.time", lambda: now)
+
+    cache.put("digest", {"username": "alice", "role": "Finance"}, exp=now + 10)
+    now += 9.9
+    assert cache.get("digest") is not None
+    now += 0.1
+    assert cache.get("digest") is None
+
+
+@pytest.mark.parametrize("token", [
+    # Signed with another key
+    make_token({"sub": "alice", "role": "C-Level"}, key="not-the-secret"),
+    # Missing role claim
+    make_token({"sub": "alice"}),
+    "not.a.jwt",
+])
+def test_invalid_token_is_not_cached(cache, token):
+    with pytest.raises(HTTPException) as excinfo:
+        auth._verify_user(token)
+
+    assert excinfo.value.status_code == 401
+    assert cache.stats()["size"] == 0
+
+
+def test_tampered_token_is_not_cached(cache):
+    token = auth.create_access_token({"sub": "alice", "role": "Finance"})
+    header, payload, signature = token.split(".")
+    forged = auth.create_access_token({"sub": "alice", "role": "C-Level"}).split(".")[1]
+
+    with pytest.raises(HTTPException):
+        auth._verify_user(".".join([header, forged, signature]))
+
+    assert cache.stats()["size"] == 0
+    assert cache.get(token_digest(".".join([header, forged, signature]))) is None
+
+
+def test_lru_eviction_keeps_max_size():
+    cache = TokenCache(max_size=3)
+    exp = time.time() + 600
+
+    for name in ("a", "b", "c"):
+        cache.put(name, {"username": name}, exp)
+    # "a" becomes the most recently used, so "b" is evicted first
+    cache.get("a")
+    cache.put("d", {"username": "d"}, exp)
+    cache.put("e", {"username": "e"}, exp)
+
+    assert cache.stats()["size"] == 3
+    assert cache.stats()["evictions"] == 2
+    assert cache.get("b") is None and cache.get("c") is None
+    assert all(cache.get(name) is not None for name in ("a", "d", "e"))
@@ -0,0 +1,56 @@
+import os
+
+from app.services.version_watcher import VersionWatcher
+
+
+def touch(path):
+    # Bump the mtime explicitly, so the change is visible on coarse-mtime filesystems
+    mtime = path.stat().st_mtime_ns + 1_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_first_check_reports_the_current_version(tmp_path):
+    path = tmp_path / "index_version"
+    path.write_text("1")
+    watcher = VersionWatcher(path)
+
+    assert watcher.changed(force=True)
+    assert not watcher.changed(force=True)
+
+
+def test_checks_are_throttled(tmp_path):
+    path = tmp_path / "index_version"
+    path.write_text("1")
+    watcher = VersionWatcher(path, interval=60)
+    watcher.changed()
+
+    touch(path)
+    assert not watcher.changed()
+
+    watcher.expire()
+    assert watcher.changed()
+
+
+def test_missing_file_is_a_version(tmp_path):
+    path = tmp_path / "index_version"
+    watcher = VersionWatcher(path, interval=0)
+
+    assert watcher.changed()
+    assert watcher.version is None
+    assert not watcher.changed()
+
+    path.write_text("1")
+    assert watcher.changed()
+
+    path.unlink()
+    assert watcher.changed()
+
+
+def test_reset_reports_a_change_again(tmp_path):
+    path = tmp_path / "index_version"
+    path.write_text("1")
+    watcher = VersionWatcher(path, interval=0)
+    watcher.changed()
+
+    watcher.reset()
+    assert watcher.changed()